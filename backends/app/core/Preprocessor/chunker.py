@@ -0,0 +1,129 @@
+import math
+import os
+import re
+
+# join_chunks에서 앞 chunk와 겹친다고 볼 최소 글자 수 (우연히 같은 몇 글자를 지우지 않도록)
+MIN_OVERLAP_CHARS = 10
+# 조문이 여러 chunk로 나뉘면 두번째 chunk부터 '[법령] [장] [절] 조문제목 (계속) ' 으로 시작합니다.
+CONTINUATION_MARKER = ' (계속) '
+
+_TOKEN_PATTERN = re.compile(r'[가-힣]+|[a-zA-Z0-9]+|[^\s가-힣a-zA-Z0-9]')
+
+# 조문 본문을 나누는 경계. 앞에서부터 항(①) → 호(1.) → 목(가.) → 줄 → 문장 순으로, 한 덩어리가 토큰 예산을 넘을 때만 다음 경계로 더 나눕니다.
+_BOUNDARIES = [
+    re.compile(r'(?<=\s)(?=[①-⑳])'),
+    re.compile(r'(?<=\n)(?=\d+(?:의\d+)?\.\s)'),
+    re.compile(r'(?<=\n)(?=[가-하]\.\s)'),
+    re.compile(r'(?<=\n)'),
+    re.compile(r'(?<=[.다])\s+(?=\S)'),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """bge-m3(sentencepiece) 토큰 수의 근사치. 한글은 1.5글자, 영문/숫자는 4글자, 기호는 1개를 한 토큰으로 셉니다."""
+    n_tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if '가' <= piece[0] <= '힣':
+            n_tokens += math.ceil(len(piece) / 1.5)
+        elif piece[0].isalnum():
+            n_tokens += math.ceil(len(piece) / 4)
+        else:
+            n_tokens += 1
+    return n_tokens
+
+
+class ArticleChunker:
+    """긴 조문을 항/호 경계에서 max_tokens 이하의 chunk로 나눕니다. (DocumentProcessor.compose_vectors)
+
+    - 예산 안에 들어가는 조문은 나누지 않으므로, 짧은 조문의 chunk는 조문 하나를 통째로 담던 기존 chunk와 같습니다.
+    - 이어지는 chunk는 앞 chunk의 마지막 덩어리(항/호)들을 overlap_tokens만큼 다시 담아 문맥이 끊기지 않게 합니다.
+    - 경계를 찾지 못한 아주 긴 덩어리는 글자 수로 자릅니다.
+    """
+
+    def __init__(self, max_tokens: int = None, overlap_tokens: int = None, count_tokens = estimate_tokens):
+        self.max_tokens = max_tokens or int(os.getenv('CHUNK_MAX_TOKENS', 512))
+        self.overlap_tokens = overlap_tokens if overlap_tokens is not None else int(os.getenv('CHUNK_OVERLAP_TOKENS', 64))
+        self.count_tokens = count_tokens
+
+    def _units(self, text: str, start: int, end: int, level: int, budget: int) -> list[tuple[int, int]]:
+        if self.count_tokens(text[start:end]) <= budget:
+            return [(start, end)]
+        if level == len(_BOUNDARIES):
+            # 경계가 없는 덩어리는 토큰 예산에 맞춰 글자 수로 자릅니다.
+            step = max(1, (end - start) * budget // self.count_tokens(text[start:end]))
+            return [(i, min(i + step, end)) for i in range(start, end, step)]
+        cuts = [start] + [m.start() for m in _BOUNDARIES[level].finditer(text, start, end) if start < m.start() < end] + [end]
+        units = []
+        for unit_start, unit_end in zip(cuts, cuts[1:]):
+            units.extend(self._units(text, unit_start, unit_end, level + 1, budget))
+        return units
+
+    def split(self, text: str, budget: int = None) -> list[tuple[int, int]]:
+        """text를 나눈 chunk들의 (start, end) 위치. 나눌 필요가 없으면 [(0, len(text))]."""
+        budget = budget or self.max_tokens
+        if self.count_tokens(text) <= budget:
+            return [(0, len(text))]
+        units = self._units(text, 0, len(text), 0, budget)
+        sizes = [self.count_tokens(text[start:end]) for start, end in units]
+
+        spans, first = [], 0
+        while first < len(units):
+            last, total = first, sizes[first]
+            while last + 1 < len(units) and total + sizes[last + 1] <= budget:
+                last += 1
+                total += sizes[last]
+            spans.append((units[first][0], units[last][1]))
+            if last + 1 >= len(units):
+                break
+            # 다음 chunk는 현재 chunk의 끝쪽 덩어리들(overlap_tokens 이내)부터 시작합니다. (적어도 한 덩어리는 앞으로 나아갑니다.)
+            next_first, overlap = last + 1, 0
+            while next_first - 1 > first and overlap + sizes[next_first - 1] <= self.overlap_tokens \
+                    and overlap + sizes[next_first - 1] + sizes[last + 1] <= budget:
+                next_first -= 1
+                overlap += sizes[next_first]
+            first = next_first
+        return spans
+
+
+def join_chunks(texts: list[str]) -> str:
+    """같은 조문의 연속된 chunk 텍스트들을 하나로 합칩니다. 이어지는 chunk의 머리말과 앞 chunk와 겹치는 부분은 뺍니다."""
+    merged = texts[0]
+    for text in texts[1:]:
+        body = text.split(CONTINUATION_MARKER, 1)[1] if CONTINUATION_MARKER in text else text
+        overlap = next((k for k in range(min(len(merged), len(body)), MIN_OVERLAP_CHARS - 1, -1) if merged.endswith(body[:k])), 0)
+        merged += ('' if overlap else '\n') + body[overlap:]
+    return merged
+
+
+def merge_neighbor_chunks(documents: list[dict], neighbors: list[dict], window: int) -> list[dict]:
+    """검색된 chunk마다 같은 조문(file_name, name)에서 앞뒤 window개 안의 chunk를 이어붙인 문서로 바꿉니다.
+
+    neighbors는 VectorDB.expand_neighbors가 가져온 chunk들입니다. 같은 조문의 chunk가 여러 개 검색되어 범위가 겹치면 첫 문서 하나로 합칩니다.
+    i_chunk_on_doc이 없는(chunk 필드가 채워지기 전에 적재된) 문서는 그대로 둡니다.
+    """
+    chunks = {}
+    for chunk in list(neighbors) + list(documents):
+        if chunk.get('i_chunk_on_doc') is not None:
+            chunks[(chunk.get('file_name'), chunk.get('name'), chunk['i_chunk_on_doc'])] = chunk
+
+    merged, covered = [], {}
+    for document in documents:
+        i = document.get('i_chunk_on_doc')
+        if i is None:
+            merged.append(document)
+            continue
+        article = (document.get('file_name'), document.get('name'))
+        indexes = [j for j in range(i - window, i + window + 1) if (*article, j) in chunks]
+        if covered.get(article) and set(indexes) & covered[article]:
+            continue
+        covered.setdefault(article, set()).update(indexes)
+        # 중간에 빠진 chunk가 있으면 검색된 chunk와 이어지는 구간만 합칩니다.
+        start = end = i
+        while start - 1 in indexes:
+            start -= 1
+        while end + 1 in indexes:
+            end += 1
+        text = join_chunks([chunks[(*article, j)]['text'] for j in range(start, end + 1)])
+        merged.append(dict(document, text = text, n_char = len(text), n_word = len(text.split()),
+                           i_chunk_range = [start, end]))
+    return merged
@@ -0,0 +1,116 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+
+from ..VDB.schema import file_hash
+
+# 국가법령정보센터 PDF의 페이지 머리글/바닥글
+HEADER_FOOTER_PATTERN = re.compile(r'법제처\s+\d+\s+국가법령정보센터')
+
+
+class PageText:
+    """PDF 한 파일의 텍스트 추출 결과.
+
+    - raw_pages: 페이지별 원본 텍스트 (page.get_text())
+    - pages: 머리글/바닥글을 제거한 페이지별 텍스트
+    - text: pages를 이어붙인 전체 텍스트
+    - offsets: text 안에서 각 페이지의 시작 위치 (마지막 원소는 len(text))
+    """
+
+    def __init__(self, raw_pages: list[str]):
+        self.raw_pages = raw_pages
+        self.pages = [HEADER_FOOTER_PATTERN.sub('', page) for page in raw_pages]
+        self.offsets = [0]
+        for page in self.pages:
+            self.offsets.append(self.offsets[-1] + len(page))
+        self.text = ''.join(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+def _extract_range(file_path: str, start: int, end: int) -> list[str]:
+    doc = fitz.open(file_path)
+    try:
+        return [doc[i].get_text() for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _page_count(file_path: str) -> int:
+    doc = fitz.open(file_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _extract(file_path: str, doc=None) -> list[str]:
+    workers = int(os.getenv('PDF_EXTRACT_WORKERS', 0))
+    min_pages = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 200))
+    n_page = len(doc) if doc is not None else _page_count(file_path)
+    # PDF_EXTRACT_WORKERS > 1 이면 페이지가 많은 문서만 프로세스 풀로 나눠 추출합니다.
+    # (fitz 문서 객체는 프로세스 간에 넘길 수 없으므로 worker마다 파일을 다시 엽니다.)
+    if workers > 1 and n_page >= min_pages:
+        step = -(-n_page // workers)
+        starts = list(range(0, n_page, step))
+        with ProcessPoolExecutor(max_workers=len(starts)) as executor:
+            parts = executor.map(_extract_range, [file_path] * len(starts), starts, [min(start + step, n_page) for start in starts])
+            return [text for part in parts for text in part]
+    if doc is not None:
+        return [page.get_text() for page in doc]
+    return _extract_range(file_path, 0, n_page)
+
+
+class PageTextCache:
+    """파일 내용 해시를 키로 PageText를 보관하는 작은 LRU. (같은 파일을 구조 파악/본문 채우기에서 한 번만 추출)
+
+    파일 크기와 수정 시각이 그대로면 해시를 다시 계산하지 않습니다. (FileHashIndex와 같은 방식)
+    """
+
+    def __init__(self, max_items: int = None):
+        self.max_items = max_items or int(os.getenv('PAGE_TEXT_CACHE_MAX_ITEMS', 8))
+        self._entries = OrderedDict()
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file_hash(self, file_path: str) -> str:
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            known = self._hashes.get(path)
+            if known is not None and known[:2] == (stat.st_size, stat.st_mtime):
+                self._hashes.move_to_end(path)
+                return known[2]
+        content_hash = file_hash(path)
+        with self._lock:
+            self._hashes[path] = (stat.st_size, stat.st_mtime, content_hash)
+            while len(self._hashes) > self.max_items * 4:
+                self._hashes.popitem(last=False)
+        return content_hash
+
+    def get(self, file_path: str, doc=None) -> PageText:
+        key = self._file_hash(file_path)
+        with self._lock:
+            page_text = self._entries.get(key)
+            if page_text is not None:
+                self._entries.move_to_end(key)
+                return page_text
+        page_text = PageText(_extract(file_path, doc))
+        with self._lock:
+            self._entries[key] = page_text
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+        return page_text
+
+
+page_text_cache = PageTextCache()
+
+
+def extract_page_text(file_path: str, doc=None) -> PageText:
+    """file_path의 PageText를 반환합니다. 이미 열어둔 fitz 문서가 있으면 doc으로 넘깁니다."""
+    return page_text_cache.get(file_path, doc)
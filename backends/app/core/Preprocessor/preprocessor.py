@@ -5,11 +5,21 @@ import re
 import fitz
 from pydantic import BaseModel
 from datetime import datetime
-from ..llm.llm import Midm, Gemini, SK, LG, OpenRouterLLM
+from ..llm.llm import get_llm
+from .page_text import extract_page_text
+from .segmenter import ArticleSegmenter, page_for_index
+from .chunker import ArticleChunker, CONTINUATION_MARKER
+from .title_finder import title_from_text, title_from_file_name, same_title, get_legal_name_cache, MAX_TITLE_LENGTH
+from ..VDB.schema import file_hash
+import os
+from bisect import bisect_left, bisect_right
 
 import json
 from typing import Optional
 
+# llm_name_finder 응답 캐시 기간 (초). 같은 첫 페이지 미리보기면 같은 제목이 나옵니다.
+NAME_FINDER_CACHE_TTL = int(os.getenv('NAME_FINDER_CACHE_TTL', 90 * 24 * 3600))
+
 class VectorMeta(BaseModel):
     class Config:
         extra = 'allow'
@@ -31,17 +41,44 @@ class DocumentProcessor:
         self.legal_name = ''
         # It's good practice to initialize all instance variables in __init__
         self.file_path = ''
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
-
-
-    def name_finder(self, texts):
+        self.llm_type = llm_type
+        self._llm = None
+
+    # LLM은 법령 제목을 찾을 때(name_finder) 처음 만듭니다. (구조 분석만 하는 process pool worker에서는 만들지 않습니다.)
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = get_llm(self.llm_type)
+        return self._llm
+
+
+    def name_finder(self, texts, file_path = None):
+        """법령 제목을 규칙으로 찾고, 규칙이 제목을 찾지 못하거나 서로 다르면 LLM(llm_name_finder)에 묻습니다.
+
+        - 첫 페이지의 제목 줄 (title_from_text)
+        - 국가법령정보센터 파일 이름의 제목 부분 (title_from_file_name)
+        LLM 결과는 파일 내용 해시로 저장해 두므로 같은 파일을 다시 적재할 때는 LLM을 호출하지 않습니다.
+        """
+        from_text = title_from_text(texts)
+        from_file_name = title_from_file_name(file_path) if file_path else None
+        if from_text and (from_file_name is None or same_title(from_text, from_file_name)):
+            return from_text
+        if from_file_name and from_text is None:
+            return from_file_name
+
+        key = file_hash(file_path) if file_path and os.path.exists(file_path) else None
+        cache = get_legal_name_cache()
+        if key is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        print('법령 제목을 규칙으로 정하지 못해 LLM으로 찾습니다.', from_text, from_file_name)
+        legal_name = self.llm_name_finder(texts).strip()
+        if key is not None:
+            cache.put(key, legal_name, 'llm')
+        return legal_name
+
+    def llm_name_finder(self, texts):
         system_prompt = '''당신은 법률 문서를 분석하는 전문가입니다. 사용자가 제공한 문서를 읽고, 문서 안에 기재된 법의 제목을 정확히 찾아서 출력하세요.
 
 지침:
@@ -65,7 +102,10 @@ class DocumentProcessor:
 예시 출력:
 개인정보 보호법 시행령'''
         user_input = f'문서 : {texts}\n\n제목 :'
-        response = self.llm.call(system_prompt=system_prompt, user_input=user_input)
+        # 제목 한 줄로 답한 응답만 캐시에 저장합니다.
+        response = self.llm.call(system_prompt=system_prompt, user_input=user_input, temperature=0,
+                                 cache_ttl=NAME_FINDER_CACHE_TTL,
+                                 cache_validate=lambda r: '\n' not in r.strip() and 0 < len(r.strip()) <= MAX_TITLE_LENGTH)
         return response
         
     def load_documents(self, file_path):
@@ -73,14 +113,21 @@ class DocumentProcessor:
         return doc
 
 
+    # 페이지 텍스트는 파일당 한 번만 추출하여(파일 내용 해시로 캐시) get_structure와 fill_structure가 함께 사용합니다.
+    def page_text(self, doc):
+        return extract_page_text(doc.name, doc)
+
+    # name_finder에 넘길 첫 페이지 미리보기 (머리글을 뺀 앞 200자)
+    def preview(self, doc):
+        return self.page_text(doc).pages[0][:200] + '...'
+
     def get_structure(self, doc):
-        all_text = ''
-        for page in doc:
-            all_text += page.get_text()
-        all_text = re.sub(r'법제처\s+\d+\s+국가법령정보센터', '', all_text)
-        first_page_text = doc[0].get_text()
-        preview_text = first_page_text[:200] + '...'
-        self.legal_name = self.name_finder(preview_text)
+        self.legal_name = self.name_finder(self.preview(doc), file_path = doc.name)
+        return self.parse_structure(doc)
+
+    # 목차에서 장/절/조문 구조를 만듭니다. (LLM을 호출하지 않습니다.)
+    def parse_structure(self, doc):
+        all_text = self.page_text(doc).text
         pattern = r'제\s*\d+\s*조(?:의\s*\d+)?(?:\s*\([^)]+\))?'
         first_match = re.search(pattern, all_text)
         names = ''
@@ -150,151 +197,94 @@ class DocumentProcessor:
         # doc = fitz.open("your_pdf_file.pdf") # PDF 파일 로드
         # structure = {...} # 기존의 structure 딕셔너리
 
-        # --- 1. 페이지별 텍스트와 인덱스 맵 생성 ---
-        all_texts = []
-        page_char_map = []
-        current_pos = 0
-
-        # 헤더/푸터 제거를 위한 정규식 (필요에 따라 수정)
-        header_footer_pattern = re.compile(r'법제처\s+\d+\s+국가법령정보센터')
-
-        for page in doc:
-            # 페이지 텍스트에서 헤더/푸터 제거
-            page_text = header_footer_pattern.sub('', page.get_text())
-            page_len = len(page_text)
-            
-            # 각 페이지의 정보(페이지 번호, 전체 텍스트 내 시작/끝 위치)를 저장
-            page_char_map.append({
-                'page_num': page.number + 1, # 페이지 번호는 0부터 시작하므로 +1
-                'start': current_pos,
-                'end': current_pos + page_len
-            })
-            
-            all_texts.append(page_text)
-            current_pos += page_len
-
-        # 모든 페이지 텍스트를 하나의 문자열로 결합
-        all_text = "".join(all_texts)
-
-        # --- 유연한 패턴 생성을 위한 함수 (기존과 동일) ---
-        def create_flexible_pattern(title):
-            parts = re.split(r'([0-9]+|[a-zA-Z]+|[가-힣]+|\W)', title)
-            parts = [p for p in parts if p and not p.isspace()]
-            escaped_parts = [re.escape(p) for p in parts]
-            pattern = r'\s*'.join(escaped_parts)
-            return pattern
-
-        # --- 2. 페이지 번호 조회를 위한 함수 ---
-        def find_page_for_index(index, char_map):
-            """문자열 인덱스가 속한 페이지 번호를 찾습니다."""
-            for page_info in char_map:
-                if page_info['start'] <= index < page_info['end']:
-                    return page_info['page_num']
-            return -1 # 찾지 못한 경우
-
-        # --- 3. 기존 검색 로직에 페이지 번호 찾기 추가 ---
+        page_text = self.page_text(doc)
+        all_text = page_text.text
         structure_keys = list(structure.keys())
+        titles = [article for chapter in structure_keys for section in structure[chapter] for article in structure[chapter][section]]
+        # 모든 조문 제목의 등장 위치를 한 번에 찾아둡니다. (segmenter.py 참고)
+        segmenter = ArticleSegmenter(all_text, titles)
 
-        # 마지막 조항 이후의 텍스트만 사용하는 로직 (필요시 유지)
-        last_chapter = list(structure.keys())[-1]
-        last_section = list(structure[last_chapter].keys())[-1]
-        last_article = list(structure[last_chapter][last_section].keys())[-1]
-        start_idx_match = re.search(create_flexible_pattern(last_article), all_text)
-        if start_idx_match:
-            all_text = all_text[start_idx_match.start():]
-
-        search_pos = 0
+        # 마지막 조항 이후의 텍스트만 사용하는 로직: 마지막 조항이 처음 나오는 곳(목차의 끝)부터 본문을 찾습니다.
+        last_article_match = segmenter.find(titles[-1])
+        search_pos = last_article_match[0] if last_article_match else 0
 
         for i, chapter in enumerate(structure_keys):
             section_dict = structure[chapter]
             section_keys = list(section_dict.keys())
             
             for j, section in enumerate(section_keys):
-                articles = section_dict[section]
-
-                for k, article in enumerate(articles):
-                    article_title_list = list(articles.keys())
-                    current_article_title = article
-                    current_pattern = create_flexible_pattern(current_article_title)
-                    
-                    compiled_pattern = re.compile(current_pattern, flags=0)
-                    current_article_match = compiled_pattern.search(all_text, search_pos)
-                    
+                article_title_list = list(section_dict[section].keys())
+
+                for k, current_article_title in enumerate(article_title_list):
+                    current_article_match = segmenter.find(current_article_title, search_pos)
                     if not current_article_match:
                         continue
-
-                    current_article_index = current_article_match.start()
-                    search_pos = current_article_match.end()
-                    
-                    # 페이지 번호를 매핑
-                    page_number = find_page_for_index(current_article_index + start_idx_match.start(), page_char_map)
-
-                    end_index = len(all_text)
-                    possible_end_indexes = []
-
-                    if k + 1 < len(articles):
-                        next_article_title = article_title_list[k+1]
-                        next_pattern = create_flexible_pattern(next_article_title)
-                        compiled_next_pattern = re.compile(next_pattern, flags=0)
-                        next_match = compiled_next_pattern.search(all_text, search_pos)
-                        if next_match:
-                            possible_end_indexes.append(next_match.start())
-
-                    if j + 1 < len(section_keys):
-                        next_section_articles = section_dict[section_keys[j + 1]]
-                        if next_section_articles:
-                            next_title = list(next_section_articles.keys())[0]
-                            next_pattern = create_flexible_pattern(next_title)
-                            compiled_next_pattern = re.compile(next_pattern, flags=0)
-                            next_match = compiled_next_pattern.search(all_text, search_pos)
-                            if next_match:
-                                possible_end_indexes.append(next_match.start())
-
-                    if i + 1 < len(structure_keys):
+                    current_article_index, search_pos = current_article_match
+
+                    # 다음 조항 / 다음 절의 첫 조항 / 다음 장의 첫 조항 중 가장 먼저 나오는 곳까지가 현재 조항입니다.
+                    next_titles = []
+                    if k + 1 < len(article_title_list):
+                        next_titles.append(article_title_list[k + 1])
+                    if j + 1 < len(section_keys) and section_dict[section_keys[j + 1]]:
+                        next_titles.append(next(iter(section_dict[section_keys[j + 1]])))
+                    if i + 1 < len(structure_keys) and structure[structure_keys[i + 1]]:
                         next_chapter_articles = structure[structure_keys[i + 1]]
-                        if next_chapter_articles:
-                            first_section_key = list(next_chapter_articles.keys())[0]
-                            if next_chapter_articles[first_section_key]:
-                                next_title = list(next_chapter_articles[first_section_key].keys())[0]
-                                next_pattern = create_flexible_pattern(next_title)
-                                compiled_next_pattern = re.compile(next_pattern, flags=0)
-                                next_match = compiled_next_pattern.search(all_text, search_pos)
-                                if next_match:
-                                    possible_end_indexes.append(next_match.start())
-
-                    if possible_end_indexes:
-                        end_index = min(possible_end_indexes)
-
-                    raw_text = all_text[current_article_index:end_index].strip()
-                    
-                    # structure에 텍스트와 함께 페이지 번호를 저장
+                        first_section_key = next(iter(next_chapter_articles))
+                        if next_chapter_articles[first_section_key]:
+                            next_titles.append(next(iter(next_chapter_articles[first_section_key])))
+                    possible_end_indexes = [match[0] for match in (segmenter.find(title, search_pos) for title in next_titles) if match]
+                    end_index = min(possible_end_indexes) if possible_end_indexes else len(all_text)
+
+                    # structure에 텍스트와 함께 페이지 번호, 조문 안에서 다음 페이지가 시작되는 위치(page_breaks)를 저장
+                    raw_text = all_text[current_article_index:end_index]
+                    text_start = current_article_index + len(raw_text) - len(raw_text.lstrip())
+                    offsets = page_text.offsets
                     structure[chapter][section][current_article_title] = {
-                        'text': raw_text,
-                        'page': page_number
+                        'text': raw_text.strip(),
+                        'page': page_for_index(offsets, current_article_index),
+                        'page_breaks': [offset - text_start for offset in offsets[bisect_right(offsets, text_start):bisect_left(offsets, end_index)]],
                     }   
         return structure
 
 
-    def compose_vectors(self, structure, doc):
+    # 조문을 ArticleChunker로 나눠(CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS) chunk마다 vector를 만들고,
+    # 문서/페이지 안에서 몇 번째 chunk인지(i_chunk_on_doc, i_chunk_on_page)와 전체 개수를 채웁니다.
+    def compose_vectors(self, structure, doc, chunker: ArticleChunker = None):
+        chunker = chunker or ArticleChunker()
         vectors = []
         for chapter in structure:
             for section in structure[chapter]:
                 for article in structure[chapter][section]:
-                    text = f'[{self.legal_name}] [{chapter}] [{section}] ' + structure[chapter][section][article]['text']
+                    header = f'[{self.legal_name}] [{chapter}] [{section}] '
+                    article_text = structure[chapter][section][article]['text']
                     page = structure[chapter][section][article]['page']
+                    page_breaks = structure[chapter][section][article].get('page_breaks', [])
+                    budget = max(1, chunker.max_tokens - chunker.count_tokens(header + article + CONTINUATION_MARKER))
 
-                    vectors.append(VectorMeta.model_validate({
+                    for i, (start, end) in enumerate(chunker.split(article_text, budget)):
+                        body = article_text[start:end].strip()
+                        text = header + body if i == 0 else header + article + CONTINUATION_MARKER + body
+                        vectors.append(VectorMeta.model_validate({
                                     'text': text,
                                     'n_char': len(text),
                                     'n_word': len(text.split()),
-                                    'i_page': page,
+                                    'i_page': page + bisect_right(page_breaks, start) if page > 0 else page,
                                     'n_page': len(doc),
                                     'name' : (self.legal_name + ' ' + article).replace(' ', ''),
                                     'reg_date': datetime.now().isoformat(timespec='seconds') + 'Z',
                                     'file_path' : self.file_path[1:] if self.file_path.startswith('.') else self.file_path,
                                     'file_name':  self.file_path.split('/')[-1]
                                 }))
-                    
+
+        chunks_of_page = defaultdict(list)
+        for i, vector in enumerate(vectors):
+            vector.i_chunk_on_doc = i
+            vector.n_chunk_of_doc = len(vectors)
+            chunks_of_page[vector.i_page].append(vector)
+        for chunks in chunks_of_page.values():
+            for i, vector in enumerate(chunks):
+                vector.i_chunk_on_page = i
+                vector.n_chunk_of_page = len(chunks)
         return vectors
     def preprocess(self, file_path: str):
         self.file_path = file_path
@@ -303,4 +293,21 @@ class DocumentProcessor:
         structure = self.get_structure(documents)
         filled_structure = self.fill_structure(structure=structure, doc = documents)
         vectors = self.compose_vectors(structure, documents)
-        return vectors
\ No newline at end of file
+        return vectors
+
+
+def parse_document(file_path: str) -> dict:
+    """LLM 호출 없이 PDF를 파싱하여 본문이 채워진 구조를 반환합니다. (IngestionOrchestrator의 process pool worker)
+
+    Returns:
+        structure(장 > 절 > 조문 > {text, page}), preview(name_finder 입력), n_page
+    """
+    processor = DocumentProcessor()
+    doc = processor.load_documents(file_path)
+    structure = processor.fill_structure(structure=processor.parse_structure(doc), doc=doc)
+    # defaultdict(lambda)는 pickle 할 수 없으므로 일반 dict로 바꿔 돌려줍니다.
+    return {
+        'structure': {chapter: {section: dict(articles) for section, articles in sections.items()} for chapter, sections in structure.items()},
+        'preview': processor.preview(doc),
+        'n_page': len(doc),
+    }
\ No newline at end of file
@@ -0,0 +1,95 @@
+import re
+from bisect import bisect_left, bisect_right
+
+_WHITESPACE = re.compile(r'\s')
+
+
+def flexible_pattern(title: str) -> str:
+    """조문 제목의 토큰(숫자/영문/한글 덩어리, 기호) 사이에 공백이 있어도 일치하는 정규식. ex) '제1조(목적)' -> '제 1 조 (목적)'"""
+    parts = re.split(r'([0-9]+|[a-zA-Z]+|[가-힣]+|\W)', title)
+    parts = [p for p in parts if p and not p.isspace()]
+    return r'\s*'.join(re.escape(p) for p in parts)
+
+
+def _head_pattern(title: str) -> str:
+    # 앞 두 토큰 중 두번째 토큰은 글자 종류로 일반화합니다. ex) '제12조(정의)' -> '제\s*[0-9]'
+    parts = [p for p in re.split(r'([0-9]+|[a-zA-Z]+|[가-힣]+|\W)', title) if p and not p.isspace()]
+    head = re.escape(parts[0])
+    if len(parts) > 1:
+        second = parts[1]
+        if second.isdigit():
+            head += r'\s*[0-9]'
+        elif re.fullmatch(r'[a-zA-Z]+', second):
+            head += r'\s*[a-zA-Z]'
+        elif re.fullmatch(r'[가-힣]+', second):
+            head += r'\s*[가-힣]'
+        else:
+            head += r'\s*' + re.escape(second)
+    return head
+
+
+def page_for_index(offsets: list[int], index: int) -> int:
+    """전체 텍스트의 index가 속한 페이지 번호(1부터). offsets는 PageText.offsets (페이지 시작 위치 + 전체 길이)."""
+    if index < 0 or index >= offsets[-1]:
+        return -1
+    # offsets[i] <= index 인 마지막 i가 0부터 센 페이지 번호이므로 bisect_right 결과가 곧 1부터 센 페이지 번호입니다.
+    return bisect_right(offsets, index)
+
+
+class ArticleSegmenter:
+    """텍스트에서 조문 제목들의 모든 등장 위치를 한 번의 스캔으로 찾아두고, 위치 이후 첫 등장을 bisect로 조회합니다.
+
+    제목별로 flexible_pattern을 텍스트 전체에 다시 검색하던 방식(조문 수 × 텍스트 길이)을 대체합니다.
+    - 제목들의 앞 두 토큰으로 만든 alternation 정규식 하나로 후보 위치를 훑고,
+    - 후보 위치에서 공백을 뺀 텍스트가 어떤 제목(공백 제거)과 같은지 dict로 확인한 뒤,
+    - 그 제목의 flexible_pattern으로 실제 일치 여부와 끝 위치를 확인합니다.
+    따라서 find(title, pos)는 re.compile(flexible_pattern(title)).search(text, pos)와 같은 위치를 돌려줍니다.
+    """
+
+    def __init__(self, text: str, titles: list[str]):
+        self.text = text
+        self._patterns = {title: re.compile(flexible_pattern(title)) for title in dict.fromkeys(titles)}
+        self._starts = {title: [] for title in self._patterns}
+        self._ends = {title: [] for title in self._patterns}
+
+        titles_by_key = {}
+        for title in self._patterns:
+            key = _WHITESPACE.sub('', title)
+            if key:
+                titles_by_key.setdefault(key, []).append(title)
+        if not titles_by_key:
+            return
+        # 공백을 뺀 제목 앞부분(가장 짧은 제목 길이만큼)으로 후보 제목을 좁힙니다.
+        prefix_length = min(len(key) for key in titles_by_key)
+        keys_by_prefix = {}
+        for key in titles_by_key:
+            keys_by_prefix.setdefault(key[:prefix_length], []).append(key)
+        stripped = _WHITESPACE.sub('', text)
+        # 후보 위치: 제목의 앞 두 토큰('제' + 숫자, '부' + 한글 등)이 시작되는 모든 위치 (겹쳐도 빠짐없이 찾도록 lookahead 사용)
+        heads = sorted({_head_pattern(title) for titles in titles_by_key.values() for title in titles}, key=len, reverse=True)
+        heads = re.compile('(?=' + '|'.join(heads) + ')')
+
+        previous, n_whitespace = 0, 0
+        for m in heads.finditer(text):
+            position = m.start()
+            n_whitespace += len(_WHITESPACE.findall(text, previous, position))
+            previous = position
+            stripped_position = position - n_whitespace
+            for key in keys_by_prefix.get(stripped[stripped_position:stripped_position + prefix_length], ()):
+                if not stripped.startswith(key, stripped_position):
+                    continue
+                for title in titles_by_key[key]:
+                    match = self._patterns[title].match(text, position)
+                    if match:
+                        self._starts[title].append(position)
+                        self._ends[title].append(match.end())
+
+    def find(self, title: str, pos: int = 0):
+        """pos 이후 title이 처음 등장하는 (start, end). 없으면 None."""
+        starts = self._starts.get(title)
+        if not starts:
+            return None
+        i = bisect_left(starts, pos)
+        if i == len(starts):
+            return None
+        return starts[i], self._ends[title][i]
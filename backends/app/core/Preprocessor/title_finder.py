@@ -0,0 +1,79 @@
+import os
+import re
+import threading
+import time
+
+from ..cache.sqlite_store import SQLiteStore
+from .page_text import HEADER_FOOTER_PATTERN
+
+# 법령 제목의 끝 (법, 시행령, 규정, 세칙, 고시 ...)
+LAW_TITLE_SUFFIX = re.compile(r'(법|법률|령|규칙|규정|세칙|고시|훈령|예규|지침|조례|기준|요령)$')
+# 첫 페이지에서 제목 다음에 오는 줄: [시행 2025. 2. 5.] / 제1장 총칙 / 제1조(목적)
+_AFTER_TITLE = re.compile(r'^(\[|제\s*\d+\s*[편장절관조])')
+# 국가법령정보센터에서 받은 파일 이름: 제목(법령 종류)(제...호)(공포일).pdf
+_FILE_NAME = re.compile(r'^(?P<title>[^()]+?)\s*\((?P<kind>[^()]+)\)')
+MAX_TITLE_LENGTH = 60
+
+
+def title_from_text(text: str):
+    """첫 페이지 텍스트에서 머리글을 빼고, 조문/시행일 줄 앞에 나오는 법령 제목 줄을 찾습니다. 없으면 None."""
+    lines = [line.strip() for line in HEADER_FOOTER_PATTERN.sub('', text).splitlines() if line.strip()]
+    for line in lines[:5]:
+        if _AFTER_TITLE.match(line):
+            break
+        if len(line) <= MAX_TITLE_LENGTH and LAW_TITLE_SUFFIX.search(line.replace(' ', '')):
+            return line
+    return None
+
+
+def title_from_file_name(file_path: str):
+    """'전자금융감독규정(금융위원회고시)(제2025-4호)(20250205).pdf' 형식의 파일 이름에서 제목을 찾습니다. 없으면 None."""
+    match = _FILE_NAME.match(os.path.splitext(os.path.basename(file_path))[0])
+    if match is None or not LAW_TITLE_SUFFIX.search(match.group('kind').replace(' ', '')):
+        return None
+    return match.group('title').strip()
+
+
+def same_title(a: str, b: str) -> bool:
+    return a.replace(' ', '') == b.replace(' ', '')
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS legal_names (
+    file_hash TEXT PRIMARY KEY,
+    legal_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class LegalNameCache:
+    """파일 내용 해시 -> 법령 제목. 같은 파일을 다시 적재할 때 LLM을 다시 호출하지 않도록 SQLite 파일에 보관합니다."""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("LEGAL_NAME_CACHE_PATH", "./cache/legal_names.sqlite3")
+        self.store = SQLiteStore(self.path, _SCHEMA)
+
+    def get(self, file_hash: str):
+        row = self.store.connection().execute("SELECT legal_name FROM legal_names WHERE file_hash = ?", (file_hash,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, file_hash: str, legal_name: str, source: str):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO legal_names (file_hash, legal_name, source, created_at) VALUES (?, ?, ?, ?)",
+                         (file_hash, legal_name, source, time.time()))
+
+
+_legal_name_cache: LegalNameCache = None
+_legal_name_cache_lock = threading.Lock()
+
+
+def get_legal_name_cache() -> LegalNameCache:
+    global _legal_name_cache
+    if _legal_name_cache is None:
+        with _legal_name_cache_lock:
+            if _legal_name_cache is None:
+                _legal_name_cache = LegalNameCache()
+    return _legal_name_cache
@@ -0,0 +1,212 @@
+import re
+import threading
+import unicodedata
+
+from weaviate.classes.query import Filter
+
+from ..Preprocessor.chunker import join_chunks
+
+# 조문 이름에서 "법령명 + 제N조(의M)" 부분만 남기기 위한 패턴 (조문 제목 괄호는 무시)
+_ARTICLE_KEY_PATTERN = re.compile(r'^(.*?제\d+조(?:의\d+)?)')
+_IGNORED_CHARS = re.compile(r'[\s·ㆍ・‧∙]')
+
+
+def normalize_name(name: str) -> str:
+    """DocumentProcessor.compose_vectors와 같은 형식(공백 제거)으로 조문 이름을 정규화합니다."""
+    return _IGNORED_CHARS.sub('', unicodedata.normalize('NFC', name or ''))
+
+
+def fuzzy_key(name: str) -> str:
+    """조문 제목(괄호)을 무시한 '법령명제N조의M' 형태의 키를 만듭니다.
+
+    ex) '전자금융거래법 시행령 제2조의4(클라우드 컴퓨팅서비스의 보고)' -> '전자금융거래법시행령제2조의4'
+    """
+    name = normalize_name(name)
+    match = _ARTICLE_KEY_PATTERN.match(name)
+    if match:
+        return match.group(1)
+    return re.sub(r'\(.*?\)', '', name)
+
+
+class ArticleIndex:
+    """collection(멀티테넌트면 tenant) 내 모든 조문(name)의 프로세스 내 인덱스.
+
+    처음 조회할 때 collection 전체를 한 번 읽어(iterator) 만들고, 이후에는 VectorDB의 적재/삭제에 맞춰 증분 갱신합니다.
+    다른 워커의 적재/삭제는 증분 갱신되지 않으므로, 인덱스가 반영한 collection generation(CollectionGenerations)을 기록해 두고
+    조회할 때 generation이 바뀌었으면 다시 만듭니다. (LocalHybridEngine과 같은 방식)
+    - exact: 정규화된 name -> {(file_name, i_chunk_on_doc): properties} (조문이 여러 chunk로 나뉘었으면 chunk 전부)
+    - fuzzy: 조문 제목을 뺀 키 -> name 목록 (LLM이 추출한 조문 제목이 조금 달라도 찾을 수 있도록)
+    resolve()는 Weaviate를 조회하지 않고 메모리에서 바로 조문 전체(chunk를 이어붙인 문서)를 돌려줍니다.
+    """
+
+    def __init__(self, collection_name: str, tenant: str = None):
+        self.collection_name = collection_name
+        self.tenant = tenant
+        self.loaded = False
+        self.generation = None
+        self._exact = {}
+        self._fuzzy = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._exact)
+
+    def is_stale(self, generation: int = None) -> bool:
+        """아직 로드 전이거나, 인덱스를 만든 뒤 collection generation이 바뀌었으면(다른 워커에서 적재/삭제) True."""
+        return not self.loaded or (generation is not None and self.generation != generation)
+
+    def load(self, collections: list, generation: int = None):
+        """collections(멀티테넌트면 이 인덱스의 tenant collection)의 모든 object를 읽어 인덱스를 새로 만듭니다."""
+        with self._lock:
+            self._clear()
+            for collection in collections:
+                for o in collection.iterator():
+                    self._add(o.properties)
+            self.loaded = True
+            self.generation = generation
+        print(f'{self._label()} 조문 인덱스를 만들었습니다. ({len(self._exact)}개 조문)')
+
+    async def aload(self, collections: list, generation: int = None):
+        """load의 비동기 버전입니다. (weaviate async collection 목록)"""
+        objects = [o.properties for collection in collections async for o in collection.iterator()]
+        with self._lock:
+            self._clear()
+            for properties in objects:
+                self._add(properties)
+            self.loaded = True
+            self.generation = generation
+        print(f'{self._label()} 조문 인덱스를 만들었습니다. ({len(self._exact)}개 조문)')
+
+    def _label(self) -> str:
+        return f'{self.collection_name}/{self.tenant}' if self.tenant else self.collection_name
+
+    def _clear(self):
+        self._exact = {}
+        self._fuzzy = {}
+
+    def _add(self, properties: dict):
+        name = normalize_name(properties.get('name'))
+        if not name:
+            return
+        chunks = self._exact.get(name)
+        if chunks is None:
+            chunks = self._exact[name] = {}
+            self._fuzzy.setdefault(fuzzy_key(name), []).append(name)
+        chunks[(properties.get('file_name'), properties.get('i_chunk_on_doc'))] = dict(properties)
+
+    def _article(self, name: str) -> dict:
+        """name의 chunk들을 조문 하나로 이어붙입니다. 같은 name이 여러 파일에 있으면 문서 내 가장 앞에 있는 파일의 조문입니다."""
+        order = lambda properties: properties.get('i_chunk_on_doc') or 0
+        files = {}
+        for (file_name, _), properties in self._exact[name].items():
+            files.setdefault(file_name, []).append(properties)
+        chunks = sorted(min(files.values(), key = lambda chunks: min(map(order, chunks))), key = order)
+        if len(chunks) == 1:
+            return dict(chunks[0])
+        text = join_chunks([chunk['text'] for chunk in chunks])
+        return dict(chunks[0], text = text, n_char = len(text), n_word = len(text.split()),
+                    i_chunk_range = [order(chunks[0]), order(chunks[-1])])
+
+    def _remove(self, name: str):
+        self._exact.pop(name, None)
+        key = fuzzy_key(name)
+        names = self._fuzzy.get(key, [])
+        if name in names:
+            names.remove(name)
+        if not names:
+            self._fuzzy.pop(key, None)
+
+    def add_objects(self, objects: list[dict]):
+        """적재된 objects를 인덱스에 반영합니다. 아직 로드 전이면 다음 조회 때 전체를 읽으므로 무시합니다."""
+        with self._lock:
+            if not self.loaded:
+                return
+            for properties in objects:
+                self._add(properties)
+
+    def remove_where(self, filter: Filter):
+        """delete_obejcts에 사용한 filter를 인덱스에 반영합니다.
+
+        property 단일 equal filter(file_name, name 등)는 해당 조문만 지우고, 그 외의 filter는 인덱스를 무효화합니다.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            target = getattr(filter, 'target', None)
+            operator = getattr(getattr(filter, 'operator', None), 'name', None)
+            if isinstance(target, str) and operator == 'EQUAL':
+                value = filter.value
+                for name, chunks in list(self._exact.items()):
+                    for key in [key for key, properties in chunks.items() if properties.get(target) == value]:
+                        del chunks[key]
+                    if not chunks:
+                        self._remove(name)
+            else:
+                self.invalidate()
+
+    def mark_synced(self, generation: int = None):
+        """인덱스가 반영하고 있는 collection generation을 기록합니다."""
+        with self._lock:
+            self.generation = generation
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+            self.loaded = False
+            self.generation = None
+
+    def resolve(self, names: list[str]) -> dict:
+        """names를 조문 properties로 변환합니다.
+
+        정확히 일치하는 조문이 없으면 조문 제목을 무시한 키로 찾습니다. 같은 키의 조문이 여러 개면 먼저 인덱스에 들어온 조문을 사용합니다.
+        조문이 여러 chunk로 나뉘어 있으면 chunk를 모두 이어붙인 조문 전체를 돌려줍니다. (i_chunk_range에 합친 chunk 범위)
+
+        Returns:
+            {입력 name: properties} 형태의 dict. 찾지 못한 name은 포함되지 않습니다.
+        """
+        resolved = {}
+        with self._lock:
+            for name in names:
+                normalized = normalize_name(name)
+                if normalized not in self._exact:
+                    candidates = self._fuzzy.get(fuzzy_key(normalized))
+                    normalized = candidates[0] if candidates else None
+                if normalized is not None:
+                    resolved[name] = self._article(normalized)
+        return resolved
+
+
+_article_indexes: dict = {}
+_article_indexes_lock = threading.Lock()
+
+
+def get_article_index(collection_name: str, tenant: str = None) -> ArticleIndex:
+    """collection(멀티테넌트면 tenant)별 프로세스 전역 조문 인덱스를 반환합니다. (로드는 처음 조회할 때)
+
+    tenant마다 인덱스를 따로 두어, 조회할 때 검색 대상 tenant의 조문만 찾고 다른 tenant(작업공간)는 읽지도 깨우지도 않습니다.
+    """
+    with _article_indexes_lock:
+        index = _article_indexes.get((collection_name, tenant))
+        if index is None:
+            index = _article_indexes[(collection_name, tenant)] = ArticleIndex(collection_name, tenant)
+        return index
+
+
+def get_article_indexes(collection_name: str = None) -> list[ArticleIndex]:
+    """collection의 (모든 tenant) 조문 인덱스 목록. collection_name이 없으면 전부입니다."""
+    with _article_indexes_lock:
+        return [index for (name, _), index in _article_indexes.items() if collection_name is None or name == collection_name]
+
+
+def invalidate_article_indexes(collection_name: str = None):
+    """collection 삭제/reset 시 인덱스를 무효화합니다. collection_name이 없으면 전부 무효화합니다."""
+    for index in get_article_indexes(collection_name):
+        index.invalidate()
+
+
+def resolve_articles(indexes: list[ArticleIndex], names: list[str]) -> dict:
+    """여러 인덱스(검색 대상 tenant들)에서 names를 찾습니다. 여러 tenant에 같은 조문이 있으면 앞의 인덱스를 사용합니다."""
+    resolved = {}
+    for index in indexes:
+        resolved.update(index.resolve([name for name in names if name not in resolved]))
+    return resolved
@@ -0,0 +1,236 @@
+import asyncio
+from types import SimpleNamespace
+
+from weaviate.classes.query import MetadataQuery
+
+from .weaviateVDB import aconnect_weaviate, select_by_names, neighbor_filter, name_filter, NAME_LOOKUP_PAGE_SIZE, NEIGHBOR_LIMIT_FACTOR
+from .embedding_provider import create_embedding_model
+from .article_index import get_article_index, resolve_articles
+from .local_engine import get_local_engine
+from .tenancy import tenant_name, tenant_activity
+from ..cache.retrieval_cache import get_retrieval_cache
+from ..cache.collection_generation import get_collection_generations
+from ..Preprocessor.chunker import merge_neighbor_chunks
+
+
+# VectorDB의 검색 기능을 weaviate 비동기 client로 수행합니다.
+# 검색 메서드는 모두 awaitable이며 임베딩도 aembed_query로 호출하므로 이벤트 루프를 막지 않습니다.
+# 적재/삭제 등 관리 기능은 동기 VectorDB를 사용합니다.
+class AsyncVectorDB:
+    def __init__(self, client, embedding_model = None, owns_client: bool = False):
+        self.client = client
+        self.collection = None
+        self.tenants = None
+        self._multi_tenant = None
+        self.embedding_model = embedding_model if embedding_model is not None else create_embedding_model()
+        self._owns_client = owns_client
+        self.retrieval_cache = get_retrieval_cache()
+        self.generations = get_collection_generations()
+
+# 새 비동기 client로 접속한 AsyncVectorDB를 만듭니다. (커넥션 매니저가 없는 스크립트/노트북용)
+    @classmethod
+    async def connect(cls, url = None, http_port = None, grpc_port = None, embedding_model = None):
+        client = await aconnect_weaviate(url = url, http_port = http_port, grpc_port = grpc_port)
+        return cls(client = client, embedding_model = embedding_model, owns_client = True)
+
+    @property
+    def owns_client(self) -> bool:
+        """자체 client로 접속했으면 True. (커넥션 매니저의 공유 client면 False이며 close()해도 닫지 않습니다.)"""
+        return self._owns_client
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.close()
+
+# 이후 사용할 collection을 세팅합니다.
+    async def set_collection(self, name: str):
+        if await self.client.collections.exists(name):
+            self.collection = self.client.collections.get(name)
+            self.tenants = None
+            self._multi_tenant = None
+        else:
+            raise Exception(f"{name} collection don't exist in weaviate db.")
+
+    def _require_collection(self):
+        if self.collection is None:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    async def _embed(self, query: str) -> list[float]:
+        embedding = await self.embedding_model.aembed_query(query)
+        if 'err_msg' in embedding:
+            raise Exception(f"임베딩 생성에 실패하였습니다. err_msg: {embedding['err_msg']}")
+        return embedding['embedding']
+
+# 검색 대상 tenant를 지정합니다. keys가 없으면 전체 tenant를 검색합니다. (멀티테넌트가 아니면 무시)
+    def set_tenants(self, keys: list[str] = None):
+        self.tenants = [tenant_name(key) for key in keys] if keys else None
+
+    async def _is_multi_tenant(self) -> bool:
+        if self._multi_tenant is None:
+            self._multi_tenant = (await self.collection.config.get()).multi_tenancy_config.enabled
+        return self._multi_tenant
+
+    async def _target_collections(self, all_tenants: bool = False) -> list:
+        if not await self._is_multi_tenant():
+            return [self.collection]
+        names = (not all_tenants and self.tenants) or list(await self.collection.tenants.get())
+        tenant_activity.touch(names)
+        return [self.collection.with_tenant(name) for name in names]
+
+    async def _search(self, search, topk: int = None, sort_key = None) -> list:
+        """VectorDB._search의 비동기 버전입니다. 여러 tenant면 동시에 검색한 뒤 합칩니다."""
+        targets = await self._target_collections()
+        results = await asyncio.gather(*[search(collection) for collection in targets])
+        if len(results) == 1:
+            return list(results[0].objects)
+        objects = [o for result in results for o in result.objects]
+        if sort_key is not None:
+            objects.sort(key=sort_key)
+        return objects[:topk] if topk else objects
+
+# 검색 결과 캐시는 동기 VectorDB와 공유합니다.
+    def _cache_get(self, method: str, query: str, topk: int, alpha, fields):
+        """(저장된 결과 또는 None, 조회한 generation). 검색이 끝나면 generation을 _cache_put에 그대로 넘깁니다."""
+        if self.retrieval_cache is None:
+            return None, None
+        return self.retrieval_cache.get(self.collection.name, self._cache_method(method), query, topk, alpha, fields)
+
+    def _cache_put(self, method: str, query: str, topk: int, alpha, fields, results: list[dict], generation: int):
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.put(self.collection.name, self._cache_method(method), query, topk, alpha, fields, results, generation)
+
+    def _cache_method(self, method: str) -> str:
+        return f"{method}@{','.join(sorted(self.tenants))}" if self.tenants else method
+
+# 로컬 검색 엔진도 동기 VectorDB와 공유합니다. (VectorDB._local_engine 참고)
+    async def _local_engine(self):
+        engine = get_local_engine(self.collection.name)
+        if engine is None or await self._is_multi_tenant():
+            return None
+        generation = self.generations.generation(self.collection.name)
+        if not engine.ready or engine.generation != generation:
+            await engine.abuild([self.collection], generation)
+        return engine
+
+# BM25 Search
+    async def query_bm25(self, query: str, topk: int = 4, fields: list = None):
+        self._require_collection()
+        query_fields = fields if fields else ['text']
+        cached, generation = self._cache_get('bm25', query, topk, None, query_fields)
+        if cached is not None:
+            return cached
+        engine = await self._local_engine() if query_fields == ['text'] else None
+        if engine is not None:
+            results = engine.query_bm25(query, topk)
+            self._cache_put('bm25', query, topk, None, query_fields, results, generation)
+            return results
+        objects = await self._search(lambda collection: collection.query.bm25(
+            query=query,
+            query_properties=query_fields,
+            limit=topk,
+            return_metadata=MetadataQuery(score=True),
+        ), topk, sort_key=lambda o: -(o.metadata.score or 0))
+        results = [i.properties for i in objects]
+        self._cache_put('bm25', query, topk, None, query_fields, results, generation)
+        return results
+
+# Dense Search
+    async def query_dense(self, query: str, topk: int = 4, fields: list = None):
+        self._require_collection()
+        cached, generation = self._cache_get('dense', query, topk, None, None)
+        if cached is not None:
+            return cached
+        vector = await self._embed(query)
+        engine = await self._local_engine()
+        if engine is not None:
+            results = engine.query_dense(vector, topk)
+            self._cache_put('dense', query, topk, None, None, results, generation)
+            return results
+        objects = await self._search(lambda collection: collection.query.near_vector(
+            near_vector = vector,
+            limit = topk,
+            return_metadata=MetadataQuery(distance=True),
+            ), topk, sort_key=lambda o: o.metadata.distance)
+        results = [i.properties for i in objects]
+        self._cache_put('dense', query, topk, None, None, results, generation)
+        return results
+
+# BM25 + Dense Search (alpha)
+# alpha 1 means pure vector search
+# alpha 0 means pure keyword search
+    async def query_hybrid(self, query: str, topk: int = 4, fields: list = None, alpha:float = 0.5):
+        self._require_collection()
+        query_fields = fields if fields else ['text']
+        cached, generation = self._cache_get('hybrid', query, topk, alpha, query_fields)
+        if cached is not None:
+            return cached
+        vector = await self._embed(query)
+        engine = await self._local_engine() if query_fields == ['text'] else None
+        if engine is not None:
+            results = engine.query_hybrid(query, vector, alpha, topk)
+            self._cache_put('hybrid', query, topk, alpha, query_fields, results, generation)
+            return results
+        objects = await self._search(lambda collection: collection.query.hybrid(
+            query = query,
+            vector = vector,
+            alpha = alpha,
+            query_properties = query_fields,
+            limit = topk,
+            return_metadata=MetadataQuery(score=True),
+        ), topk, sort_key=lambda o: -(o.metadata.score or 0))
+        results = [i.properties for i in objects]
+        self._cache_put('hybrid', query, topk, alpha, query_fields, results, generation)
+        return results
+
+    async def query_hybrid_with_filter(self, name: str, fields:list = None, alpha: float = 0.5) -> dict:
+        """
+        collection의 metadata.name == name 인 object 검색 (get_by_names의 단건 버전, fields/alpha는 호환용)
+        """
+        return (await self.get_by_names([name])).get(name, {})
+
+# 참조 조항 일괄 검색을 위한 query입니다.
+    async def get_by_names(self, names: list[str]) -> dict:
+        """
+        name이 names 중 하나와 정확히 일치하는 object를 filter 검색으로 가져옵니다. (VectorDB.get_by_names 참고)
+        """
+        self._require_collection()
+        names = list(dict.fromkeys(name for name in names if name))
+        if not names:
+            return {}
+        wanted = set(names)
+
+        async def fetch(collection):
+            matched, offset = [], 0
+            while True:
+                result = await collection.query.fetch_objects(filters=name_filter(names), limit=NAME_LOOKUP_PAGE_SIZE, offset=offset)
+                matched.extend(o for o in result.objects if o.properties.get('name') in wanted)
+                if len(result.objects) < NAME_LOOKUP_PAGE_SIZE:
+                    return SimpleNamespace(objects=matched)
+                offset += NAME_LOOKUP_PAGE_SIZE
+
+        objects = await self._search(fetch)
+        return select_by_names([o.properties for o in objects], names)
+
+# 검색된 chunk에 같은 조문의 앞뒤 chunk를 이어붙입니다. (VectorDB.expand_neighbors 참고)
+    async def expand_neighbors(self, documents: list[dict], window: int = 1) -> list[dict]:
+        self._require_collection()
+        filters = neighbor_filter(documents, window) if window > 0 else None
+        if filters is None:
+            return documents
+        objects = await self._search(lambda collection: collection.query.fetch_objects(
+            filters=filters,
+            limit=len(documents) * (2 * window + 1) * NEIGHBOR_LIMIT_FACTOR,
+        ))
+        return merge_neighbor_chunks(documents, [o.properties for o in objects], window)
+
+# 참조 조항을 Weaviate 조회 없이 프로세스 내 조문 인덱스에서 찾습니다. (VectorDB.lookup_articles와 같은 인덱스를 공유, 멀티테넌트면 검색 대상 tenant만)
+    async def lookup_articles(self, names: list[str]) -> dict:
+        self._require_collection()
+        generation = self.generations.generation(self.collection.name)
+        indexes = []
+        for collection in await self._target_collections():
+            index = get_article_index(self.collection.name, getattr(collection, 'tenant', None))
+            if index.is_stale(generation):
+                await index.aload([collection], generation)
+            indexes.append(index)
+        return resolve_articles(indexes, names)
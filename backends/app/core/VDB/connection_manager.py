@@ -0,0 +1,219 @@
+import asyncio
+import os
+import threading
+
+from .weaviateVDB import VectorDB, connect_weaviate, aconnect_weaviate
+from .async_weaviateVDB import AsyncVectorDB
+from .embedding_provider import create_embedding_model
+
+
+class WeaviateConnectionManager:
+    """프로세스 전역에서 공유하는 Weaviate 커넥션 매니저.
+
+    서버 시작 시(FastAPI lifespan) 한 번 생성되어 weaviate client 풀을 유지하고,
+    임베딩 모델 호출 테스트도 시작 시점에 한 번만 수행합니다.
+    각 서비스는 VectorDB를 직접 생성하지 않고 get_vector_db()로 client를 빌려 사용합니다.
+
+    - 백그라운드 스레드가 health_check_interval 마다 각 client의 is_ready()를 확인합니다.
+    - 응답이 없는 client는 unhealthy로 표시되고, 다음에 빌려갈 때 다시 접속합니다.
+    - 비동기 검색용 weaviate async client 하나를 astartup()에서 열어 get_async_vector_db()로 공유합니다.
+    - TENANT_IDLE_SECONDS가 설정되어 있으면 health check 때마다 그 시간 동안 쓰지 않은 LegalDB tenant를 비활성화합니다.
+    """
+
+    def __init__(self, url=None, http_port=None, grpc_port=None,
+                 pool_size: int = None, health_check_interval: float = None):
+        self.url = url
+        self.http_port = http_port
+        self.grpc_port = grpc_port
+        self.pool_size = pool_size or int(os.getenv("WEAVIATE_POOL_SIZE", 4))
+        self.health_check_interval = health_check_interval or float(os.getenv("WEAVIATE_HEALTH_CHECK_INTERVAL", 30))
+        self.tenant_idle_seconds = float(os.getenv("TENANT_IDLE_SECONDS", 0)) or None
+
+        self._clients = [None] * self.pool_size
+        self._healthy = [False] * self.pool_size
+        self._slot_locks = [threading.Lock() for _ in range(self.pool_size)]
+        self._next = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._health_thread = None
+
+        self._async_client = None
+        self._async_lock = None
+
+        self.embedding_model = create_embedding_model()
+        self.embedding_ready = False
+
+    def startup(self):
+        """client 풀을 채우고 임베딩 호출 테스트 후 health check 스레드를 시작합니다."""
+        for slot in range(self.pool_size):
+            self._connect(slot)
+        print(f'weaviate client {sum(self._healthy)}/{self.pool_size}개를 준비하였습니다.')
+        self._probe_embedding()
+
+        self._stop_event.clear()
+        self._health_thread = threading.Thread(target=self._health_check_loop, name="weaviate-health-check", daemon=True)
+        self._health_thread.start()
+
+    def close(self):
+        """health check 스레드를 멈추고 풀에 있는 client를 모두 닫습니다."""
+        self._stop_event.set()
+        if self._health_thread:
+            self._health_thread.join(timeout=5)
+        for slot in range(self.pool_size):
+            self._close_client(slot)
+        self.embedding_model.close()
+
+    async def astartup(self):
+        """비동기 검색용 async client에 접속합니다. (이벤트 루프 안에서 호출)"""
+        self._async_lock = asyncio.Lock()
+        await self._aconnect()
+
+    async def aclose(self):
+        if self._async_client is not None:
+            try:
+                await self._async_client.close()
+            except Exception:
+                pass
+            self._async_client = None
+        await self.embedding_model.aclose()
+
+    async def _aconnect(self) -> bool:
+        try:
+            self._async_client = await aconnect_weaviate(url=self.url, http_port=self.http_port, grpc_port=self.grpc_port)
+            return True
+        except Exception as e:
+            print(f'weaviate async client 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요. 에러: {e}')
+            self._async_client = None
+            return False
+
+    def _connect(self, slot: int) -> bool:
+        self._close_client(slot)
+        try:
+            client = connect_weaviate(url=self.url, http_port=self.http_port, grpc_port=self.grpc_port)
+            self._clients[slot] = client
+            self._healthy[slot] = bool(client and client.is_ready())
+        except Exception as e:
+            print(f'weaviate 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요. 에러: {e}')
+            self._healthy[slot] = False
+        return self._healthy[slot]
+
+    def _close_client(self, slot: int):
+        client = self._clients[slot]
+        self._clients[slot] = None
+        self._healthy[slot] = False
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def _probe_embedding(self) -> bool:
+        try:
+            test = self.embedding_model.check_connection()
+        except Exception as e:
+            test = {'err_msg': str(e)}
+        if 'err_msg' in test:
+            print(f'임베딩 모델({self.embedding_model.model_id}) 호출에 실패했습니다. 접속정보를 확인하세요.')
+            print('err_msg:', test['err_msg'])
+            self.embedding_ready = False
+        else:
+            self.embedding_ready = True
+        return self.embedding_ready
+
+    def _health_check_loop(self):
+        while not self._stop_event.wait(self.health_check_interval):
+            for slot in range(self.pool_size):
+                client = self._clients[slot]
+                if client is None:
+                    continue
+                try:
+                    self._healthy[slot] = client.is_ready()
+                except Exception:
+                    self._healthy[slot] = False
+                if not self._healthy[slot]:
+                    print(f'weaviate client {slot}번이 응답하지 않습니다. 다음 사용 시 재접속합니다.')
+            if self.tenant_idle_seconds:
+                self._deactivate_idle_tenants()
+
+    def _deactivate_idle_tenants(self):
+        try:
+            vdb = VectorDB(client=self.acquire(), embedding_model=self.embedding_model)
+            if vdb.check('LegalDB') and vdb.is_multi_tenant():
+                vdb.deactivate_idle_tenants(self.tenant_idle_seconds)
+        except Exception as e:
+            print(f'유휴 tenant 비활성화에 실패했습니다. 에러: {e}')
+
+    def acquire(self):
+        """풀에서 round-robin으로 client를 빌려줍니다. 끊어진 client는 이 시점에 재접속합니다."""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % self.pool_size
+
+        for offset in range(self.pool_size):
+            slot = (start + offset) % self.pool_size
+            if self._healthy[slot]:
+                return self._clients[slot]
+            with self._slot_locks[slot]:
+                if self._healthy[slot] or self._connect(slot):
+                    return self._clients[slot]
+        raise Exception('weaviate 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요.')
+
+    def get_vector_db(self) -> VectorDB:
+        """공유 client와 임베딩 모델을 사용하는 VectorDB를 반환합니다."""
+        if not self.embedding_ready and not self._probe_embedding():
+            raise Exception(f'임베딩 모델({self.embedding_model.model_id}) 호출에 실패했습니다. 접속정보를 확인하세요.')
+        return VectorDB(client=self.acquire(), embedding_model=self.embedding_model)
+
+    async def get_async_vector_db(self) -> AsyncVectorDB:
+        """공유 async client를 사용하는 AsyncVectorDB를 반환합니다. 끊어져 있으면 이 시점에 재접속합니다."""
+        if not self.embedding_ready and not await asyncio.to_thread(self._probe_embedding):
+            raise Exception(f'임베딩 모델({self.embedding_model.model_id}) 호출에 실패했습니다. 접속정보를 확인하세요.')
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if self._async_client is None or not self._async_client.is_connected():
+                if not await self._aconnect():
+                    raise Exception('weaviate 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요.')
+        return AsyncVectorDB(client=self._async_client, embedding_model=self.embedding_model)
+
+    def status(self) -> dict:
+        return {
+            'pool_size': self.pool_size,
+            'healthy_clients': sum(self._healthy),
+            'embedding_ready': self.embedding_ready,
+            'async_client_connected': bool(self._async_client and self._async_client.is_connected()),
+        }
+
+
+_connection_manager: WeaviateConnectionManager = None
+
+
+def set_connection_manager(manager: WeaviateConnectionManager):
+    global _connection_manager
+    _connection_manager = manager
+
+
+def get_connection_manager() -> WeaviateConnectionManager:
+    return _connection_manager
+
+
+def get_vector_db() -> VectorDB:
+    """커넥션 매니저가 떠 있으면 공유 client로, 아니면(노트북, 스크립트 등) 직접 접속한 VectorDB를 반환합니다."""
+    if _connection_manager is not None:
+        return _connection_manager.get_vector_db()
+    return VectorDB()
+
+
+async def get_async_vector_db() -> AsyncVectorDB:
+    """get_vector_db의 비동기 버전입니다. 매니저가 없으면 자체 client로 접속하며, 사용 후 close()해야 합니다."""
+    if _connection_manager is not None:
+        return await _connection_manager.get_async_vector_db()
+    return await AsyncVectorDB.connect()
+
+
+async def release_async_vector_db(avdb: AsyncVectorDB):
+    """요청이 끝난 뒤 호출합니다. avdb가 자체 client로 접속했으면 닫고 None을, 매니저의 공유 client면 재사용하도록 그대로 돌려줍니다."""
+    if avdb is not None and avdb.owns_client:
+        await avdb.close()
+        return None
+    return avdb
@@ -0,0 +1,64 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+
+
+class EmbeddingProvider(ABC):
+    """VectorDB / 적재 파이프라인이 사용하는 임베딩 모델 인터페이스.
+
+    결과 형식은 네이버클라우드 임베딩 API 응답을 따릅니다.
+    성공 시 {'embedding': [...]}, 실패 시 {'err_msg': ...} 이며 embed_documents는 입력 순서대로 결과를 돌려줍니다.
+
+    Attributes:
+        model_id: 임베딩 캐시 키 등에 쓰이는 모델 식별자
+        dimension: 임베딩 벡터 차원
+        max_concurrency: 동시에 보낼 수 있는 최대 요청 수 (커넥션 풀 크기). None이면 제한 없음 (적재 파이프라인이 embed worker 수를 정할 때 사용)
+    """
+    model_id: str = None
+    dimension: int = None
+    max_concurrency: int = None
+
+    @abstractmethod
+    def embed_documents(self, texts: list[str]) -> list[dict]:
+        ...
+
+    def embed_query(self, text: str) -> dict:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[dict]:
+        """기본 구현은 embed_documents를 별도 스레드에서 실행합니다."""
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> dict:
+        return (await self.aembed_documents([text]))[0]
+
+    def check_connection(self, text: str = '안녕?') -> dict:
+        """임베딩 모델 호출이 가능한지 확인합니다. (네트워크 provider는 캐시를 거치지 않고 실제로 호출합니다.)"""
+        return self.embed_query(text)
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+
+def embedding_provider_name() -> str:
+    return os.getenv('EMBEDDING_PROVIDER', 'naver').lower()
+
+
+def create_embedding_model(provider: str = None) -> EmbeddingProvider:
+    """EMBEDDING_PROVIDER 설정에 맞는 임베딩 모델을 만듭니다.
+
+    - naver (기본값): 네이버클라우드 임베딩 API (bge-m3)
+    - hashing: 네트워크 없이 CPU에서 동작하는 HashingEmbeddings (오프라인 성능 테스트/CI용)
+    """
+    provider = (provider or embedding_provider_name()).lower()
+    if provider == 'naver':
+        from .navercloud_embedding import NaverCloudEmbeddings
+        return NaverCloudEmbeddings()
+    elif provider == 'hashing':
+        from .hashing_embedding import HashingEmbeddings
+        return HashingEmbeddings()
+    else:
+        raise ValueError(f"지원하지 않는 EMBEDDING_PROVIDER 입니다: {provider} (naver, hashing 중 선택)")
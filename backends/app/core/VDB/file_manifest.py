@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from ..cache.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    collection TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    file_hash TEXT,
+    n_page INTEGER,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (collection, tenant, file_name)
+);
+CREATE TABLE IF NOT EXISTS collections (
+    collection TEXT PRIMARY KEY,
+    synced INTEGER NOT NULL
+);
+"""
+
+
+class FileManifest:
+    """collection에 적재된 파일 목록(파일별 chunk 수, 파일 해시, 페이지 수, 적재 시각)을 SQLite 파일로 관리합니다.
+
+    VectorDB가 weaviate에 적재/삭제한 직후에 갱신하므로, 파일 목록 조회에 weaviate aggregate(group_by)가 필요 없습니다.
+    weaviate 쓰기와 한 트랜잭션이 아니어서, 그 사이에 프로세스가 죽거나 manifest를 거치지 않고 weaviate를 바꾸면 어긋날 수 있습니다.
+    - 어떤 파일에서 지워졌는지 알 수 없는 삭제(uuid 목록 삭제 등)가 있으면 collection을 synced=0으로 표시하고,
+      다음 조회 때 VectorDB가 weaviate에서 다시 만들어 넣습니다(replace).
+    - initialize(./pdfs 동기화)는 manifest의 chunk 수 합계를 weaviate object 수와 비교하여 다르면 다시 만듭니다.
+      (VectorDB.reconcile_file_manifest)
+    tenant는 멀티테넌트가 아니면 '' 입니다.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("FILE_MANIFEST_PATH", "./cache/manifest.sqlite3")
+        self.store = SQLiteStore(self.path, _SCHEMA)
+
+    def is_synced(self, collection: str) -> bool:
+        row = self.store.connection().execute("SELECT synced FROM collections WHERE collection = ?", (collection,)).fetchone()
+        return bool(row and row[0])
+
+    def mark_stale(self, collection: str):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO collections (collection, synced) VALUES (?, 0)", (collection,))
+
+    def total_chunks(self, collection: str) -> int:
+        row = self.store.connection().execute("SELECT COALESCE(SUM(chunk_count), 0) FROM files WHERE collection = ?", (collection,)).fetchone()
+        return row[0]
+
+    def files(self, collection: str, tenants: list[str] = None) -> list[dict]:
+        """파일 목록. tenants를 주면 해당 tenant의 파일만, 없으면 collection 전체입니다."""
+        query = "SELECT file_name, SUM(chunk_count), MAX(file_hash), MAX(n_page), MAX(ingested_at) FROM files WHERE collection = ?"
+        params = [collection]
+        if tenants:
+            query += f" AND tenant IN ({','.join('?' * len(tenants))})"
+            params += tenants
+        rows = self.store.connection().execute(query + " GROUP BY file_name ORDER BY file_name", params).fetchall()
+        return [{'file_name': file_name, 'chunk_count': chunk_count, 'file_hash': file_hash, 'n_page': n_page, 'ingested_at': ingested_at}
+                for file_name, chunk_count, file_hash, n_page, ingested_at in rows]
+
+    def add_objects(self, collection: str, tenant: str, objects: list[dict]):
+        """적재에 성공한 objects를 파일별 chunk 수에 더합니다."""
+        grouped = defaultdict(list)
+        for properties in objects:
+            grouped[properties.get('file_name')].append(properties)
+        now = time.time()
+        conn = self.store.connection()
+        with conn:
+            for file_name, chunks in grouped.items():
+                conn.execute(
+                    "INSERT INTO files (collection, tenant, file_name, chunk_count, file_hash, n_page, ingested_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(collection, tenant, file_name) DO UPDATE SET chunk_count = chunk_count + excluded.chunk_count, "
+                    "file_hash = COALESCE(excluded.file_hash, file_hash), n_page = COALESCE(excluded.n_page, n_page), "
+                    "ingested_at = excluded.ingested_at",
+                    (collection, tenant or '', file_name, len(chunks), chunks[-1].get('file_hash'), chunks[-1].get('n_page'), now),
+                )
+
+    def remove_chunks(self, collection: str, tenant: str, file_name: str, count: int):
+        """file_name의 chunk count개가 삭제되었음을 반영합니다. 0개가 되면 파일을 목록에서 뺍니다."""
+        conn = self.store.connection()
+        with conn:
+            conn.execute("UPDATE files SET chunk_count = chunk_count - ? WHERE collection = ? AND tenant = ? AND file_name = ?",
+                         (count, collection, tenant or '', file_name))
+            conn.execute("DELETE FROM files WHERE collection = ? AND tenant = ? AND file_name = ? AND chunk_count <= 0",
+                         (collection, tenant or '', file_name))
+
+    def remove_file(self, collection: str, tenant: str, file_name: str):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("DELETE FROM files WHERE collection = ? AND tenant = ? AND file_name = ?", (collection, tenant or '', file_name))
+
+    def update_file(self, collection: str, tenant: str, file_name: str, file_hash: str = None, n_page: int = None):
+        """chunk 수는 그대로 두고 파일 해시/페이지 수만 갱신합니다. (증분 적재에서 프로퍼티만 수정한 경우)"""
+        conn = self.store.connection()
+        with conn:
+            conn.execute("UPDATE files SET file_hash = COALESCE(?, file_hash), n_page = COALESCE(?, n_page), ingested_at = ? "
+                         "WHERE collection = ? AND tenant = ? AND file_name = ?",
+                         (file_hash, n_page, time.time(), collection, tenant or '', file_name))
+
+    def remove_tenant(self, collection: str, tenant: str):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("DELETE FROM files WHERE collection = ? AND tenant = ?", (collection, tenant))
+
+    def remove_collection(self, collection: str = None):
+        """collection의 목록을 지웁니다. collection이 없으면(reset) 전부 지웁니다. 비어있는 collection으로 동기화된 상태가 됩니다."""
+        conn = self.store.connection()
+        with conn:
+            if collection is None:
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM collections")
+            else:
+                conn.execute("DELETE FROM files WHERE collection = ?", (collection,))
+                conn.execute("INSERT OR REPLACE INTO collections (collection, synced) VALUES (?, 1)", (collection,))
+
+    def replace(self, collection: str, files: list[dict]):
+        """weaviate에서 다시 집계한 목록(tenant, file_name, chunk_count, file_hash, n_page)으로 collection의 목록을 바꿉니다."""
+        now = time.time()
+        conn = self.store.connection()
+        with conn:
+            conn.execute("DELETE FROM files WHERE collection = ?", (collection,))
+            conn.executemany(
+                "INSERT INTO files (collection, tenant, file_name, chunk_count, file_hash, n_page, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(collection, f.get('tenant') or '', f['file_name'], f['chunk_count'], f.get('file_hash'), f.get('n_page'), now) for f in files],
+            )
+            conn.execute("INSERT OR REPLACE INTO collections (collection, synced) VALUES (?, 1)", (collection,))
+
+
+_file_manifest: FileManifest = None
+_file_manifest_lock = threading.Lock()
+
+
+def get_file_manifest() -> FileManifest:
+    """프로세스 전역 파일 목록(manifest)을 반환합니다."""
+    global _file_manifest
+    if _file_manifest is None:
+        with _file_manifest_lock:
+            if _file_manifest is None:
+                _file_manifest = FileManifest()
+    return _file_manifest
@@ -0,0 +1,46 @@
+import os
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+from .embedding_provider import EmbeddingProvider
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class HashingEmbeddings(EmbeddingProvider):
+    """네트워크 없이 CPU에서 동작하는 결정적(deterministic) 임베딩.
+
+    단어와 글자 n-gram(한국어는 띄어쓰기가 일정하지 않으므로 글자 단위도 사용)을 crc32로 dimension 차원에 해싱하고
+    부호 해싱 후 L2 정규화합니다. 같은 텍스트는 항상 같은 벡터가 되며, 어휘가 겹치는 텍스트끼리 코사인 유사도가 높아집니다.
+    의미 검색 품질은 bge-m3에 미치지 못하므로 적재/검색 처리량 측정, CI, 외부망이 없는 부하 테스트 용도로 사용합니다.
+    """
+
+    def __init__(self, dimension: int = None, ngram_range: tuple = (2, 3)):
+        self.dimension = dimension or int(os.getenv('HASHING_EMBEDDING_DIM', 1024))
+        self.ngram_range = ngram_range
+        self.model_id = f'local/hashing-{self.dimension}'
+
+    def _features(self, text: str):
+        text = unicodedata.normalize('NFC', text).lower()
+        tokens = _TOKEN_PATTERN.findall(text)
+        yield from (f'w:{token}' for token in tokens)
+        joined = ' '.join(tokens)
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            for i in range(len(joined) - n + 1):
+                yield f'c:{joined[i:i + n]}'
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode('utf-8'))
+            vector[h % self.dimension] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[dict]:
+        return [{'embedding': self._embed(text)} for text in texts]
@@ -0,0 +1,75 @@
+import os
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+from weaviate.classes.config import Configure, VectorDistances
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class IndexConfig(BaseModel):
+    """collection 생성 시 사용할 벡터 인덱스 / 압축 설정.
+
+    - index_type: hnsw(기본값) 또는 flat(전수 검색, 작은 collection이나 멀티테넌트의 작은 tenant에 적합)
+    - ef / ef_construction / max_connections: HNSW 파라미터 (None이면 weaviate 기본값)
+    - quantizer: None(무압축 float32), pq, bq, sq
+    - rescore_limit: bq/sq 압축 시 원본 벡터로 다시 점수를 매길 후보 수 (flat은 bq만 지원)
+    """
+    index_type: Literal['hnsw', 'flat'] = 'hnsw'
+    ef: Optional[int] = None
+    ef_construction: Optional[int] = None
+    max_connections: Optional[int] = None
+    quantizer: Optional[Literal['pq', 'bq', 'sq']] = None
+    rescore_limit: Optional[int] = None
+    pq_segments: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> 'IndexConfig':
+        """VDB_INDEX_TYPE, VDB_HNSW_EF, VDB_HNSW_EF_CONSTRUCTION, VDB_HNSW_MAX_CONNECTIONS,
+        VDB_QUANTIZER, VDB_RESCORE_LIMIT, VDB_PQ_SEGMENTS 환경변수로 설정을 만듭니다."""
+        return cls(
+            index_type=os.getenv('VDB_INDEX_TYPE', 'hnsw').lower(),
+            ef=_env_int('VDB_HNSW_EF'),
+            ef_construction=_env_int('VDB_HNSW_EF_CONSTRUCTION'),
+            max_connections=_env_int('VDB_HNSW_MAX_CONNECTIONS'),
+            quantizer=(os.getenv('VDB_QUANTIZER') or '').lower() or None,
+            rescore_limit=_env_int('VDB_RESCORE_LIMIT'),
+            pq_segments=_env_int('VDB_PQ_SEGMENTS'),
+        )
+
+    def label(self) -> str:
+        parts = [self.index_type]
+        if self.index_type == 'hnsw':
+            parts += [f'ef={self.ef or "default"}', f'M={self.max_connections or "default"}']
+        if self.quantizer == 'pq':
+            parts.append(f'pq(segments={self.pq_segments or "default"})')
+        elif self.quantizer:
+            parts.append(f'{self.quantizer}(rescore={self.rescore_limit or "default"})')
+        return ' '.join(parts)
+
+    def _quantizer_config(self):
+        if self.quantizer == 'pq':
+            return Configure.VectorIndex.Quantizer.pq(segments=self.pq_segments)
+        elif self.quantizer == 'bq':
+            return Configure.VectorIndex.Quantizer.bq(rescore_limit=self.rescore_limit)
+        elif self.quantizer == 'sq':
+            return Configure.VectorIndex.Quantizer.sq(rescore_limit=self.rescore_limit)
+        return None
+
+    def vector_index_config(self):
+        """weaviate collections.create(vector_index_config=...)에 넘길 설정을 만듭니다."""
+        quantizer = self._quantizer_config()
+        if self.index_type == 'flat':
+            if self.quantizer not in (None, 'bq'):
+                raise ValueError('flat 인덱스는 bq 압축만 지원합니다.')
+            return Configure.VectorIndex.flat(distance_metric=VectorDistances.COSINE, quantizer=quantizer)
+        return Configure.VectorIndex.hnsw(
+            distance_metric=VectorDistances.COSINE,
+            ef=self.ef,
+            ef_construction=self.ef_construction,
+            max_connections=self.max_connections,
+            quantizer=quantizer,
+        )
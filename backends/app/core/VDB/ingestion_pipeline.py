@@ -0,0 +1,189 @@
+import math
+import os
+import queue
+import threading
+import time
+
+from tqdm import tqdm
+from weaviate.classes.data import DataObject
+
+_DONE = object()
+# 멈춤 신호(stop)를 확인하는 간격 (초)
+_POLL_INTERVAL = 0.1
+
+
+class IngestionPipeline:
+    """chunk 생성 → 동시 임베딩 → batch 적재를 겹쳐서 수행하는 적재 파이프라인.
+
+    세 단계는 크기가 제한된 queue로 연결되어, 적재가 밀리면 임베딩이, 임베딩이 밀리면 chunk 생성이 자연히 멈춥니다.
+
+    - producer: objects를 embed_batch_size개씩 잘라 embed 큐에 넣습니다.
+    - embed worker(embed_workers개): embed_documents로 묶음 단위 임베딩 후 write 큐에 넣습니다.
+      embed_documents 한 번이 이미 임베딩 모델의 max_concurrency개 요청을 동시에 보내므로, worker 수는
+      커넥션 풀을 채우는 데 필요한 만큼(ceil(max_concurrency / embed_batch_size) + 1)으로 줄입니다.
+    - writer: insert_many로 batch 적재하며, 적재 지연시간이 target_latency보다 짧으면 batch를 키우고 길면 줄입니다.
+
+    실패는 object 단위로 기록되며(단계, 원본 인덱스, 에러 메세지), 실패가 있어도 나머지는 계속 적재합니다.
+    on_inserted를 주면 적재에 성공한 batch마다 (properties, vector, uuid) 목록으로 호출합니다. (로컬 검색 엔진 증분 반영용)
+    writer나 on_inserted가 예외를 던지면 producer/embed worker를 멈추고 모두 끝난 뒤 예외를 다시 던집니다.
+    """
+
+    def __init__(self, collection, embedding_model,
+                 embed_workers: int = None, embed_batch_size: int = None, queue_size: int = 8,
+                 initial_batch_size: int = 32, min_batch_size: int = 8, max_batch_size: int = 512,
+                 target_latency: float = None, on_inserted = None):
+        self.collection = collection
+        self.embedding_model = embedding_model
+        self.embed_batch_size = embed_batch_size or int(os.getenv("INGEST_EMBED_BATCH_SIZE", 32))
+        self.embed_workers = embed_workers or int(os.getenv("INGEST_EMBED_WORKERS", 4))
+        max_concurrency = getattr(embedding_model, 'max_concurrency', None)
+        if max_concurrency:
+            self.embed_workers = min(self.embed_workers, math.ceil(max_concurrency / self.embed_batch_size) + 1)
+        self.queue_size = queue_size
+        self.batch_size = initial_batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency or float(os.getenv("INGEST_TARGET_BATCH_LATENCY", 1.0))
+        self.on_inserted = on_inserted
+        self._uuids = None
+
+    @staticmethod
+    def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+        """q가 가득 차 있으면 기다리되, stop이 설정되면 넣지 않고 False를 돌려줍니다."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(q: queue.Queue, stop: threading.Event):
+        """q가 비어 있으면 기다리되, stop이 설정되면 _DONE을 돌려줍니다."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _produce(self, objects: list[dict], embed_queue: queue.Queue, stop: threading.Event):
+        for start in range(0, len(objects), self.embed_batch_size):
+            if not self._put(embed_queue, (start, objects[start:start + self.embed_batch_size]), stop):
+                return
+        for _ in range(self.embed_workers):
+            self._put(embed_queue, _DONE, stop)
+
+    def _embed(self, embed_queue: queue.Queue, write_queue: queue.Queue, failures: list, failures_lock: threading.Lock,
+               stop: threading.Event):
+        while True:
+            item = self._get(embed_queue, stop)
+            if item is _DONE:
+                self._put(write_queue, _DONE, stop)
+                return
+            start, chunk = item
+            try:
+                embeddings = self.embedding_model.embed_documents([object['text'] for object in chunk])
+            except Exception as e:
+                embeddings = [{'err_msg': f'{type(e).__name__}: {e}'}] * len(chunk)
+
+            embedded = []
+            for offset, (object, embedding) in enumerate(zip(chunk, embeddings)):
+                if 'err_msg' in embedding:
+                    with failures_lock:
+                        failures.append({'index': start + offset, 'stage': 'embedding', 'error': embedding['err_msg']})
+                else:
+                    embedded.append((start + offset, object, embedding['embedding']))
+            if not self._put(write_queue, embedded, stop):
+                return
+
+    def _write(self, buffer: list, failures: list, failures_lock: threading.Lock) -> int:
+        data_objects = [
+            DataObject(properties=object, vector=vector, uuid=self._uuids[i] if self._uuids else None)
+            for i, object, vector in buffer
+        ]
+        started = time.perf_counter()
+        try:
+            result = self.collection.data.insert_many(data_objects)
+            errors = result.errors
+            inserted_uuids = result.uuids
+        except Exception as e:
+            errors = {i: e for i in range(len(buffer))}
+            inserted_uuids = {}
+        latency = time.perf_counter() - started
+
+        with failures_lock:
+            for i, error in errors.items():
+                failures.append({'index': buffer[i][0], 'stage': 'insert', 'error': getattr(error, 'message', str(error))})
+        if self.on_inserted is not None and inserted_uuids:
+            self.on_inserted([(buffer[i][1], buffer[i][2], str(uuid)) for i, uuid in inserted_uuids.items()])
+
+        # 적재 지연시간에 맞춰 다음 batch 크기를 조절합니다.
+        if latency < self.target_latency / 2:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+        elif latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        return len(buffer) - len(errors)
+
+    def run(self, objects: list[dict], desc: str = '적재중..', uuids: list[str] = None) -> dict:
+        """objects를 적재하고 결과 리포트를 반환합니다. uuids를 주면 objects와 같은 순서로 각 object의 uuid로 사용합니다.
+
+        Returns:
+            total / inserted / failed(실패 object 목록) / elapsed / chunks_per_second / final_batch_size
+        """
+        started = time.perf_counter()
+        self._uuids = uuids
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        failures = []
+        failures_lock = threading.Lock()
+        stop = threading.Event()
+
+        threads = [threading.Thread(target=self._produce, args=(objects, embed_queue, stop), daemon=True)]
+        threads += [
+            threading.Thread(target=self._embed, args=(embed_queue, write_queue, failures, failures_lock, stop), daemon=True)
+            for _ in range(self.embed_workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        inserted = 0
+        buffer = []
+        finished_workers = 0
+        try:
+            with tqdm(total=len(objects), desc=desc) as progress:
+                while finished_workers < self.embed_workers:
+                    item = write_queue.get()
+                    if item is _DONE:
+                        finished_workers += 1
+                        continue
+                    buffer.extend(item)
+                    while len(buffer) >= self.batch_size:
+                        batch, buffer = buffer[:self.batch_size], buffer[self.batch_size:]
+                        inserted += self._write(batch, failures, failures_lock)
+                        progress.update(len(batch))
+                if buffer:
+                    inserted += self._write(buffer, failures, failures_lock)
+                    progress.update(len(buffer))
+        except BaseException:
+            # writer가 멈추면 embed worker가 가득 찬 write 큐에서 영원히 기다리므로, 멈춤 신호를 보내고 끝날 때까지 기다립니다.
+            stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'total': len(objects),
+            'inserted': inserted,
+            'failed': sorted(failures, key=lambda failure: failure['index']),
+            'elapsed': elapsed,
+            'chunks_per_second': inserted / elapsed if elapsed > 0 else 0.0,
+            'final_batch_size': self.batch_size,
+        }
+        print(f"{inserted}/{len(objects)}개 chunk 적재 완료 ({elapsed:.1f}초, {report['chunks_per_second']:.1f} chunks/s)")
+        if failures:
+            print(f'{len(failures)}개 chunk는 적재에 실패하였습니다. (실패 목록은 리포트의 failed 참고)')
+        return report
@@ -0,0 +1,440 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from ..cache.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    row INTEGER PRIMARY KEY,
+    uuid TEXT UNIQUE NOT NULL,
+    properties TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_WORD_PATTERN = re.compile(r'[0-9A-Za-z]+|[가-힣]+')
+# 어절 끝에 붙는 대표적인 조사/어미 (긴 것부터 제거)
+_JOSA = sorted(['으로써', '으로서', '에서는', '에게서', '이라는', '으로', '에서', '에게', '까지', '부터', '보다', '이나', '이며',
+                '이고', '하는', '하고', '라는', '은', '는', '이', '가', '을', '를', '의', '에', '와', '과', '도', '로', '만', '및'],
+               key=len, reverse=True)
+
+
+def tokenize(text: str) -> list[str]:
+    """한국어를 고려한 BM25용 토크나이저.
+
+    형태소 분석기 없이, 어절에서 조사를 떼어낸 형태와 글자 bigram을 함께 사용합니다.
+    ('전자금융거래법에' 와 '전자금융거래법' 이 같은 토큰/bigram을 공유합니다.)
+    """
+    tokens = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        if '가' <= word[0] <= '힣':
+            for josa in _JOSA:
+                if len(word) > len(josa) + 1 and word.endswith(josa):
+                    word = word[:-len(josa)]
+                    break
+            tokens.append(word)
+            tokens.extend(f'#{word[i:i + 2]}' for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _vector_of(o) -> list[float]:
+    vector = o.vector
+    if isinstance(vector, dict):
+        vector = vector.get('default') or next(iter(vector.values()), None)
+    return vector
+
+
+class LocalHybridEngine:
+    """Weaviate 없이 프로세스 안에서 동작하는 소규모 corpus용 hybrid 검색 엔진.
+
+    - dense: float16 memmap 벡터 행렬에 대한 numpy 전수 검색 (행렬이 작으면 float32 사본을 메모리에 두고, 크면 block 단위 matmul)
+    - bm25: 한국어 토크나이저(tokenize) 기반 역색인
+    - hybrid: 두 점수를 각각 min-max 정규화 후 alpha 가중합 (weaviate relativeScoreFusion과 같은 방식)
+
+    벡터(vectors.f16)와 object(rows.sqlite3)는 path 아래에 저장되어 재시작 시 다시 불러오며, BM25 역색인은 불러올 때 다시 만듭니다.
+    적재/삭제는 VectorDB가 add / remove_ids / remove_where 로 증분 반영합니다.
+    파일은 한 프로세스만 씁니다. path가 없으면 프로세스 전용 디렉토리(process_engine_dir)를 사용하므로
+    여러 uvicorn 워커가 같은 vectors.f16을 지우거나 같은 row 번호에 덧붙이지 않습니다.
+    """
+
+    def __init__(self, name: str, path: str = None, k1: float = 1.2, b: float = 0.75, block_size: int = 65536):
+        root = path or process_engine_dir()
+        self.name = name
+        self.path = os.path.join(root, name)
+        self.k1 = k1
+        self.b = b
+        self.block_size = block_size
+        self.max_memory_floats = int(os.getenv('LOCAL_ENGINE_MEMORY_FLOATS', 64_000_000))
+        self.store = SQLiteStore(os.path.join(self.path, 'rows.sqlite3'), _SCHEMA)
+        self.generation = None
+        self._lock = threading.RLock()
+        self._reset_memory()
+
+    def _reset_memory(self):
+        self.ready = False
+        self.dim = None
+        self._n = 0
+        self._capacity = 0
+        self._vectors = None        # float16 memmap (capacity, dim)
+        self._dense32 = None        # 작은 행렬이면 float32 사본
+        self._alive = np.zeros(0, dtype=bool)
+        self._properties = []
+        self._uuids = []
+        self._row_of = {}
+        self._postings = {}         # term -> {row: tf}
+        self._compiled = {}         # term -> (rows, tfs) numpy 배열
+        self._doc_len = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return int(self._alive[:self._n].sum())
+
+    # ---- 저장소 ----
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, 'vectors.f16')
+
+    def _meta(self, key: str):
+        row = self.store.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn, key: str, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _ensure_capacity(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+        with open(self._vectors_path(), 'ab') as f:
+            f.truncate(capacity * self.dim * 2)
+        self._vectors = np.memmap(self._vectors_path(), dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._n] = self._alive[:self._n]
+        self._alive = alive
+        doc_len = np.zeros(capacity, dtype=np.float32)
+        doc_len[:self._n] = self._doc_len[:self._n]
+        self._doc_len = doc_len
+        if capacity * self.dim <= self.max_memory_floats:
+            dense = np.zeros((capacity, self.dim), dtype=np.float32)
+            if self._n:
+                dense[:self._n] = self._vectors[:self._n]
+            self._dense32 = dense
+        else:
+            self._dense32 = None
+        self._capacity = capacity
+
+    def load(self) -> bool:
+        """디스크에 저장된 인덱스를 불러옵니다. 저장된 것이 없으면 False."""
+        with self._lock:
+            self._reset_memory()
+            dim = self._meta('dim')
+            if dim is None or not os.path.exists(self._vectors_path()):
+                return False
+            self.dim = int(dim)
+            rows = self.store.connection().execute("SELECT row, uuid, properties, deleted FROM rows ORDER BY row").fetchall()
+            n = rows[-1][0] + 1 if rows else 0
+            self._capacity = os.path.getsize(self._vectors_path()) // (self.dim * 2)
+            self._capacity, capacity = 0, self._capacity
+            self._ensure_capacity(max(capacity, n))
+            self._properties = [None] * n
+            self._uuids = [None] * n
+            for row, uuid, properties, deleted in rows:
+                self._properties[row] = json.loads(properties)
+                self._uuids[row] = uuid
+                if not deleted:
+                    self._row_of[uuid] = row
+                    self._alive[row] = True
+                    self._index_text(row, self._properties[row].get('text') or '')
+            self._n = n
+            if self._dense32 is not None and n:
+                self._dense32[:n] = self._vectors[:n]
+            generation = self._meta('generation')
+            self.generation = int(generation) if generation is not None else None
+            self.ready = True
+            print(f'{self.name} 로컬 검색 인덱스를 불러왔습니다. ({len(self)}개 object)')
+            return True
+
+    def invalidate(self):
+        """증분 반영할 수 없는 변경이 있었을 때 호출합니다. 다음 검색 때 weaviate에서 다시 만듭니다."""
+        self.ready = False
+
+    def clear(self):
+        with self._lock:
+            conn = self.store.connection()
+            with conn:
+                conn.execute("DELETE FROM rows")
+                conn.execute("DELETE FROM meta")
+            self._vectors = None
+            if os.path.exists(self._vectors_path()):
+                os.remove(self._vectors_path())
+            self._reset_memory()
+            self.generation = None
+
+    def build(self, collections: list, generation: int = None):
+        """weaviate collection(멀티테넌트면 tenant별 목록)의 object와 벡터를 전부 읽어 인덱스를 새로 만듭니다."""
+        items = [(o.properties, _vector_of(o), str(o.uuid)) for collection in collections
+                 for o in collection.iterator(include_vector=True)]
+        self._rebuild(items, generation)
+
+    async def abuild(self, collections: list, generation: int = None):
+        items = [(o.properties, _vector_of(o), str(o.uuid)) for collection in collections
+                 async for o in collection.iterator(include_vector=True)]
+        self._rebuild(items, generation)
+
+    def _rebuild(self, items: list, generation: int = None):
+        with self._lock:
+            self.clear()
+            self.add_many([item for item in items if item[1]])
+            self.mark_synced(generation)
+            self.ready = True
+            print(f'{self.name} 로컬 검색 인덱스를 만들었습니다. ({len(self)}개 object)')
+
+    def mark_synced(self, generation: int = None):
+        """인덱스가 반영하고 있는 collection generation(CollectionGenerations)을 기록합니다."""
+        self.generation = generation
+        if generation is not None:
+            conn = self.store.connection()
+            with conn:
+                self._set_meta(conn, 'generation', generation)
+
+    # ---- 증분 갱신 ----
+    def add(self, objects: list[dict], vectors: list[list[float]], uuids: list[str]):
+        if not objects:
+            return
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vectors[0])
+                conn = self.store.connection()
+                with conn:
+                    self._set_meta(conn, 'dim', self.dim)
+            replaced = [uuid for uuid in uuids if uuid in self._row_of]
+            if replaced:
+                self.remove_ids(replaced)
+
+            start = self._n
+            self._ensure_capacity(start + len(objects))
+            matrix = np.asarray(vectors, dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+            self._vectors[start:start + len(objects)] = matrix
+            self._vectors.flush()
+            if self._dense32 is not None:
+                self._dense32[start:start + len(objects)] = matrix
+
+            rows = []
+            for offset, (properties, uuid) in enumerate(zip(objects, uuids)):
+                row = start + offset
+                properties = dict(properties)
+                self._properties.append(properties)
+                self._uuids.append(uuid)
+                self._row_of[uuid] = row
+                self._alive[row] = True
+                self._index_text(row, properties.get('text') or '')
+                rows.append((row, uuid, json.dumps(properties, ensure_ascii=False, default=str)))
+            self._n = start + len(objects)
+            conn = self.store.connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO rows (row, uuid, properties, deleted) VALUES (?, ?, ?, 0)", rows)
+
+    def add_many(self, items: list[tuple]):
+        """(properties, vector, uuid) 목록을 추가합니다. (IngestionPipeline의 on_inserted 콜백)"""
+        if items:
+            self.add([p for p, _, _ in items], [v for _, v, _ in items], [u for _, _, u in items])
+
+    def _index_text(self, row: int, text: str):
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[row] = tf
+            self._compiled.pop(term, None)
+        self._doc_len[row] = sum(counts.values())
+
+    def remove_ids(self, uuids: list[str]):
+        with self._lock:
+            rows = [self._row_of.pop(uuid) for uuid in uuids if uuid in self._row_of]
+            for row in rows:
+                self._alive[row] = False
+            if rows:
+                conn = self.store.connection()
+                with conn:
+                    conn.executemany("UPDATE rows SET deleted = 1 WHERE row = ?", [(row,) for row in rows])
+
+    def remove_where(self, filter) -> bool:
+        """delete_obejcts에 사용한 filter를 반영합니다. 반영할 수 없는 filter면 False (호출한 쪽에서 다시 build)."""
+        target = getattr(filter, 'target', None)
+        operator = getattr(getattr(filter, 'operator', None), 'name', None)
+        value = getattr(filter, 'value', None)
+        if target == '_id' and operator in ('EQUAL', 'CONTAINS_ANY'):
+            self.remove_ids([str(v) for v in (value if operator == 'CONTAINS_ANY' else [value])])
+            return True
+        if isinstance(target, str) and operator == 'EQUAL':
+            self.remove_ids([uuid for uuid, row in list(self._row_of.items()) if self._properties[row].get(target) == value])
+            return True
+        return False
+
+    def update_properties(self, uuid: str, properties: dict):
+        with self._lock:
+            row = self._row_of.get(uuid)
+            if row is None:
+                return
+            self._properties[row].update(properties)
+            conn = self.store.connection()
+            with conn:
+                conn.execute("UPDATE rows SET properties = ? WHERE row = ?",
+                             (json.dumps(self._properties[row], ensure_ascii=False, default=str), row))
+
+    # ---- 검색 ----
+    def _dense_scores(self, vector: list[float]) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        if self._dense32 is not None:
+            return self._dense32[:self._n] @ query
+        scores = np.empty(self._n, dtype=np.float32)
+        for start in range(0, self._n, self.block_size):
+            end = min(start + self.block_size, self._n)
+            scores[start:end] = np.asarray(self._vectors[start:end], dtype=np.float32) @ query
+        return scores
+
+    def _bm25_scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self._n, dtype=np.float32)
+        alive = self._alive[:self._n]
+        n_docs = int(alive.sum())
+        if not n_docs:
+            return scores
+        avgdl = float(self._doc_len[:self._n][alive].mean()) or 1.0
+        for term in set(tokenize(query)):
+            compiled = self._compiled.get(term)
+            if compiled is None:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                compiled = self._compiled[term] = (np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                                                   np.fromiter(postings.values(), dtype=np.float32, count=len(postings)))
+            rows, tfs = compiled
+            mask = alive[rows]
+            rows, tfs = rows[mask], tfs[mask]
+            if not len(rows):
+                continue
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            dl = self._doc_len[rows]
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + self.k1 * (1 - self.b + self.b * dl / avgdl))
+        return scores
+
+    @staticmethod
+    def _normalize(scores: np.ndarray, alive: np.ndarray) -> np.ndarray:
+        live = scores[alive]
+        if not len(live):
+            return scores
+        low, high = float(live.min()), float(live.max())
+        if high - low < 1e-12:
+            return np.where(alive, 1.0 if high > 0 else 0.0, 0.0).astype(np.float32)
+        return (scores - low) / (high - low)
+
+    def _top(self, scores: np.ndarray, topk: int, require_positive: bool = False) -> list[dict]:
+        alive = self._alive[:self._n]
+        scores = np.where(alive, scores, -np.inf)
+        if require_positive:
+            scores = np.where(scores > 0, scores, -np.inf)
+        k = min(topk, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [dict(self._properties[row]) for row in top]
+
+    def query_dense(self, vector: list[float], topk: int = 4) -> list[dict]:
+        with self._lock:
+            return self._top(self._dense_scores(vector), topk) if self._n else []
+
+    def query_bm25(self, query: str, topk: int = 4) -> list[dict]:
+        with self._lock:
+            return self._top(self._bm25_scores(query), topk, require_positive=True) if self._n else []
+
+    def query_hybrid(self, query: str, vector: list[float], alpha: float = 0.5, topk: int = 4) -> list[dict]:
+        with self._lock:
+            if not self._n:
+                return []
+            alive = self._alive[:self._n]
+            dense = self._normalize(self._dense_scores(vector), alive) if alpha > 0 else 0.0
+            sparse = self._normalize(self._bm25_scores(query), alive) if alpha < 1 else 0.0
+            return self._top(alpha * dense + (1 - alpha) * sparse, topk)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_process_engine_dir: str = None
+_process_engine_dir_lock = threading.Lock()
+
+
+def process_engine_dir() -> str:
+    """이 프로세스 전용 로컬 인덱스 디렉토리 (LOCAL_ENGINE_DIR/pid-<PID>).
+
+    종료된 프로세스의 디렉토리가 남아 있으면 이름을 바꿔(os.rename) 이어받으므로 재시작해도 저장된 인덱스를 다시 씁니다.
+    이어받은 인덱스가 오래되었으면 generation이 달라 첫 검색 때 다시 만들어집니다.
+    """
+    global _process_engine_dir
+    with _process_engine_dir_lock:
+        if _process_engine_dir is not None:
+            return _process_engine_dir
+        root = os.getenv('LOCAL_ENGINE_DIR', './local_index')
+        path = os.path.join(root, f'pid-{os.getpid()}')
+        if not os.path.exists(path) and os.path.isdir(root):
+            for entry in sorted(os.listdir(root)):
+                if not entry.startswith('pid-') or not entry[4:].isdigit() or _pid_alive(int(entry[4:])):
+                    continue
+                try:
+                    os.rename(os.path.join(root, entry), path)
+                    break
+                except OSError:
+                    # 다른 워커가 먼저 이어받았습니다.
+                    continue
+        _process_engine_dir = path
+        return path
+
+
+def local_engine_enabled() -> bool:
+    """LOCAL_ENGINE_ENABLED=true 이면 VectorDB가 검색을 로컬 엔진으로 처리합니다. (멀티테넌트 collection 제외)"""
+    return os.getenv('LOCAL_ENGINE_ENABLED', 'false').lower() in ('true', '1', 'yes')
+
+
+_local_engines: dict = {}
+_local_engines_lock = threading.Lock()
+
+
+def get_local_engine(name: str):
+    """collection별 프로세스 전역 로컬 검색 엔진을 반환합니다. 비활성화되어 있으면 None."""
+    if not local_engine_enabled():
+        return None
+    with _local_engines_lock:
+        engine = _local_engines.get(name)
+        if engine is None:
+            engine = _local_engines[name] = LocalHybridEngine(name)
+            engine.load()
+        return engine
+
+
+def clear_local_engines(name: str = None):
+    """collection 삭제/reset 시 로컬 인덱스를 비웁니다. name이 없으면 전부 비웁니다."""
+    with _local_engines_lock:
+        engines = list(_local_engines.values()) if name is None else [_local_engines.get(name)]
+    for engine in engines:
+        if engine is not None:
+            engine.clear()
@@ -1,36 +1,248 @@
 # -*- coding: utf-8 -*-
 
-import http.client
+import asyncio
 import json
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
 from dotenv import load_dotenv
 import os
+from ..cache.embedding_cache import get_embedding_cache
+from .embedding_provider import EmbeddingProvider
 load_dotenv()
 
-class NaverCloudEmbeddings:
-    def __init__(self, host = None, api_key = None, request_id = None):
+NAVER_EMBEDDING_URI = '/v1/api-tools/embedding/v2'
+# 임베딩 캐시 키에 들어가는 모델 식별자 (v2 엔드포인트 = bge-m3)
+NAVER_EMBEDDING_MODEL_ID = 'navercloud/bge-m3'
+
+class NaverCloudEmbeddings(EmbeddingProvider):
+    """네이버클라우드 임베딩(bge-m3) API 클라이언트.
+
+    keep-alive 커넥션 풀을 가진 httpx.Client(비동기 호출은 httpx.AsyncClient) 하나를 인스턴스가 끝날 때까지 재사용하며,
+    embed_documents / aembed_documents는 최대 max_concurrency개의 요청을 동시에 보내고 입력 순서대로 결과를 돌려줍니다.
+    동기 요청은 인스턴스 전체에서 max_concurrency개(커넥션 풀 크기)까지만 동시에 보내므로,
+    여러 스레드가 embed_documents를 함께 호출해도 풀을 기다리다 PoolTimeout이 나지 않고 차례를 기다립니다.
+    429(Too Many Requests) 응답은 get_naver_embedding과 같은 exponential backoff로 재시도합니다.
+    이미 임베딩한 텍스트는 공유 임베딩 캐시(EmbeddingCache)에서 바로 돌려줍니다.
+    """
+    model_id = NAVER_EMBEDDING_MODEL_ID
+    dimension = 1024
+
+    def __init__(self, host = None, api_key = None, request_id = None,
+                 max_concurrency: int = None, max_retries: int = 5, timeout: float = 30.0,
+                 use_cache: bool = True):
         self._host = os.getenv('NAVERCLOUD_HOST') if not host else host
         self._api_key = os.getenv('NAVER_CLOVA_API_KEY') if not api_key else api_key
         self._request_id = request_id
+        self.max_concurrency = max_concurrency or int(os.getenv('NAVER_EMBEDDING_CONCURRENCY', 8))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrency)
+        # AsyncClient와 asyncio.Semaphore는 만들어진 이벤트 루프에 묶이므로 루프마다 따로 둡니다. (LLMClientRegistry.async_client와 같은 방식)
+        # 세마포어를 호출마다 만들면 동시에 들어온 aembed_documents 호출끼리는 동시 요청 수가 제한되지 않습니다.
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._async_request_slots = weakref.WeakKeyDictionary()
+        self.cache = get_embedding_cache() if use_cache else None
 
-    def _send_request(self, completion_request):
+    def _headers(self):
         headers = {
             'Content-Type': 'application/json; charset=utf-8',
             'Authorization': self._api_key,
         }
         if self._request_id:
             headers['X-NCP-CLOVASTUDIO-REQUEST-ID'] = self._request_id
+        return headers
 
-        conn = http.client.HTTPSConnection(self._host)
-        conn.request('POST', '/v1/api-tools/embedding/v2', json.dumps(completion_request), headers)
-        response = conn.getresponse()
-        result = json.loads(response.read().decode(encoding='utf-8'))
-        conn.close()
-        return result
+    def _get_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=f'https://{self._host}',
+                        headers=self._headers(),
+                        timeout=self.timeout,
+                        limits=httpx.Limits(max_connections=self.max_concurrency,
+                                            max_keepalive_connections=self.max_concurrency),
+                    )
+        return self._client
 
-    def embed_query(self, text):
-        request = {'text' : text }
-        res = self._send_request(request)
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    base_url=f'https://{self._host}',
+                    headers=self._headers(),
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_concurrency,
+                                        max_keepalive_connections=self.max_concurrency),
+                )
+                self._async_clients[loop] = client
+        return client
+
+    def _get_async_request_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            slots = self._async_request_slots.get(loop)
+            if slots is None:
+                slots = self._async_request_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Exponential backoff with jitter
+        base_delay = 2 ** attempt  # 1, 2, 4, 8, 16초
+        jitter = random.uniform(0.1, 0.5) * base_delay  # 10-50% 지터
+        return min(base_delay + jitter, 64)  # 최대 64초
+
+    def _send_request(self, completion_request):
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._request_slots:
+                    response = client.post(NAVER_EMBEDDING_URI, content=json.dumps(completion_request))
+            except httpx.RequestError as e:
+                if attempt < self.max_retries:
+                    wait_time = self._backoff(attempt)
+                    print(f"[재시도] 네트워크 오류, {wait_time:.1f}초 후 재시도: {e}")
+                    time.sleep(wait_time)
+                    continue
+                raise
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                wait_time = self._backoff(attempt, response.headers.get('Retry-After'))
+                print(f"[재시도] Rate limit 감지, {wait_time:.1f}초 후 재시도 (시도 {attempt + 1}/{self.max_retries + 1})")
+                time.sleep(wait_time)
+                continue
+            return json.loads(response.content.decode(encoding='utf-8'))
+
+    async def _asend_request(self, completion_request):
+        client = self._get_async_client()
+        request_slots = self._get_async_request_slots()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with request_slots:
+                    response = await client.post(NAVER_EMBEDDING_URI, content=json.dumps(completion_request))
+            except httpx.RequestError as e:
+                if attempt < self.max_retries:
+                    wait_time = self._backoff(attempt)
+                    print(f"[재시도] 네트워크 오류, {wait_time:.1f}초 후 재시도: {e}")
+                    await asyncio.sleep(wait_time)
+                    continue
+                raise
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                wait_time = self._backoff(attempt, response.headers.get('Retry-After'))
+                print(f"[재시도] Rate limit 감지, {wait_time:.1f}초 후 재시도 (시도 {attempt + 1}/{self.max_retries + 1})")
+                await asyncio.sleep(wait_time)
+                continue
+            return json.loads(response.content.decode(encoding='utf-8'))
+
+    @staticmethod
+    def _parse_result(res) -> dict:
         if res['status']['code'] == '20000':
             return res['result']
         else:
             return {'err_msg': 'Error ' + f"{res['status']['code']}"}
+
+    # 응답 형식이 예상과 다르면(status 없음 등) 예외 대신 해당 텍스트만 실패로 돌려줍니다. (배치 전체가 중단되지 않도록)
+    def _embed_one(self, text):
+        try:
+            return self._parse_result(self._send_request({'text' : text}))
+        except Exception as e:
+            return {'err_msg': f'Error {type(e).__name__}: {e}'}
+
+    async def _aembed_one(self, text):
+        try:
+            return self._parse_result(await self._asend_request({'text' : text}))
+        except Exception as e:
+            return {'err_msg': f'Error {type(e).__name__}: {e}'}
+
+    def check_connection(self, text: str = '안녕?') -> dict:
+        """캐시를 거치지 않고 실제 API를 한 번 호출하여 접속정보를 확인합니다."""
+        return self._embed_one(text)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts: list[str]) -> list[dict]:
+        """여러 텍스트를 동시에 임베딩합니다.
+
+        Returns:
+            입력 순서와 같은 순서의 결과 리스트. 각 원소는 embed_query와 같은 형식으로
+            성공 시 {'embedding': [...], ...}, 실패 시 {'err_msg': ...} 입니다.
+        """
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        results, missing = self._lookup_cache(texts)
+        if missing:
+            fresh = self._embed_uncached([texts[i] for i in missing])
+            self._fill_missing(texts, results, missing, fresh)
+        return results
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[dict]:
+        """embed_documents의 비동기 버전입니다. 이벤트 루프를 막지 않고 동시에 임베딩합니다."""
+        if not texts:
+            return []
+        if self.cache is None:
+            return await self._aembed_uncached(texts)
+
+        results, missing = self._lookup_cache(texts)
+        if missing:
+            fresh = await self._aembed_uncached([texts[i] for i in missing])
+            self._fill_missing(texts, results, missing, fresh)
+        return results
+
+    def _lookup_cache(self, texts: list[str]):
+        cached = self.cache.get_many(texts, self.model_id)
+        results = [{'embedding': embedding} if embedding is not None else None for embedding in cached]
+        missing = [i for i, result in enumerate(results) if result is None]
+        return results, missing
+
+    def _fill_missing(self, texts, results, missing, fresh):
+        for i, result in zip(missing, fresh):
+            results[i] = result
+        succeeded = [(texts[i], result['embedding']) for i, result in zip(missing, fresh) if 'err_msg' not in result]
+        if succeeded:
+            self.cache.put_many([text for text, _ in succeeded], [embedding for _, embedding in succeeded], self.model_id)
+
+    async def _aembed_uncached(self, texts: list[str]) -> list[dict]:
+        return await asyncio.gather(*[self._aembed_one(text) for text in texts])
+
+    def _embed_uncached(self, texts: list[str]) -> list[dict]:
+        if len(texts) == 1:
+            return [self._embed_one(texts[0])]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(texts))) as executor:
+            return list(executor.map(self._embed_one, texts))
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        """현재 이벤트 루프의 AsyncClient를 닫습니다."""
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.pop(loop, None)
+            self._async_request_slots.pop(loop, None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,59 @@
+import hashlib
+import json
+import uuid
+
+from weaviate.classes.config import Property, DataType, Tokenization
+
+LEGAL_DB_PROPERTIES = [
+    Property(name="text", data_type=DataType.TEXT),
+    Property(name="n_char", data_type=DataType.INT),
+    Property(name="n_word", data_type=DataType.INT),
+    Property(name="i_page", data_type=DataType.INT),
+    Property(name="i_chunk_on_page", data_type=DataType.INT),
+    Property(name="n_chunk_of_page", data_type=DataType.INT),
+    Property(name="i_chunk_on_doc", data_type=DataType.INT),
+    Property(name="n_chunk_of_doc", data_type=DataType.INT),
+    Property(name="n_page", data_type=DataType.INT),
+    # name / file_name은 값 전체를 하나의 토큰으로 저장(FIELD)하여 equal filter가 정확히 같은 값만 찾도록 합니다.
+    # (기본 WORD 토큰화면 "…법.pdf" 필터가 "…법 (1).pdf"의 chunk까지 가져옵니다.)
+    Property(name="name", data_type=DataType.TEXT, tokenization=Tokenization.FIELD),
+    Property(name="file_path", data_type=DataType.TEXT),
+    Property(name="file_name", data_type=DataType.TEXT, tokenization=Tokenization.FIELD),
+    # 증분 적재용 해시 (chunk 내용 / 원본 파일)
+    Property(name="content_hash", data_type=DataType.TEXT),
+    Property(name="file_hash", data_type=DataType.TEXT),
+    # 멀티테넌트 적재 시 속한 tenant 키 (문서군 또는 작업공간)
+    Property(name="tenant", data_type=DataType.TEXT),
+]
+
+# chunk uuid 생성용 namespace (값이 바뀌면 기존 chunk를 전부 새 chunk로 인식하므로 바꾸지 마세요.)
+_CHUNK_NAMESPACE = uuid.UUID('5f0c7e5e-2f4b-4c7a-9a53-3e1c2b8d6a10')
+
+
+def file_hash(path: str) -> str:
+    """원본 파일 bytes의 sha256."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(object: dict) -> str:
+    """임베딩에 영향을 주는 내용(text, name)의 sha256. 페이지 번호 등 위치 정보는 포함하지 않습니다."""
+    payload = json.dumps([object.get('text'), object.get('name')], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def chunk_uuids(file_name: str, content_hashes: list[str]) -> list[str]:
+    """파일 이름 + content_hash(+ 같은 내용의 몇 번째 chunk인지)로 결정적인 uuid를 만듭니다.
+
+    같은 파일의 같은 chunk는 언제 다시 적재해도 같은 uuid를 가지므로, uuid 비교만으로 증분 적재 diff를 계산할 수 있습니다.
+    """
+    seen = {}
+    uuids = []
+    for h in content_hashes:
+        occurrence = seen.get(h, 0)
+        seen[h] = occurrence + 1
+        uuids.append(str(uuid.uuid5(_CHUNK_NAMESPACE, f'{file_name}\x00{h}\x00{occurrence}')))
+    return uuids
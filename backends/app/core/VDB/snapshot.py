@@ -0,0 +1,73 @@
+import gzip
+import json
+import os
+import time
+
+import numpy as np
+from pathlib import Path
+
+# 스냅샷 디렉토리 구성
+# - meta.json: collection 이름, 임베딩 모델, 벡터 차원, object 수, 생성 시각
+# - objects.jsonl.gz: object마다 {"uuid", "tenant", "properties"} 한 줄 (vectors.npz의 행 순서와 같음)
+# - vectors.npz: float32 벡터 행렬 (압축)
+META_FILE = 'meta.json'
+OBJECTS_FILE = 'objects.jsonl.gz'
+VECTORS_FILE = 'vectors.npz'
+
+
+def default_snapshot_path(collection: str) -> str:
+    """SNAPSHOT_DIR(기본 ./snapshots) 아래 collection 이름과 시각으로 된 스냅샷 경로."""
+    return os.path.join(os.getenv('SNAPSHOT_DIR', './snapshots'), f"{collection}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+
+def snapshot_path_for(name: str) -> str:
+    """API로 받은 스냅샷 이름을 SNAPSHOT_DIR 아래 경로로 바꿉니다. 경로 구분자나 '..'가 들어간 이름은 ValueError."""
+    if not name or name in ('.', '..') or Path(name).name != name or '\\' in name:
+        raise ValueError(f"스냅샷 이름이 올바르지 않습니다. SNAPSHOT_DIR 아래의 이름만 쓸 수 있습니다. : {name}")
+    return os.path.join(os.getenv('SNAPSHOT_DIR', './snapshots'), name)
+
+
+def write_snapshot(path: str, items, meta: dict) -> dict:
+    """(uuid, tenant, properties, vector)를 순서대로 내보내는 items를 path에 스냅샷으로 씁니다.
+
+    properties는 읽는 대로 objects.jsonl.gz에 바로 쓰고, 벡터만 모아 마지막에 vectors.npz로 저장합니다.
+
+    Returns:
+        meta.json에 기록한 내용 (count, dimension 포함)
+    """
+    os.makedirs(path, exist_ok=True)
+    vectors = []
+    with gzip.open(os.path.join(path, OBJECTS_FILE), 'wt', encoding='utf-8') as f:
+        for uuid, tenant, properties, vector in items:
+            f.write(json.dumps({'uuid': uuid, 'tenant': tenant, 'properties': properties}, ensure_ascii=False, default=str) + '\n')
+            vectors.append(np.asarray(vector, dtype=np.float32))
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    np.savez_compressed(os.path.join(path, VECTORS_FILE), vectors=matrix)
+
+    meta = dict(meta, count=len(vectors), dimension=int(matrix.shape[1]) if vectors else None, created_at=time.time())
+    with open(os.path.join(path, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+def read_snapshot_meta(path: str) -> dict:
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f'{path}에 스냅샷이 없습니다. ({META_FILE} 없음)')
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_snapshot(path: str, batch_size: int = 256):
+    """스냅샷의 object를 batch_size개씩 [(uuid, tenant, properties, vector)] 목록으로 돌려줍니다."""
+    vectors = np.load(os.path.join(path, VECTORS_FILE))['vectors']
+    batch = []
+    with gzip.open(os.path.join(path, OBJECTS_FILE), 'rt', encoding='utf-8') as f:
+        for row, line in enumerate(f):
+            item = json.loads(line)
+            batch.append((item['uuid'], item.get('tenant'), item['properties'], vectors[row].tolist()))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
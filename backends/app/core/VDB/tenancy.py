@@ -0,0 +1,65 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+from weaviate.classes.config import Configure
+
+
+def multi_tenancy_enabled() -> bool:
+    """VDB_MULTI_TENANCY=true 이면 LegalDB를 멀티테넌트 collection으로 만듭니다. (이미 만들어진 collection은 바뀌지 않습니다.)"""
+    return os.getenv('VDB_MULTI_TENANCY', 'false').lower() in ('true', '1', 'yes')
+
+
+def multi_tenancy_config():
+    # 적재 시 tenant가 없으면 자동으로 만들고, 비활성(cold) tenant도 조회 시 자동으로 활성화합니다.
+    return Configure.multi_tenancy(enabled=True, auto_tenant_creation=True, auto_tenant_activation=True)
+
+
+def document_family(file_name: str) -> str:
+    """파일 이름에서 문서군(법령명)을 뽑습니다. 같은 법령의 개정본/고시본은 같은 문서군이 됩니다.
+
+    ex) '전자금융감독규정(금융위원회고시)(제2025-4호)(20250205).pdf' -> '전자금융감독규정'
+    """
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    family = re.split(r'[(\[]', stem, maxsplit=1)[0]
+    return re.sub(r'\s+', '', family) or stem
+
+
+def tenant_key(file_name: str = None, workspace: str = None) -> str:
+    """문서가 속할 tenant 키. workspace(업로드한 작업공간)가 있으면 workspace, 없으면 문서군입니다."""
+    if workspace:
+        return workspace
+    if file_name:
+        return document_family(file_name)
+    raise ValueError('file_name 또는 workspace가 필요합니다.')
+
+
+def tenant_name(key: str) -> str:
+    """tenant 키(한글 가능)를 weaviate tenant 이름 규칙([A-Za-z0-9_-], 64자 이하)에 맞게 변환합니다."""
+    return 't_' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:40]
+
+
+class TenantActivity:
+    """이 프로세스에서 tenant별 마지막 사용 시각을 기록합니다. (오래 쓰지 않은 tenant를 비활성화하는 데 사용)"""
+
+    def __init__(self):
+        self._started = time.time()
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def touch(self, tenants: list[str]):
+        now = time.time()
+        with self._lock:
+            for tenant in tenants:
+                self._last_used[tenant] = now
+
+    def idle(self, tenants: list[str], max_idle_seconds: float) -> list[str]:
+        """max_idle_seconds 동안 사용하지 않은 tenant 목록. 프로세스 시작 후 한 번도 쓰지 않은 tenant는 시작 시각 기준입니다."""
+        deadline = time.time() - max_idle_seconds
+        with self._lock:
+            return [tenant for tenant in tenants if self._last_used.get(tenant, self._started) < deadline]
+
+
+tenant_activity = TenantActivity()
@@ -1,72 +1,143 @@
 import weaviate
 import os
+import time
+from types import SimpleNamespace
 from urllib.parse import urlparse
 from weaviate.classes.init import AdditionalConfig, Timeout
-from weaviate.classes.config import Property, DataType
-from weaviate.classes.query import Filter
+from weaviate.classes.config import Property, DataType, Tokenization
+from weaviate.classes.query import Filter, MetadataQuery
+from weaviate.classes.data import DataObject
+from weaviate.classes.tenants import Tenant, TenantActivityStatus
+from concurrent.futures import ThreadPoolExecutor
 
-from .navercloud_embedding import NaverCloudEmbeddings
-from tqdm import tqdm
+from .embedding_provider import create_embedding_model
+from .index_config import IndexConfig
+from .tenancy import multi_tenancy_enabled, multi_tenancy_config, tenant_name, tenant_key, tenant_activity
+from .ingestion_pipeline import IngestionPipeline
+from .article_index import get_article_index, get_article_indexes, invalidate_article_indexes, resolve_articles
+from .local_engine import get_local_engine, clear_local_engines
+from .file_manifest import get_file_manifest
+from .snapshot import write_snapshot, read_snapshot_meta, iter_snapshot, default_snapshot_path
+from ..cache.retrieval_cache import get_retrieval_cache
+from ..cache.collection_generation import get_collection_generations
+from ..Preprocessor.chunker import merge_neighbor_chunks
 
-# 네이버클라우드 임베딩 모델 (bge-m3) 모델을 활용하여 Weaviate VDB의 CRUD 및 검색을 수행합니다.
+# WEAVIATE_URL / 외부 접속정보 / 로컬 순서로 weaviate 접속 파라미터를 결정합니다.
+# (동기 client와 비동기 client가 같은 규칙으로 접속하도록 공유합니다.)
+def weaviate_connection_params(url = None, http_port = None, grpc_port = None) -> dict:
+    if url:
+        weaviate_url = url
+    else:
+        weaviate_url = os.getenv("WEAVIATE_URL")
+    if weaviate_url:
+        parsed_url = urlparse(weaviate_url)
+        # Assuming gRPC port is 50051 as per docker-compose
+        return {'http_host': parsed_url.hostname, 'http_port': parsed_url.port, 'grpc_port': 50051,
+                'init_timeout': 30, 'message': f'weaviate에 {weaviate_url}로 접속하였습니다.'}
+    # This case is for external connection
+    elif url and http_port and grpc_port:
+        return {'http_host': url, 'http_port': http_port, 'grpc_port': grpc_port,
+                'init_timeout': None, 'message': 'weaviate 외부 접속하였습니다.'}
+    else:
+        # Fallback to local if WEAVIATE_URL is not set
+        return {'http_host': 'localhost', 'http_port': 8080, 'grpc_port': 50051,
+                'init_timeout': 10, 'message': 'weaviate 로컬 접속하였습니다.'}
+
+def _custom_connection_kwargs(params: dict) -> dict:
+    kwargs = dict(
+        http_host=params['http_host'],
+        http_port=params['http_port'],
+        http_secure=False,
+        grpc_host=params['http_host'],
+        grpc_port=params['grpc_port'],
+        grpc_secure=False,
+    )
+    if params['init_timeout']:
+        kwargs['additional_config'] = AdditionalConfig(timeout=Timeout(init=params['init_timeout']))
+    return kwargs
+
+# weaviate에 접속하여 client를 반환합니다.
+# 접속에 실패하면 예외를 그대로 올려보내므로 호출하는 쪽에서 처리해야 합니다.
+def connect_weaviate(url = None, http_port = None, grpc_port = None):
+    params = weaviate_connection_params(url = url, http_port = http_port, grpc_port = grpc_port)
+    client = weaviate.connect_to_custom(**_custom_connection_kwargs(params))
+    if client.is_ready():
+        print(params['message'])
+    return client
+
+# 비동기 weaviate client에 접속하여 반환합니다.
+async def aconnect_weaviate(url = None, http_port = None, grpc_port = None):
+    params = weaviate_connection_params(url = url, http_port = http_port, grpc_port = grpc_port)
+    client = weaviate.use_async_with_custom(**_custom_connection_kwargs(params))
+    await client.connect()
+    if await client.is_ready():
+        print('(async) ' + params['message'])
+    return client
+
+# 참조 조항 조회 시 한 번에 가져올 object 수. 결과가 다 나올 때까지 페이지를 넘기므로 개수를 어림하지 않습니다.
+NAME_LOOKUP_PAGE_SIZE = 200
+
+
+def name_filter(names: list[str]):
+    """name이 names 중 하나와 같은 object를 찾는 filter. (FIELD 토큰화된 name이면 정확히 같은 값만 찾습니다.)"""
+    filters = [Filter.by_property("name").equal(name) for name in names]
+    return filters[0] if len(filters) == 1 else Filter.any_of(filters)
+
+
+# 이웃 chunk 조회 시 문서 하나당 가져올 후보 수의 배수 (file_name 필터가 토큰 단위라 다른 파일 chunk가 섞일 수 있음)
+NEIGHBOR_LIMIT_FACTOR = 4
+
+
+def neighbor_filter(documents: list[dict], window: int):
+    """documents의 chunk마다 같은 파일에서 i_chunk_on_doc이 앞뒤 window 안인 chunk를 찾는 filter. 대상이 없으면 None."""
+    filters = [Filter.all_of([Filter.by_property("file_name").equal(document['file_name']),
+                              Filter.by_property("i_chunk_on_doc").greater_or_equal(document['i_chunk_on_doc'] - window),
+                              Filter.by_property("i_chunk_on_doc").less_or_equal(document['i_chunk_on_doc'] + window)])
+               for document in documents if document.get('file_name') and document.get('i_chunk_on_doc') is not None]
+    return Filter.any_of(filters) if filters else None
+
+
+def select_by_names(objects: list[dict], names: list[str]) -> dict:
+    """objects 중 name이 정확히 일치하는 것을 name별로 하나씩 고릅니다. (같은 조문이 여러 chunk면 문서 내 가장 앞 chunk)"""
+    wanted = set(names)
+    selected = {}
+    for properties in objects:
+        name = properties.get('name')
+        if name not in wanted:
+            continue
+        current = selected.get(name)
+        if current is None or (properties.get('i_chunk_on_doc') or 0) < (current.get('i_chunk_on_doc') or 0):
+            selected[name] = properties
+    return selected
+
+
+# 임베딩 모델(EMBEDDING_PROVIDER, 기본값 네이버클라우드 bge-m3)을 활용하여 Weaviate VDB의 CRUD 및 검색을 수행합니다.
+# client와 embedding_model을 넘겨주면 새로 접속하거나 임베딩 호출 테스트를 하지 않고 그대로 사용합니다.
+# (서버에서는 WeaviateConnectionManager가 빌려주는 client를 사용합니다.)
 class VectorDB:
     def __init__(self,
-                 url = None, http_port = None, grpc_port = None):
-        self.client = None
+                 url = None, http_port = None, grpc_port = None,
+                 client = None, embedding_model = None):
+        self.client = client
         self.collection = None
-        try:
-            if url:
-                weaviate_url = url
-            else:
-                weaviate_url = os.getenv("WEAVIATE_URL")
-            if weaviate_url:
-                parsed_url = urlparse(weaviate_url)
-                http_host = parsed_url.hostname
-                http_port = parsed_url.port
-                
-                # Assuming gRPC port is 50051 as per docker-compose
-                grpc_port = 50051 
-
-                self.client = weaviate.connect_to_custom(
-                    http_host=http_host,
-                    http_port=http_port,
-                    http_secure=False,
-                    grpc_host=http_host,
-                    grpc_port=grpc_port,
-                    grpc_secure=False,
-                    additional_config=AdditionalConfig(timeout=Timeout(init=30)) # Increase timeout
-                )
-                if self.client.is_ready():
-                    print(f'weaviate에 {weaviate_url}로 접속하였습니다.')
-            # This case is for external connection
-            elif url and http_port and grpc_port:
-                self.client = weaviate.connect_to_custom(
-                                http_host=url,
-                                http_port=http_port,
-                                http_secure=False,
-                                grpc_host=url,
-                                grpc_port=grpc_port,
-                                grpc_secure=False,
-                            )
-                if self.client and self.client.is_ready():
-                    print('weaviate 외부 접속하였습니다.')
-
-            else:
-                # Fallback to local if WEAVIATE_URL is not set
-                self.client  = weaviate.connect_to_local(
-                                port=8080,  # REST
-                                grpc_port=50051,  # gRPC
-                                additional_config=AdditionalConfig(timeout=Timeout(init=10))
-                            )
-                if self.client.is_ready():
-                    print('weaviate 로컬 접속하였습니다.')
-
-        except Exception as e:
-            print(f'weaviate 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요. 에러: {e}')
-        self.embedding_model = NaverCloudEmbeddings()
-        test = self.embedding_model.embed_query('안녕?')
+        self.tenant = None      # 적재/삭제 대상 tenant (멀티테넌트 collection일 때)
+        self.tenants = None     # 검색 대상 tenant 목록 (None이면 tenant 전체)
+        self._multi_tenant = None
+        self._tokenization = None
+        self.retrieval_cache = get_retrieval_cache()
+        self.generations = get_collection_generations()
+        if self.client is None:
+            try:
+                self.client = connect_weaviate(url = url, http_port = http_port, grpc_port = grpc_port)
+            except Exception as e:
+                print(f'weaviate 접속에 실패했습니다. 서버 혹은 접속정보를 확인해 주세요. 에러: {e}')
+        if embedding_model is not None:
+            self.embedding_model = embedding_model
+            return
+        self.embedding_model = create_embedding_model()
+        test = self.embedding_model.check_connection()
         if 'err_msg' in test:
-            print('네이버클라우드 임베딩 모델 호출에 실패했습니다. 접속정보를 확인하세요.')
+            print(f'임베딩 모델({self.embedding_model.model_id}) 호출에 실패했습니다. 접속정보를 확인하세요.')
             print('err_msg:', test['err_msg'])
             raise Exception
         
@@ -81,6 +152,10 @@ class VectorDB:
 # VDB에 존재하는 collection을 모두 삭제합니다. (사용주의)
     def reset(self):
         self.client.collections.delete_all()
+        invalidate_article_indexes()
+        clear_local_engines()
+        get_file_manifest().remove_collection()
+        self._bump_generation()
         print('erased all collections in VDB.')
 
 # VDB에 존재하는 모든 collection의 이름을 조회합니다.
@@ -92,21 +167,109 @@ class VectorDB:
         collection = self.client.collections.get(name)
         if collection.exists():
             self.collection = collection
+            self.tenant = None
+            self.tenants = None
+            self._multi_tenant = None
+            self._tokenization = None
             print(f'{name} collection configured successfully.')
         else:
             raise Exception(f"{name} collection don't exist in weaviate db.")
 
-# collection 을 제작합니다. 외부 벡터를 저장하는 기능만 있으며, 이후 필요시 내부 vector_config도 입력받도록 개발하는 것이 추가될 수 있습니다.
-    def create_collection(self, properties:list[Property], name:str):
+# collection 을 제작합니다. 외부 벡터를 저장하는 기능만 있으며, 벡터 인덱스/압축 설정은 index_config로 지정합니다.
+# index_config를 주지 않으면 환경변수(IndexConfig.from_env)를 따릅니다.
+# multi_tenancy가 True면 멀티테넌트 collection으로 만듭니다. (None이면 VDB_MULTI_TENANCY 환경변수)
+    def create_collection(self, properties:list[Property], name:str, index_config: IndexConfig = None, multi_tenancy: bool = None):
         if self.client.collections.exists(name):
             print(f'{name} collection already exists.')
             
         else:
+            index_config = index_config or IndexConfig.from_env()
+            multi_tenancy = multi_tenancy_enabled() if multi_tenancy is None else multi_tenancy
             self.client.collections.create(
                 name,
-                properties = properties
+                properties = properties,
+                vector_index_config = index_config.vector_index_config(),
+                multi_tenancy_config = multi_tenancy_config() if multi_tenancy else None,
             )
-            print(f'{name} collection created.')
+            get_file_manifest().remove_collection(name)
+            print(f'{name} collection created. ({index_config.label()}{", multi-tenant" if multi_tenancy else ""})')
+
+# ---- 멀티테넌시 ----
+# 멀티테넌트 collection은 문서군(법령) 또는 업로드한 작업공간 단위의 tenant로 나뉩니다.
+# 적재/삭제는 set_tenant로 지정한 tenant에서만 일어나고, 검색은 set_tenants로 지정한 tenant(없으면 전체)에 나눠 보낸 뒤 점수순으로 합칩니다.
+    def _base_collection(self):
+        return self.client.collections.get(self.collection.name)
+
+    def is_multi_tenant(self) -> bool:
+        if getattr(self.collection, 'exists', None):
+            if self._multi_tenant is None:
+                self._multi_tenant = self._base_collection().config.get().multi_tenancy_config.enabled
+            return self._multi_tenant
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    def set_tenant(self, key: str):
+        """적재/삭제 대상 tenant를 지정합니다. 검색 대상도 이 tenant로 좁혀집니다. key는 문서군 이름 또는 작업공간 이름입니다."""
+        if not self.is_multi_tenant():
+            raise ValueError(f'{self.collection.name} collection은 멀티테넌트 collection이 아닙니다.')
+        self.tenant = tenant_name(key)
+        self.tenants = [self.tenant]
+        self.collection = self._base_collection().with_tenant(self.tenant)
+        tenant_activity.touch([self.tenant])
+
+    def set_tenants(self, keys: list[str] = None):
+        """검색 대상 tenant를 지정합니다. keys가 없으면 전체 tenant를 검색합니다. (멀티테넌트가 아니면 무시)"""
+        self.tenants = [tenant_name(key) for key in keys] if keys else None
+
+    def list_tenants(self) -> dict:
+        """{tenant 이름: Tenant(activity_status 포함)}"""
+        return self._base_collection().tenants.get()
+
+    def delete_tenant(self, key: str):
+        """tenant를 통째로 삭제합니다. object 개수와 관계없이 tenant 하나만 지우므로 파일 단위 delete_many보다 훨씬 빠릅니다."""
+        name = tenant_name(key)
+        self._base_collection().tenants.remove([name])
+        if self.tenant == name:
+            self.tenant = None
+            self.tenants = None
+            self.collection = self._base_collection()
+        get_article_index(self.collection.name, name).invalidate()
+        get_file_manifest().remove_tenant(self.collection.name, name)
+        self._bump_generation(self.collection.name)
+        print(f'{key} tenant를 삭제하였습니다.')
+
+    def deactivate_idle_tenants(self, max_idle_seconds: float) -> list[str]:
+        """max_idle_seconds 동안 이 프로세스에서 사용하지 않은 활성 tenant를 비활성(cold)으로 내려 메모리를 반환합니다.
+        비활성 tenant는 다음 조회/적재 때 자동으로 다시 활성화됩니다."""
+        active = [name for name, tenant in self.list_tenants().items()
+                  if tenant.activity_status in (TenantActivityStatus.ACTIVE, TenantActivityStatus.HOT)]
+        idle = tenant_activity.idle(active, max_idle_seconds)
+        if idle:
+            self._base_collection().tenants.update([Tenant(name=name, activity_status=TenantActivityStatus.INACTIVE) for name in idle])
+            print(f'{len(idle)}개 tenant를 비활성화하였습니다.')
+        return idle
+
+    def _target_collections(self, all_tenants: bool = False) -> list:
+        """검색 대상 collection 목록. 멀티테넌트면 대상 tenant마다 하나씩입니다. (all_tenants면 set_tenants와 관계없이 전체)"""
+        if not self.is_multi_tenant():
+            return [self.collection]
+        names = (not all_tenants and self.tenants) or list(self.list_tenants())
+        tenant_activity.touch(names)
+        base = self._base_collection()
+        return [base.with_tenant(name) for name in names]
+
+    def _search(self, search, topk: int = None, sort_key = None) -> list:
+        """search(collection)를 대상 collection마다 실행하고 결과 object를 합칩니다. 여러 tenant면 sort_key 순으로 topk개만 남깁니다."""
+        targets = self._target_collections()
+        if len(targets) == 1:
+            return list(search(targets[0]).objects)
+        if not targets:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(targets), 8)) as executor:
+            objects = [o for result in executor.map(search, targets) for o in result.objects]
+        if sort_key is not None:
+            objects.sort(key=sort_key)
+        return objects[:topk] if topk else objects
 
 # colleciton 을 삭제합니다.
     def delete_collection(self, name: str):
@@ -114,6 +277,10 @@ class VectorDB:
             self.client.collections.delete(
                 name
             )
+            invalidate_article_indexes(name)
+            clear_local_engines(name)
+            get_file_manifest().remove_collection(name)
+            self._bump_generation(name)
             print(f'{name} collection deleted.')
         else:
             raise Exception(f"{name} collection don't exist in weaviate db.")
@@ -128,6 +295,52 @@ class VectorDB:
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
+# 세팅 된 collection에 없는 프로퍼티만 추가합니다. (이전 스키마로 만든 collection 호환용)
+# 이미 있는 프로퍼티의 토큰화 방식은 weaviate에서 바꿀 수 없으므로, 다르면 migrate=True일 때 rebuild_collection으로 다시 만듭니다.
+    def ensure_properties(self, properties:list[Property], migrate: bool = False) -> list[str]:
+        """
+        Returns:
+            토큰화 방식이 스키마와 다른(마이그레이션이 필요한) 프로퍼티 이름 목록. migrate=True면 다시 만든 뒤의 결과(빈 리스트)입니다.
+        """
+        if getattr(self.collection, 'exists', None):
+            existing = {property.name: property for property in self._base_collection().config.get().properties}
+            for property in properties:
+                if property.name not in existing:
+                    self.collection.config.add_property(property)
+                    print(f'{property.name} 프로퍼티를 collection에 추가하였습니다.')
+            mismatched = [property.name for property in properties
+                          if property.name in existing and property.tokenization is not None
+                          and existing[property.name].tokenization != property.tokenization]
+            if mismatched and migrate:
+                self.rebuild_collection(properties)
+                return []
+            if mismatched:
+                print(f'{", ".join(mismatched)} 프로퍼티의 토큰화 방식이 스키마와 다릅니다. (python vdb_cli.py migrate 로 다시 만들 수 있습니다.)')
+            return mismatched
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    def rebuild_collection(self, properties:list[Property], path: str = None) -> dict:
+        """collection을 스냅샷으로 내보낸 뒤 properties 스키마로 다시 만들고, 임베딩 호출 없이 복구합니다.
+        (프로퍼티 토큰화처럼 만든 뒤에는 바꿀 수 없는 설정을 바꿀 때 사용. 벡터 인덱스 설정은 IndexConfig.from_env를 따릅니다.)"""
+        name = self.collection.name
+        multi_tenant = self.is_multi_tenant()
+        path = path or default_snapshot_path(name)
+        self.set_tenants(None)
+        meta = self.export_snapshot(path)
+        self.delete_collection(name)
+        self.create_collection(properties = properties, name = name, multi_tenancy = multi_tenant)
+        self.set_collection(name)
+        report = self.import_snapshot(path)
+        print(f'{name} collection을 새 스키마로 다시 만들었습니다. (스냅샷: {path})')
+        return {'path' : path, 'meta' : meta, 'report' : report}
+
+    def is_field_tokenized(self, property_name: str) -> bool:
+        """프로퍼티가 값 전체를 하나의 토큰으로 저장(FIELD)하는지. 아니면 equal filter가 토큰이 겹치는 다른 값도 찾습니다."""
+        if self._tokenization is None:
+            self._tokenization = {property.name: property.tokenization for property in self._base_collection().config.get().properties}
+        return self._tokenization.get(property_name) == Tokenization.FIELD
+
 # 세팅 된 collection에 존재하는 프로퍼티를 전부 출력합니다.
     def show_properties(self, name = None):
         if name:
@@ -152,17 +365,32 @@ class VectorDB:
             collection = self.collection
             if getattr(self.collection, 'exists', None):  
                 if collection.exists():
-                    vector = self.embedding_model.embed_query(object['text'])['embedding']
-                    collection.data.insert(
+                    embedding = self.embedding_model.embed_documents([object['text']])[0]
+                    if 'err_msg' in embedding:
+                        raise Exception(f"임베딩 생성에 실패하였습니다. err_msg: {embedding['err_msg']}")
+                    vector = embedding['embedding']
+                    uuid = collection.data.insert(
                         properties=object,
                         vector = vector
-                    )  
+                    )
+                    engine = self._local_engine_for_writes()
+                    if engine is not None:
+                        engine.add([object], [vector], [str(uuid)])
+                    get_file_manifest().add_objects(collection.name, self.tenant, [object])
+                    self._bump_generation(collection.name)  
             else:
                 raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
     
             
 # 특정 collection에 vector와 함께 다수의 object를 추가합니다.
-    def add_objects(self, objects:list[dict], file_name:str = None):
+# embed_batch_size개씩 묶어 embed_documents로 동시에 임베딩한 뒤 batch에 넣습니다.
+    def add_objects(self, objects:list[dict], file_name:str = None, uuids:list[str] = None) -> dict:
+        """임베딩과 batch 적재를 겹쳐서 수행하는 IngestionPipeline으로 objects를 적재합니다.
+        uuids를 주면 objects와 같은 순서로 각 object의 uuid로 사용합니다.
+
+        Returns:
+            적재 리포트 (total / inserted / failed / elapsed / chunks_per_second / final_batch_size)
+        """
         collection = self.collection
         if file_name:
             print('file_name:', file_name, '|', len(objects), '개의 청크을 적재합니다...')
@@ -170,25 +398,24 @@ class VectorDB:
             print(len(objects),'개의 청크을 적재합니다...')
         if getattr(self.collection, 'exists', None):        
             if collection.exists():
-                with collection.batch.fixed_size(batch_size=32) as batch:
-                    for object in tqdm(objects, desc = '적재중..'):
-                        # The model provider integration will automatically vectorize the object
-                        vector = self.embedding_model.embed_query(object['text'])['embedding']
-                        batch.add_object(
-                            properties=object,
-                            vector=vector  # Optionally provide a pre-obtained vector
-                        )
-                        if batch.number_errors > 10:
-                            print("Batch import stopped due to excessive errors.")
-                            break
-                        if batch.number_errors != 0:
-                            print('몇몇 chunk가 적재에 실패하였지만 그 수가 10을 넘지 않아 제외하고 적재되었습니다.')
+                engine = self._local_engine_for_writes()
+                pipeline = IngestionPipeline(collection, self.embedding_model,
+                                             on_inserted = engine.add_many if engine is not None else None)
+                report = pipeline.run(objects, uuids = uuids)
+                self._bump_generation(collection.name)
+                failed = {failure['index'] for failure in report['failed']}
+                inserted = [o for i, o in enumerate(objects) if i not in failed]
+                get_article_index(collection.name, self.tenant).add_objects(inserted)
+                get_file_manifest().add_objects(collection.name, self.tenant, inserted)
+                return report
             else:
                 print('Legal_DB collection이 weaviate VDB 내에 존재하지 않습니다.')
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
-    def delete_obejcts(self, filter: Filter = None):
+    def delete_obejcts(self, filter: Filter = None, file_name: str = None):
+        """filter에 해당하는 object를 삭제합니다. file_name 이외의 filter면 삭제된 object가 속한 file_name을 넘겨야
+        파일 목록(manifest)에 바로 반영되고, 넘기지 않으면 다음 파일 목록 조회 때 weaviate에서 다시 집계합니다."""
         if getattr(self.collection, 'exists', None):     
             if not filter:
                 raise ValueError("입력된 filter가 없습니다.")
@@ -197,21 +424,219 @@ class VectorDB:
                 # 즉시 삭제 결과를 반영해야 할 경우 아래 옵션을 사용합니다.
                 # consistency_level=wvc.ConsistencyLevel.ALL
             )
-            print(f'{filter.target} : {filter.value}에 해당하는 object를 전부 삭제하였습니다.')
+            get_article_index(self.collection.name, self.tenant).remove_where(filter)
+            manifest = get_file_manifest()
+            # Filter.all_of/any_of로 만든 복합 filter(_FilterAnd/_FilterOr)에는 target/operator/value가 없습니다.
+            target = getattr(filter, 'target', None)
+            operator = getattr(getattr(filter, 'operator', None), 'name', None)
+            value = getattr(filter, 'value', None)
+            if target == 'file_name' and operator == 'EQUAL':
+                manifest.remove_file(self.collection.name, self.tenant, value)
+            elif file_name:
+                manifest.remove_chunks(self.collection.name, self.tenant, file_name, result.successful)
+            else:
+                manifest.mark_stale(self.collection.name)
+            engine = self._local_engine_for_writes()
+            if engine is not None and not engine.remove_where(filter):
+                engine.invalidate()
+            self._bump_generation(self.collection.name)
+            if target is not None:
+                print(f'{target} : {value}에 해당하는 object를 전부 삭제하였습니다.')
+            else:
+                print(f'filter에 해당하는 object {result.successful}개를 삭제하였습니다.')
 
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
+# 특정 파일에서 적재된 object를 uuid와 함께 전부 가져옵니다. (증분 적재 diff 계산용)
+    def fetch_file_objects(self, file_name: str, return_properties: list = None, page_size: int = 1000) -> dict:
+        """
+        file_name이 정확히 같은 object만 돌려줍니다. (WORD 토큰화된 이전 collection에서는 filter가 이름의 토큰이 겹치는
+        다른 파일의 chunk도 가져오므로 결과를 다시 거릅니다. 거르지 않으면 증분 적재가 다른 파일의 chunk를 '사라진 chunk'로 지웁니다.)
+
+        Returns:
+            {uuid(str): properties} 형태의 dict
+        """
+        if getattr(self.collection, 'exists', None):
+            if return_properties is not None and 'file_name' not in return_properties:
+                return_properties = list(return_properties) + ['file_name']
+            objects = {}
+            offset = 0
+            while True:
+                result = self.collection.query.fetch_objects(
+                    filters=Filter.by_property("file_name").equal(file_name),
+                    return_properties=return_properties,
+                    limit=page_size,
+                    offset=offset,
+                )
+                for o in result.objects:
+                    if o.properties.get('file_name') == file_name:
+                        objects[str(o.uuid)] = o.properties
+                if len(result.objects) < page_size:
+                    return objects
+                offset += page_size
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    def delete_by_ids(self, ids: list[str], batch_size: int = 1000, file_name: str = None):
+        for start in range(0, len(ids), batch_size):
+            self.delete_obejcts(filter = Filter.by_id().contains_any(ids[start:start + batch_size]), file_name = file_name)
+
+# 파일 하나의 object를 전부 삭제합니다.
+    def delete_file(self, file_name: str):
+        """file_name이 FIELD 토큰화되어 있으면 filter 한 번으로, 아니면(이전 collection) 정확히 같은 파일의 uuid를 찾아 지웁니다."""
+        if self.is_field_tokenized('file_name'):
+            self.delete_obejcts(filter = Filter.by_property("file_name").equal(file_name))
+            return
+        ids = list(self.fetch_file_objects(file_name, return_properties = ['file_name']))
+        if ids:
+            self.delete_by_ids(ids, file_name = file_name)
+        get_file_manifest().remove_file(self.collection.name, self.tenant, file_name)
+
+# 임베딩은 그대로 두고 object의 프로퍼티만 수정합니다.
+    def update_properties(self, uuid: str, properties: dict):
+        if getattr(self.collection, 'exists', None):
+            self.collection.data.update(uuid = uuid, properties = properties)
+            get_article_index(self.collection.name, self.tenant).invalidate()
+            engine = self._local_engine_for_writes()
+            if engine is not None:
+                engine.update_properties(str(uuid), properties)
+            if properties.get('file_name'):
+                get_file_manifest().update_file(self.collection.name, self.tenant, properties['file_name'],
+                                                file_hash = properties.get('file_hash'), n_page = properties.get('n_page'))
+            self._bump_generation(self.collection.name)
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+# ---- 스냅샷 ----
+# collection의 object를 벡터와 함께 파일로 내보내고, 임베딩 호출 없이 그대로 다시 적재합니다. (reset 후 복구, weaviate 노드 이전)
+    def export_snapshot(self, path: str) -> dict:
+        """collection 전체(멀티테넌트면 모든 tenant)를 path 디렉토리에 스냅샷으로 저장합니다. (snapshot.py 참고)"""
+        if getattr(self.collection, 'exists', None):
+            def items():
+                for collection in self._target_collections(all_tenants = True):
+                    tenant = getattr(collection, 'tenant', None)
+                    for o in collection.iterator(include_vector = True):
+                        vector = o.vector.get('default') if isinstance(o.vector, dict) else o.vector
+                        yield str(o.uuid), tenant, o.properties, vector
+
+            meta = write_snapshot(path, items(), {'collection' : self.collection.name, 'embedding_model' : self.embedding_model.model_id})
+            print(f"{self.collection.name} collection의 object {meta['count']}개를 {path}에 저장하였습니다.")
+            return meta
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    def import_snapshot(self, path: str, batch_size: int = 256) -> dict:
+        """스냅샷의 object를 저장된 벡터/uuid 그대로 insert_many로 적재합니다. 임베딩을 호출하지 않습니다.
+        같은 uuid의 object가 이미 있으면 적재 실패로 기록되므로, 보통 비어있는 collection에 복구합니다.
+
+        Returns:
+            total / inserted / failed(uuid, error) / elapsed
+        """
+        if not getattr(self.collection, 'exists', None):
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+        meta = read_snapshot_meta(path)
+        if meta.get('embedding_model') != self.embedding_model.model_id:
+            raise ValueError(f"스냅샷의 임베딩 모델({meta.get('embedding_model')})이 현재 임베딩 모델({self.embedding_model.model_id})과 다릅니다.")
+
+        started = time.perf_counter()
+        multi_tenant = self.is_multi_tenant()
+        inserted, failed = 0, []
+        for batch in iter_snapshot(path, batch_size = batch_size):
+            groups = {}
+            for uuid, tenant, properties, vector in batch:
+                if multi_tenant:
+                    # 멀티테넌트가 아니던 collection의 스냅샷이면 저장된 tenant 키(없으면 문서군)로 tenant를 정합니다.
+                    tenant = tenant or tenant_name(properties.get('tenant') or tenant_key(file_name = properties.get('file_name')))
+                else:
+                    tenant = None
+                groups.setdefault(tenant, []).append((uuid, properties, vector))
+            for tenant, objects in groups.items():
+                target = self._base_collection().with_tenant(tenant) if tenant else self.collection
+                result = target.data.insert_many([DataObject(properties = properties, vector = vector, uuid = uuid)
+                                                  for uuid, properties, vector in objects])
+                for i, error in result.errors.items():
+                    failed.append({'uuid' : objects[i][0], 'error' : getattr(error, 'message', str(error))})
+                inserted += len(objects) - len(result.errors)
+
+        name = self.collection.name
+        invalidate_article_indexes(name)
+        get_file_manifest().mark_stale(name)
+        engine = get_local_engine(name)
+        if engine is not None:
+            engine.invalidate()
+        self._bump_generation(name)
+        elapsed = time.perf_counter() - started
+        print(f"{path}에서 {inserted}/{meta['count']}개 object를 복구하였습니다. ({elapsed:.1f}초)")
+        return {'total' : meta['count'], 'inserted' : inserted, 'failed' : failed, 'elapsed' : elapsed}
+
+# 검색 결과 캐시 (RetrievalCache). collection이 바뀌면 generation을 올려 이전 결과를 무효화합니다.
+    def _cache_get(self, method: str, query: str, topk: int, alpha, fields):
+        """(저장된 결과 또는 None, 조회한 generation). 검색이 끝나면 generation을 _cache_put에 그대로 넘깁니다."""
+        if self.retrieval_cache is None:
+            return None, None
+        return self.retrieval_cache.get(self.collection.name, self._cache_method(method), query, topk, alpha, fields)
+
+    def _cache_put(self, method: str, query: str, topk: int, alpha, fields, results: list[dict], generation: int):
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.put(self.collection.name, self._cache_method(method), query, topk, alpha, fields, results, generation)
+
+    def _cache_method(self, method: str) -> str:
+        # 검색 대상 tenant가 다르면 결과도 다르므로 캐시 키에 포함합니다.
+        return f"{method}@{','.join(sorted(self.tenants))}" if self.tenants else method
+
+    def _bump_generation(self, name: str = None):
+        generation = self.generations.bump(name)
+        if not name:
+            return
+        # 이 프로세스가 변경을 로컬 엔진/조문 인덱스에 이미 반영했으므로, bump 바로 전의 generation(generation - 1)까지 반영되어 있었다면
+        # 새 generation도 반영된 것으로 기록합니다. 그 사이 다른 워커의 변경이 있었으면 기록하지 않아 다음 조회 때 다시 만듭니다.
+        # (변경은 한 tenant에서만 일어나므로 다른 tenant의 조문 인덱스도 그대로 유효합니다.)
+        engine = get_local_engine(name)
+        if engine is not None and engine.ready and engine.generation == generation - 1:
+            engine.mark_synced(generation)
+        for index in get_article_indexes(name):
+            if index.loaded and index.generation == generation - 1:
+                index.mark_synced(generation)
+
+# 로컬 검색 엔진 (LOCAL_ENGINE_ENABLED=true). 멀티테넌트가 아닌 collection의 검색을 프로세스 안에서 처리합니다.
+# 엔진이 반영한 generation이 현재 generation과 다르면(다른 워커에서 적재/삭제) weaviate에서 다시 만듭니다.
+    def _local_engine(self):
+        engine = get_local_engine(self.collection.name)
+        if engine is None or self.is_multi_tenant():
+            return None
+        generation = self.generations.generation(self.collection.name)
+        if not engine.ready or engine.generation != generation:
+            engine.build(self._target_collections(all_tenants=True), generation)
+        return engine
+
+    def _local_engine_for_writes(self):
+        # 아직 만들어지지 않은 엔진은 다음 검색 때 통째로 만들어지므로 증분 반영하지 않습니다.
+        engine = get_local_engine(self.collection.name)
+        if engine is None or not engine.ready or self.is_multi_tenant():
+            return None
+        return engine
+
 # BM25 Search
     def query_bm25(self, query: str, topk: int = 4, fields: list = None):
         if getattr(self.collection, 'exists', None):     
             query_fields = fields if fields else ['text']
-            results = self.collection.query.bm25(
+            cached, generation = self._cache_get('bm25', query, topk, None, query_fields)
+            if cached is not None:
+                return cached
+            engine = self._local_engine() if query_fields == ['text'] else None
+            if engine is not None:
+                results = engine.query_bm25(query, topk)
+                self._cache_put('bm25', query, topk, None, query_fields, results, generation)
+                return results
+            objects = self._search(lambda collection: collection.query.bm25(
                 query=query,
                 query_properties=query_fields,
-                limit=topk
-            )
-            results = [i.properties for i in results.objects]
+                limit=topk,
+                return_metadata=MetadataQuery(score=True),
+            ), topk, sort_key=lambda o: -(o.metadata.score or 0))
+            results = [i.properties for i in objects]
+            self._cache_put('bm25', query, topk, None, query_fields, results, generation)
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
@@ -220,12 +645,22 @@ class VectorDB:
 # Dense Search
     def query_dense(self, query: str, topk: int = 4, fields: list = None):
         if getattr(self.collection, 'exists', None):
+            cached, generation = self._cache_get('dense', query, topk, None, None)
+            if cached is not None:
+                return cached
             vector = self.embedding_model.embed_query(query)['embedding']
-            results = self.collection.query.near_vector(
+            engine = self._local_engine()
+            if engine is not None:
+                results = engine.query_dense(vector, topk)
+                self._cache_put('dense', query, topk, None, None, results, generation)
+                return results
+            objects = self._search(lambda collection: collection.query.near_vector(
                 near_vector = vector,
                 limit = topk,
-                )
-            results = [i.properties for i in results.objects]
+                return_metadata=MetadataQuery(distance=True),
+                ), topk, sort_key=lambda o: o.metadata.distance)
+            results = [i.properties for i in objects]
+            self._cache_put('dense', query, topk, None, None, results, generation)
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
         return results
@@ -236,15 +671,25 @@ class VectorDB:
     def query_hybrid(self, query: str, topk: int = 4, fields: list = None, alpha:float = 0.5):
         if getattr(self.collection, 'exists', None):
             query_fields = fields if fields else ['text']
+            cached, generation = self._cache_get('hybrid', query, topk, alpha, query_fields)
+            if cached is not None:
+                return cached
             vector = self.embedding_model.embed_query(query)['embedding']
-            results = self.collection.query.hybrid(
+            engine = self._local_engine() if query_fields == ['text'] else None
+            if engine is not None:
+                results = engine.query_hybrid(query, vector, alpha, topk)
+                self._cache_put('hybrid', query, topk, alpha, query_fields, results, generation)
+                return results
+            objects = self._search(lambda collection: collection.query.hybrid(
                 query = query,
                 vector = vector,
                 alpha = alpha,
                 query_properties = query_fields,
-                limit = topk
-            )
-            results = [i.properties for i in results.objects]
+                limit = topk,
+                return_metadata=MetadataQuery(score=True),
+            ), topk, sort_key=lambda o: -(o.metadata.score or 0))
+            results = [i.properties for i in objects]
+            self._cache_put('hybrid', query, topk, alpha, query_fields, results, generation)
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
         return results
@@ -253,39 +698,117 @@ class VectorDB:
 # 참조조항을 받아 collection의 metadata중 name이 입력받은 참조 조항과 같다면 해당 object를 return합니다.
     def query_hybrid_with_filter(self, name: str, fields:list = None, alpha: float = 0.5) -> dict:
         """
-        collection의 metadata.name == name 인 object 검색
+        collection의 metadata.name == name 인 object 검색 (get_by_names의 단건 버전, fields/alpha는 호환용)
+        """
+        return self.get_by_names([name]).get(name, {})
+
+# 참조 조항 일괄 검색을 위한 query입니다.
+    def get_by_names(self, names: list[str]) -> dict:
+        """
+        name이 names 중 하나와 정확히 일치하는 object를 filter 검색으로 가져옵니다. (임베딩/벡터 검색 없음)
+        WORD 토큰화된 이전 collection에서는 토큰이 겹치는 다른 조문도 filter에 걸리므로, 결과가 끝날 때까지 페이지를 넘기며 정확히 같은 것만 모읍니다.
+
+        Returns:
+            {name: properties} 형태의 dict. 찾지 못한 name은 포함되지 않습니다.
         """
         if getattr(self.collection, 'exists', None):
-            query = 'dummy'
-            query_fields = fields if fields else ['text']
-            vector = self.embedding_model.embed_query(query)['embedding']
-            result = self.collection.query.hybrid(
-                query = query,
-                vector = vector,
-                alpha = alpha,
-                query_properties = query_fields,
-                limit = 1,
-                filters=Filter.by_property("name").equal(name),
-            )
-            if not result or not hasattr(result, "objects") or not result.objects:
+            names = list(dict.fromkeys(name for name in names if name))
+            if not names:
                 return {}
+            wanted = set(names)
 
-            # objects가 리스트일 경우 첫 번째 결과 반환
-            return result.objects[0].properties if result.objects else {}
+            def fetch(collection):
+                matched, offset = [], 0
+                while True:
+                    result = collection.query.fetch_objects(filters=name_filter(names), limit=NAME_LOOKUP_PAGE_SIZE, offset=offset)
+                    matched.extend(o for o in result.objects if o.properties.get('name') in wanted)
+                    if len(result.objects) < NAME_LOOKUP_PAGE_SIZE:
+                        return SimpleNamespace(objects=matched)
+                    offset += NAME_LOOKUP_PAGE_SIZE
+
+            objects = self._search(fetch)
+            return select_by_names([o.properties for o in objects], names)
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
 
-    def show_files_in_collection(self):
-        if getattr(self.collection, 'exists', None):     
-            response = self.collection.aggregate.over_all(group_by = "file_name")
-            unique_file_name_and_chunk = []
+# 검색된 chunk에 같은 조문의 앞뒤 chunk를 이어붙입니다. (긴 조문이 여러 chunk로 나뉜 경우, 요청한 때에만 사용)
+    def expand_neighbors(self, documents: list[dict], window: int = 1) -> list[dict]:
+        """
+        documents(검색 결과)의 chunk마다 같은 조문에서 앞뒤 window개 chunk를 filter 검색 한 번으로 가져와 합칩니다. (chunker.merge_neighbor_chunks)
+        """
+        if getattr(self.collection, 'exists', None):
+            filters = neighbor_filter(documents, window) if window > 0 else None
+            if filters is None:
+                return documents
+            objects = self._search(lambda collection: collection.query.fetch_objects(
+                filters=filters,
+                limit=len(documents) * (2 * window + 1) * NEIGHBOR_LIMIT_FACTOR,
+            ))
+            return merge_neighbor_chunks(documents, [o.properties for o in objects], window)
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+# 참조 조항을 Weaviate 조회 없이 프로세스 내 조문 인덱스에서 찾습니다.
+    def lookup_articles(self, names: list[str]) -> dict:
+        """
+        names에 해당하는 조문을 조문 인덱스(ArticleIndex)에서 찾습니다. 조문 제목(괄호)이 조금 달라도 찾습니다.
+        인덱스는 처음 호출될 때 collection 전체를 한 번 읽어 만들고, 다른 워커에서 collection이 바뀌었으면(generation) 다시 만듭니다.
+        멀티테넌트 collection이면 검색 대상 tenant(set_tenants)의 인덱스에서만 찾습니다.
+
+        Returns:
+            {name: properties} 형태의 dict. 찾지 못한 name은 포함되지 않습니다.
+        """
+        if getattr(self.collection, 'exists', None):
+            generation = self.generations.generation(self.collection.name)
+            indexes = []
+            for collection in self._target_collections():
+                index = get_article_index(self.collection.name, getattr(collection, 'tenant', None))
+                if index.is_stale(generation):
+                    index.load([collection], generation)
+                indexes.append(index)
+            return resolve_articles(indexes, names)
+        else:
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+
+    def _aggregate_files(self) -> list[dict]:
+        files = []
+        for collection in self._target_collections(all_tenants = True):
+            response = collection.aggregate.over_all(group_by = "file_name")
             for g in response.groups:
                 file_name = g.grouped_by.value
-                chunk_count = g.total_count
-                unique_file_name_and_chunk.append({'file_name' : file_name, 'chunk_count' : chunk_count})
+                sample = collection.query.fetch_objects(filters = Filter.by_property("file_name").equal(file_name), limit = 20,
+                                                        return_properties = ['file_name', 'file_hash', 'n_page']).objects
+                properties = next((o.properties for o in sample if o.properties.get('file_name') == file_name), {})
+                files.append({'tenant' : getattr(collection, 'tenant', None), 'file_name' : file_name, 'chunk_count' : g.total_count,
+                              'file_hash' : properties.get('file_hash'), 'n_page' : properties.get('n_page')})
+        return files
+
+    def reconcile_file_manifest(self) -> bool:
+        """manifest의 chunk 수 합계가 weaviate의 object 수와 다르면 weaviate에서 다시 집계하여 manifest를 바꿉니다.
 
-            return unique_file_name_and_chunk
+        Returns:
+            manifest를 다시 만들었으면 True
+        """
+        if not getattr(self.collection, 'exists', None):
+            raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
+        manifest = get_file_manifest()
+        total = sum(collection.aggregate.over_all(total_count = True).total_count
+                    for collection in self._target_collections(all_tenants = True))
+        if manifest.is_synced(self.collection.name) and manifest.total_chunks(self.collection.name) == total:
+            return False
+        print(f'{self.collection.name} 파일 목록(manifest)이 weaviate와 달라 다시 집계합니다. (weaviate {total}개 object)')
+        manifest.replace(self.collection.name, self._aggregate_files())
+        return True
+
+# 파일 목록(file_name, chunk_count, file_hash, n_page, ingested_at)은 적재/삭제 때 갱신되는 manifest에서 읽습니다.
+# manifest가 아직 없거나 어긋났으면(synced=0) weaviate에서 한 번 집계하여 다시 만듭니다.
+    def show_files_in_collection(self):
+        if getattr(self.collection, 'exists', None):     
+            manifest = get_file_manifest()
+            if not manifest.is_synced(self.collection.name):
+                manifest.replace(self.collection.name, self._aggregate_files())
+            return manifest.files(self.collection.name, self.tenants if self.is_multi_tenant() else None)
         else:
             raise ValueError("Collection이 지정되지 않았습니다. set_collection()으로 먼저 설정하세요.")
 
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+from .sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    collection TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# reset처럼 모든 collection을 무효화할 때 올리는 generation 키
+ALL_COLLECTIONS = '*'
+
+
+class CollectionGenerations:
+    """collection별 변경 횟수(generation). 적재/삭제가 일어날 때마다 VectorDB가 bump()로 올립니다.
+
+    SQLite 파일에 저장되어 여러 uvicorn 워커가 공유하므로, 프로세스 안의 파생 데이터(검색 결과 캐시, 로컬 검색 엔진, 조문 인덱스)가
+    만들 때의 generation을 기록해 두고 값이 바뀌었으면(다른 워커에서 적재/삭제) 다시 만들 수 있습니다.
+    검색 결과 캐시를 꺼도(RETRIEVAL_CACHE_ENABLED=false) 로컬 엔진과 조문 인덱스는 generation을 써야 하므로 캐시와 따로 둡니다.
+    """
+
+    def __init__(self, path: str = None):
+        # 이전에는 검색 결과 캐시 파일에 있었으므로 같은 파일을 기본값으로 사용합니다.
+        self.path = path or os.getenv("COLLECTION_GENERATION_PATH", os.getenv("RETRIEVAL_CACHE_PATH", "./cache/retrieval.sqlite3"))
+        self.store = SQLiteStore(self.path, _SCHEMA)
+
+    @staticmethod
+    def _current(conn, collection: str) -> int:
+        return conn.execute(
+            "SELECT COALESCE(SUM(generation), 0) FROM generations WHERE collection IN (?, ?)", (collection, ALL_COLLECTIONS)
+        ).fetchone()[0]
+
+    def generation(self, collection: str) -> int:
+        """collection 자체의 generation과 전체(reset) generation의 합."""
+        return self._current(self.store.connection(), collection)
+
+    def bump(self, collection: str = None) -> int:
+        """collection의 generation을 올리고 올린 뒤의 generation을 돌려줍니다. collection이 없으면(reset) 모든 collection을 무효화합니다.
+
+        올리기와 읽기가 한 트랜잭션이므로, 반환값 - 1이 이 bump 바로 전의 generation입니다. (그 사이에 다른 워커의 bump가 끼어들 수 없음)
+        """
+        conn = self.store.connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO generations (collection, generation, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(collection) DO UPDATE SET generation = generation + 1, updated_at = excluded.updated_at",
+                (collection or ALL_COLLECTIONS, time.time()),
+            )
+            return self._current(conn, collection or ALL_COLLECTIONS)
+
+
+_collection_generations: CollectionGenerations = None
+_collection_generations_lock = threading.Lock()
+
+
+def get_collection_generations() -> CollectionGenerations:
+    """프로세스 전역 generation 저장소를 반환합니다. (검색 결과 캐시 설정과 관계없이 항상 사용)"""
+    global _collection_generations
+    if _collection_generations is None:
+        with _collection_generations_lock:
+            if _collection_generations is None:
+                _collection_generations = CollectionGenerations()
+    return _collection_generations
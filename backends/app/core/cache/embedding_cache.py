@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Optional
+
+from .sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model_id TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키 계산용으로 유니코드(NFC)와 공백을 정규화합니다."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class EmbeddingCache:
+    """텍스트 해시 기반 임베딩 캐시.
+
+    키는 sha256(model_id + 정규화된 텍스트)이며, 메모리 LRU를 먼저 보고 없으면 SQLite 디스크 캐시를 봅니다.
+    디스크 캐시는 WAL 모드 SQLite 파일이라 여러 uvicorn 워커가 같은 파일을 공유할 수 있습니다.
+    벡터는 float32 바이트로 저장합니다.
+
+    Attributes:
+        memory_hits / disk_hits / misses: 조회 결과별 누적 횟수 (stats()로 hit rate 확인)
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings.sqlite3")
+        self.max_memory_items = max_memory_items or int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 10000))
+        self.store = SQLiteStore(self.path, _SCHEMA)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, model_id: str) -> str:
+        return hashlib.sha256(f"{model_id}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: array):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def get_many(self, texts: list[str], model_id: str) -> list[Optional[list[float]]]:
+        """texts와 같은 순서로 캐시된 임베딩을 반환합니다. 캐시에 없으면 None."""
+        keys = [self.make_key(text, model_id) for text in texts]
+        results = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector.tolist()
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing:
+            placeholders = ",".join("?" * len(missing))
+            rows = self.store.connection().execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", list(missing)
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                self._remember(key, vector)
+                for i in missing.pop(key):
+                    results[i] = vector.tolist()
+                    self.disk_hits += 1
+            self.misses += sum(len(indexes) for indexes in missing.values())
+        return results
+
+    def get(self, text: str, model_id: str) -> Optional[list[float]]:
+        return self.get_many([text], model_id)[0]
+
+    def put_many(self, texts: list[str], embeddings: list[list[float]], model_id: str):
+        rows = []
+        now = time.time()
+        for text, embedding in zip(texts, embeddings):
+            if not embedding:
+                continue
+            key = self.make_key(text, model_id)
+            vector = array("f", embedding)
+            self._remember(key, vector)
+            rows.append((key, model_id, len(vector), vector.tobytes(), now))
+        if rows:
+            conn = self.store.connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model_id, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    def put(self, text: str, embedding: list[float], model_id: str):
+        self.put_many([text], [embedding], model_id)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        disk_items = self.store.connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "max_memory_items": self.max_memory_items,
+            "disk_items": disk_items,
+            "path": self.path,
+        }
+
+
+_embedding_cache: EmbeddingCache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """프로세스 전역 임베딩 캐시를 반환합니다. EMBEDDING_CACHE_ENABLED=false 이면 None."""
+    global _embedding_cache
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
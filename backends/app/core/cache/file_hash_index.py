@@ -0,0 +1,76 @@
+import os
+import threading
+
+from .sqlite_store import SQLiteStore
+from ..VDB.schema import file_hash
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    directory TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    file_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (directory, file_name)
+);
+CREATE INDEX IF NOT EXISTS files_hash ON files (directory, file_hash);
+"""
+
+
+class FileHashIndex:
+    """디렉토리(./pdfs) 안 파일들의 내용 해시(sha256) 목록. 같은 내용의 파일이 이름만 바꿔 다시 올라오는지 확인할 때 사용합니다.
+
+    파일 크기와 수정 시각이 기록과 같으면 해시를 다시 계산하지 않으므로, 업로드 API 밖에서 파일을 넣거나 지워도
+    sync()가 바뀐 파일만 다시 읽어 목록을 맞춥니다.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("FILE_HASH_INDEX_PATH", "./cache/file_hashes.sqlite3")
+        self.store = SQLiteStore(self.path, _SCHEMA)
+
+    def sync(self, directory: str, suffix: str = '.pdf'):
+        """directory의 현재 파일들과 기록을 맞춥니다. (새로 생기거나 바뀐 파일만 해시 계산)"""
+        directory = os.path.abspath(directory)
+        conn = self.store.connection()
+        known = {file_name: (size, mtime) for file_name, size, mtime in
+                 conn.execute("SELECT file_name, size, mtime FROM files WHERE directory = ?", (directory,))}
+        current = {}
+        for entry in os.scandir(directory) if os.path.isdir(directory) else []:
+            if entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                current[entry.name] = (stat.st_size, stat.st_mtime)
+        changed = [file_name for file_name, info in current.items() if known.get(file_name) != info]
+        hashes = {file_name: file_hash(os.path.join(directory, file_name)) for file_name in changed}
+        with conn:
+            conn.executemany("DELETE FROM files WHERE directory = ? AND file_name = ?",
+                             [(directory, file_name) for file_name in known if file_name not in current])
+            conn.executemany("INSERT OR REPLACE INTO files (directory, file_name, file_hash, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                             [(directory, file_name, hashes[file_name], *current[file_name]) for file_name in changed])
+
+    def find(self, directory: str, content_hash: str):
+        """같은 내용(해시)의 파일 이름. 없으면 None."""
+        row = self.store.connection().execute("SELECT file_name FROM files WHERE directory = ? AND file_hash = ? ORDER BY file_name LIMIT 1",
+                                              (os.path.abspath(directory), content_hash)).fetchone()
+        return row[0] if row else None
+
+    def add(self, directory: str, file_name: str, content_hash: str):
+        """새로 저장한 파일을 해시를 다시 계산하지 않고 기록합니다."""
+        directory = os.path.abspath(directory)
+        stat = os.stat(os.path.join(directory, file_name))
+        conn = self.store.connection()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO files (directory, file_name, file_hash, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                         (directory, file_name, content_hash, stat.st_size, stat.st_mtime))
+
+
+_file_hash_index: FileHashIndex = None
+_file_hash_index_lock = threading.Lock()
+
+
+def get_file_hash_index() -> FileHashIndex:
+    global _file_hash_index
+    if _file_hash_index is None:
+        with _file_hash_index_lock:
+            if _file_hash_index is None:
+                _file_hash_index = FileHashIndex()
+    return _file_hash_index
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+from .sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model_id TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+"""
+
+
+class LLMResponseCache:
+    """LLM 응답 캐시. 입력이 같으면 답도 같은 하위 작업(목차에서 재무제표 인덱스 찾기, 재무제표 지표 추출 등)에만 사용합니다.
+
+    키는 sha256(model_id, temperature, system prompt, user input)이며 텍스트를 정규화하지 않습니다. (정확히 같은 입력만 hit)
+    캐시는 호출마다 opt-in 합니다. BaseLLM.call/acall에 cache_ttl(초)을 넘긴 호출만 조회/저장하며, 만료 시각은 저장할 때 정합니다.
+    WAL 모드 SQLite 파일이라 여러 uvicorn 워커와 백그라운드 작업이 같은 캐시를 공유합니다.
+
+    Attributes:
+        hits / misses: 조회 결과별 누적 횟수 (stats()로 hit ratio 확인)
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", "./cache/llm_responses.sqlite3")
+        self.store = SQLiteStore(self.path, _SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_id: str, system_prompt: str, user_input: str, temperature: float) -> str:
+        return hashlib.sha256(f"{model_id}\x00{temperature}\x00{system_prompt}\x00{user_input}".encode("utf-8")).hexdigest()
+
+    def get(self, model_id: str, system_prompt: str, user_input: str, temperature: float) -> Optional[str]:
+        """저장된 응답. 없거나 만료되었으면 None."""
+        row = self.store.connection().execute(
+            "SELECT response FROM responses WHERE key = ? AND expires_at > ?",
+            (self.make_key(model_id, system_prompt, user_input, temperature), time.time()),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, model_id: str, system_prompt: str, user_input: str, temperature: float, response: str, ttl: float):
+        now = time.time()
+        conn = self.store.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model_id, response, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(model_id, system_prompt, user_input, temperature), model_id, response, now, now + ttl),
+            )
+
+    def purge_expired(self) -> int:
+        """만료된 응답을 지우고 지운 개수를 반환합니다."""
+        conn = self.store.connection()
+        with conn:
+            return conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        items, expired = self.store.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(expires_at <= ?), 0) FROM responses", (time.time(),)
+        ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "items": items,
+            "expired_items": expired,
+            "path": self.path,
+        }
+
+
+_llm_response_cache: LLMResponseCache = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """프로세스 전역 LLM 응답 캐시를 반환합니다. LLM_CACHE_ENABLED=false 이면 None."""
+    global _llm_response_cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    if _llm_response_cache is None:
+        with _llm_response_cache_lock:
+            if _llm_response_cache is None:
+                _llm_response_cache = LLMResponseCache()
+    return _llm_response_cache
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .collection_generation import CollectionGenerations, get_collection_generations
+from .embedding_cache import normalize_text
+
+
+class RetrievalCache:
+    """검색 결과 캐시.
+
+    키는 (collection, 검색 방식, 정규화된 query, topk, alpha, fields, collection generation)이며 메모리 LRU에 보관합니다.
+    collection에 적재/삭제가 일어나면 VectorDB가 bump()로 generation을 올리므로, 이전 generation으로 저장된 결과는
+    다시 조회되지 않고 LRU에서 자연히 밀려납니다.
+    generation(CollectionGenerations)은 SQLite 파일에 저장되어 여러 uvicorn 워커가 공유하므로, 다른 워커에서 문서를 적재해도 캐시가 오래된 결과를 주지 않습니다.
+    get이 돌려준 generation을 같은 검색의 put에 넘겨야 합니다. 검색 도중에 bump()가 일어나면 결과는 이전 generation으로 저장되어
+    다시 조회되지 않습니다. (put에서 generation을 다시 읽으면 적재 전 데이터로 만든 결과가 새 generation으로 저장됩니다.)
+
+    Attributes:
+        hits / misses: 조회 결과별 누적 횟수 (stats()로 hit ratio 확인)
+    """
+
+    def __init__(self, path: str = None, max_items: int = None, generations: CollectionGenerations = None):
+        self.path = path or os.getenv("RETRIEVAL_CACHE_PATH", "./cache/retrieval.sqlite3")
+        self.max_items = max_items or int(os.getenv("RETRIEVAL_CACHE_MAX_ITEMS", 1024))
+        self.generations = generations or (CollectionGenerations(path) if path else get_collection_generations())
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self, collection: str) -> int:
+        return self.generations.generation(collection)
+
+    def bump(self, collection: str = None) -> int:
+        return self.generations.bump(collection)
+
+    @staticmethod
+    def _key(collection: str, method: str, query: str, topk: int, alpha: float, fields: list, generation: int) -> tuple:
+        return (collection, method, normalize_text(query), topk, alpha, tuple(fields or ()), generation)
+
+    def get(self, collection: str, method: str, query: str, topk: int, alpha: float = None, fields: list = None) -> tuple[Optional[list[dict]], int]:
+        """(저장된 결과 또는 None, 조회한 generation). generation은 검색 후 put에 그대로 넘깁니다."""
+        generation = self.generation(collection)
+        key = self._key(collection, method, query, topk, alpha, fields, generation)
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None, generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # 호출한 쪽에서 결과 dict를 수정해도 캐시가 바뀌지 않도록 복사해서 돌려줍니다.
+        return [dict(properties) for properties in results], generation
+
+    def put(self, collection: str, method: str, query: str, topk: int, alpha: float, fields: list, results: list[dict], generation: int):
+        key = self._key(collection, method, query, topk, alpha, fields, generation)
+        with self._lock:
+            self._entries[key] = [dict(properties) for properties in results]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "items": len(self._entries),
+            "max_items": self.max_items,
+            "path": self.path,
+        }
+
+
+_retrieval_cache: RetrievalCache = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> Optional[RetrievalCache]:
+    """프로세스 전역 검색 결과 캐시를 반환합니다. RETRIEVAL_CACHE_ENABLED=false 이면 None."""
+    global _retrieval_cache
+    if os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() in ("false", "0", "no"):
+        return None
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = RetrievalCache()
+    return _retrieval_cache
@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """로컬 캐시/메타데이터용 SQLite 파일의 공통 접속 헬퍼.
+
+    스레드마다 별도 커넥션을 열고 WAL 모드를 사용하므로, 같은 파일을 여러 uvicorn 워커(프로세스)와
+    스레드가 동시에 읽고 쓸 수 있습니다. schema에는 처음 접속할 때 실행할 CREATE 문을 넘깁니다.
+    """
+
+    def __init__(self, path: str, schema: str = ""):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if schema:
+            conn = self.connection()
+            conn.executescript(schema)
+            conn.commit()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -5,16 +5,23 @@ import requests
 from bs4 import BeautifulSoup, Tag
 import io
 import pandas as pd
-from ..llm.llm import Midm, Gemini, OpenRouterLLM
+from ..llm.llm import get_llm
 from bs4 import BeautifulSoup
 
 
 load_dotenv()
 
+# infer_statement_idx 응답 캐시 기간 (초). 공시된 보고서의 목차는 바뀌지 않습니다.
+STATEMENT_IDX_CACHE_TTL = int(os.getenv('STATEMENT_IDX_CACHE_TTL', 30 * 24 * 3600))
+
+def is_statement_idx(response: str) -> bool:
+    """infer_statement_idx 응답이 정수(찾지 못하면 -1)인지. 정수가 아닌 응답은 캐시에 저장하지 않습니다."""
+    return response.strip().lstrip('-').isdigit()
+
 class financial_statements_extractor:
     def __init__(self):
         self.dart = OpenDartReader(api_key = os.getenv('OPENDART_API_KEY'))
-        self.llm = OpenRouterLLM()
+        self.llm = get_llm()
 
     def url2html(self, url: str) -> str:
         """
@@ -178,7 +185,8 @@ class financial_statements_extractor:
         3. 인덱스를 찾을 수 없을 경우, '-1'만 출력하세요."""
          
         idxs =  str({i : value for i, value in enumerate(self.dart.sub_docs(rcept_no)['title'].values.tolist())})
-        idx = self.llm.call(system_prompt=system_prompt, user_input=idxs)
+        idx = self.llm.call(system_prompt=system_prompt, user_input=idxs, temperature=0,
+                            cache_ttl=STATEMENT_IDX_CACHE_TTL, cache_validate=is_statement_idx)
         
         self.reports = self.dart.sub_docs(rcept_no)
         self.idx = idx
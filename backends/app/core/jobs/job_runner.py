@@ -0,0 +1,116 @@
+import asyncio
+import inspect
+import os
+
+from .job_store import JobStore, get_job_store
+
+# kind -> handler(params, progress). progress(dict)를 호출하면 진행 상황이 저장됩니다.
+# 동기 함수는 스레드에서, async 함수는 이벤트 루프에서 실행합니다.
+_handlers = {}
+
+
+def register_job_handler(kind: str, handler):
+    _handlers[kind] = handler
+
+
+class JobRunner:
+    """JobStore의 대기열을 처리하는 worker task들. (main.py lifespan에서 start/stop)
+
+    worker마다 JOB_POLL_INTERVAL초 간격으로 대기열을 확인하고, submit()으로 넣은 작업은 바로 깨워서 실행합니다.
+    실행 중에는 JOB_HEARTBEAT_SECONDS마다 heartbeat를 남겨 다른 프로세스가 같은 작업을 다시 가져가지 않게 합니다.
+    handler가 {'success': False, 'err_msg': ...}를 돌려주면 결과는 저장하되 작업은 failed로 끝냅니다.
+    """
+
+    def __init__(self, store: JobStore = None, workers: int = None, poll_interval: float = None):
+        self.store = store or get_job_store()
+        self.workers = workers or int(os.getenv('JOB_WORKERS', 2))
+        self.poll_interval = poll_interval or float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+        self.heartbeat_seconds = float(os.getenv('JOB_HEARTBEAT_SECONDS', 10))
+        self._tasks = []
+        self._wakeup = None
+        self._stopping = False
+
+    def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        # 대기 중인 worker는 깨워서 종료하고, 실행 중인 작업은 취소합니다. (취소된 작업은 heartbeat가 끊긴 뒤 다시 실행됩니다.)
+        self._stopping = True
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions = True)
+        self._tasks = []
+
+    def submit(self, kind: str, params: dict, dedup_key: str = None) -> tuple[dict, bool]:
+        """작업을 대기열에 넣고 worker를 깨웁니다. 같은 작업이 있으면 새로 만들지 않습니다. (JobStore.submit)"""
+        job, created = self.store.submit(kind, params, dedup_key = dedup_key)
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return job, created
+
+    async def _worker(self, index: int):
+        while not self._stopping:
+            job = await asyncio.to_thread(self.store.claim, list(_handlers))
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout = self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job_id: str, attempt: int):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            await asyncio.to_thread(self.store.heartbeat, job_id, attempt)
+
+    async def _finish(self, job: dict, result, error: str = None) -> bool:
+        finished = await asyncio.to_thread(self.store.finish, job['id'], result, error, job['attempts'])
+        if not finished:
+            print(f"job {job['id']} ({job['kind']}) 시도 {job['attempts']}회의 결과를 버립니다. (다른 worker가 다시 가져간 작업)")
+        return finished
+
+    async def _run(self, job: dict):
+        job_id, kind = job['id'], job['kind']
+        print(f'job {job_id} ({kind}) 시작 (시도 {job["attempts"]}회)')
+        progress = lambda value: self.store.update_progress(job_id, value)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, job['attempts']))
+        try:
+            handler = _handlers[kind]
+            if inspect.iscoroutinefunction(handler):
+                result = await handler(job['params'], progress)
+            else:
+                result = await asyncio.to_thread(handler, job['params'], progress)
+            error = None
+            if isinstance(result, dict) and result.get('success') is False:
+                error = str(result.get('err_msg') or '작업이 실패하였습니다.')
+            if await self._finish(job, result, error):
+                print(f'job {job_id} ({kind}) 완료' if error is None else f'job {job_id} ({kind}) 실패: {error}')
+        except Exception as e:
+            print(f'job {job_id} ({kind}) 실패:', str(e))
+            await self._finish(job, None, f'{type(e).__name__}: {e}')
+        finally:
+            heartbeat.cancel()
+
+
+_job_runner: JobRunner = None
+
+
+def set_job_runner(runner: JobRunner):
+    global _job_runner
+    _job_runner = runner
+
+
+def get_job_runner() -> JobRunner:
+    return _job_runner
+
+
+def submit_job(kind: str, params: dict, dedup_key: str = None) -> tuple[dict, bool]:
+    """떠 있는 JobRunner가 있으면 그 runner로, 없으면(스크립트 등) 저장소에만 넣어 서버의 worker가 가져가도록 합니다."""
+    if _job_runner is not None:
+        return _job_runner.submit(kind, params, dedup_key = dedup_key)
+    return get_job_store().submit(kind, params, dedup_key = dedup_key)
@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+from ..cache.sqlite_store import SQLiteStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dedup_key TEXT,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (kind, dedup_key);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+# queued → running → succeeded / failed
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+
+class JobStore:
+    """오래 걸리는 작업(문서 적재, 보고서 생성)의 대기열과 진행 상황/결과를 SQLite 파일로 관리합니다.
+
+    - submit: 같은 kind와 dedup_key로 대기/실행 중이거나 JOB_RESULT_TTL_SECONDS 안에 성공한 작업이 있으면 새로 만들지 않고 그 작업을 돌려줍니다.
+    - claim: 대기 중인 작업(또는 heartbeat가 끊긴 실행 중 작업)을 하나 가져와 running으로 바꿉니다.
+      UPDATE ... RETURNING 한 문장으로 처리하므로 여러 uvicorn 워커(프로세스)가 같은 작업을 두 번 가져가지 않습니다.
+    - 서버가 작업 도중 종료되면 heartbeat가 JOB_STALE_SECONDS 넘게 끊긴 뒤 다른 워커가 다시 실행합니다. (최대 JOB_MAX_ATTEMPTS번)
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("JOB_STORE_PATH", "./cache/jobs.sqlite3")
+        self.result_ttl = float(os.getenv("JOB_RESULT_TTL_SECONDS", 24 * 60 * 60))
+        self.stale_seconds = float(os.getenv("JOB_STALE_SECONDS", 60))
+        self.max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+        self.store = SQLiteStore(self.path, _SCHEMA)
+
+    def _row(self, row) -> dict:
+        if row is None:
+            return None
+        (job_id, kind, dedup_key, params, status, progress, result, error, attempts,
+         created_at, started_at, finished_at, heartbeat_at) = row
+        return {
+            'id': job_id, 'kind': kind, 'dedup_key': dedup_key, 'params': json.loads(params), 'status': status,
+            'progress': json.loads(progress), 'result': json.loads(result) if result is not None else None, 'error': error,
+            'attempts': attempts, 'created_at': created_at, 'started_at': started_at, 'finished_at': finished_at, 'heartbeat_at': heartbeat_at,
+        }
+
+    def submit(self, kind: str, params: dict, dedup_key: str = None) -> tuple[dict, bool]:
+        """작업을 대기열에 넣습니다.
+
+        Returns:
+            (작업, 새로 만들었는지 여부). 같은 작업이 이미 있으면 그 작업과 False
+        """
+        conn = self.store.connection()
+        with conn:
+            # 같은 작업이 동시에 두 번 들어오지 않도록 조회부터 쓰기 잠금을 잡습니다.
+            conn.execute("BEGIN IMMEDIATE")
+            if dedup_key is not None:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND dedup_key = ? "
+                    "AND (status IN ('queued', 'running') OR (status = 'succeeded' AND finished_at >= ?)) "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (kind, dedup_key, time.time() - self.result_ttl),
+                ).fetchone()
+                if row is not None:
+                    return self._row(row), False
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, dedup_key, params, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, dedup_key, json.dumps(params, ensure_ascii=False), time.time()),
+            )
+        return self.get(job_id), True
+
+    def find_result(self, kind: str, dedup_key: str) -> dict:
+        """같은 kind와 dedup_key로 JOB_RESULT_TTL_SECONDS 안에 성공한 가장 최근 작업. 없으면 None."""
+        row = self.store.connection().execute(
+            "SELECT * FROM jobs WHERE kind = ? AND dedup_key = ? AND status = 'succeeded' AND finished_at >= ? ORDER BY finished_at DESC LIMIT 1",
+            (kind, dedup_key, time.time() - self.result_ttl),
+        ).fetchone()
+        return self._row(row)
+
+    def get(self, job_id: str) -> dict:
+        return self._row(self.store.connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list_jobs(self, kind: str = None, status: str = None, limit: int = 50) -> list[dict]:
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        rows = self.store.connection().execute(query + " ORDER BY created_at DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._row(row) for row in rows]
+
+    def claim(self, kinds: list[str]) -> dict:
+        """kinds 중 가장 먼저 들어온 대기 작업을 running으로 바꿔 가져옵니다. 없으면 None."""
+        if not kinds:
+            return None
+        now = time.time()
+        conn = self.store.connection()
+        with conn:
+            # 실행 횟수를 다 쓴 채로 heartbeat가 끊긴 작업은 실패로 정리합니다.
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = '작업이 여러 번 중단되어 더 이상 재시도하지 않습니다.', finished_at = ? "
+                "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                (now, now - self.stale_seconds, self.max_attempts),
+            )
+            row = conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, heartbeat_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE kind IN ({}) "
+                "AND (status = 'queued' OR (status = 'running' AND heartbeat_at < ?)) "
+                "ORDER BY created_at LIMIT 1) RETURNING *".format(','.join('?' * len(kinds))),
+                (now, now, *kinds, now - self.stale_seconds),
+            ).fetchone()
+        return self._row(row)
+
+    def heartbeat(self, job_id: str, attempt: int = None):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND (? IS NULL OR attempts = ?)",
+                         (time.time(), job_id, attempt, attempt))
+
+    def update_progress(self, job_id: str, progress: dict):
+        conn = self.store.connection()
+        with conn:
+            conn.execute("UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ?",
+                         (json.dumps(progress, ensure_ascii=False, default=str), time.time(), job_id))
+
+    def finish(self, job_id: str, result=None, error: str = None, attempt: int = None) -> bool:
+        """결과를 저장하고 작업을 끝냅니다. error가 있으면 failed, 없으면 succeeded 입니다.
+
+        attempt(claim으로 가져왔을 때의 attempts)를 넘기면 그 시도가 아직 작업을 가지고 있을 때만 저장합니다.
+        heartbeat가 끊겨 다른 worker가 다시 가져간 작업을 늦게 끝난 이전 시도가 덮어쓰지 않도록 합니다.
+
+        Returns:
+            저장했으면 True
+        """
+        conn = self.store.connection()
+        with conn:
+            return conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND (? IS NULL OR (attempts = ? AND status = 'running'))",
+                ('failed' if error else 'succeeded', json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 error, time.time(), job_id, attempt, attempt),
+            ).rowcount > 0
+
+    def expire(self, kinds: list[str]):
+        """kinds의 끝난 작업 결과를 더 이상 재사용하지 않도록 dedup_key를 지웁니다. (VectorDB를 리셋/삭제한 뒤 같은 적재를 다시 실행하도록)"""
+        conn = self.store.connection()
+        with conn:
+            conn.execute(
+                "UPDATE jobs SET dedup_key = NULL WHERE status IN ('succeeded', 'failed') AND kind IN ({})".format(','.join('?' * len(kinds))),
+                list(kinds),
+            )
+
+
+_job_store: JobStore = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """프로세스 전역 작업 저장소를 반환합니다."""
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = JobStore()
+    return _job_store
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+
+class LLMClientRegistry:
+    """프로세스 전역 LLM client/인스턴스 저장소.
+
+    - OpenAI / AsyncOpenAI client는 (provider, base_url, api_key)마다 하나씩 만들어 모든 요청이 같은 httpx 커넥션 풀(keep-alive)을 씁니다.
+      풀 크기는 LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE_CONNECTIONS / LLM_KEEPALIVE_EXPIRY 로 조절합니다.
+    - AsyncOpenAI는 만들어진 이벤트 루프에 묶이므로 이벤트 루프마다 따로 만듭니다.
+    - LLM 래퍼(BaseLLM) 인스턴스는 (provider, model)마다 하나씩 공유합니다. (get_llm)
+    """
+
+    def __init__(self):
+        self.max_connections = int(os.getenv('LLM_MAX_CONNECTIONS', 64))
+        self.max_keepalive_connections = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', 32))
+        self.keepalive_expiry = float(os.getenv('LLM_KEEPALIVE_EXPIRY', 60))
+        self.timeout = float(os.getenv('LLM_TIMEOUT', 300))
+        self._sync_clients = {}
+        self._async_clients = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def _http_options(self) -> dict:
+        return {
+            'limits': httpx.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.max_keepalive_connections,
+                                   keepalive_expiry=self.keepalive_expiry),
+            'timeout': httpx.Timeout(self.timeout, connect=10.0),
+        }
+
+    def sync_client(self, provider: str, base_url: str, api_key: str) -> OpenAI:
+        key = (provider, base_url, api_key)
+        client = self._sync_clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._sync_clients.get(key)
+                if client is None:
+                    client = OpenAI(api_key=api_key, base_url=base_url, http_client=httpx.Client(**self._http_options()))
+                    self._sync_clients[key] = client
+        return client
+
+    def async_client(self, provider: str, base_url: str, api_key: str) -> AsyncOpenAI:
+        key = (provider, base_url, api_key)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(key, weakref.WeakKeyDictionary())
+            client = clients.get(loop)
+            if client is None:
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=httpx.AsyncClient(**self._http_options()))
+                clients[loop] = client
+        return client
+
+    def instance(self, cls, model: str = None):
+        """cls(BaseLLM 하위 클래스)의 (provider, model)별 공유 인스턴스."""
+        key = (cls.provider, model or cls.default_model())
+        llm = self._instances.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._instances.get(key)
+                if llm is None:
+                    llm = cls(model=key[1])
+                    self._instances[key] = llm
+        return llm
+
+    def stats(self) -> dict:
+        return {
+            'sync_clients': len(self._sync_clients),
+            'async_clients': sum(len(clients) for clients in self._async_clients.values()),
+            'instances': sorted(f'{provider}:{model}' for provider, model in self._instances),
+        }
+
+    async def aclose_loop(self):
+        """현재 이벤트 루프의 async client만 닫습니다. (worker 스레드에서 만든 이벤트 루프를 끝낼 때)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            async_clients = [clients.pop(loop) for clients in self._async_clients.values() if loop in clients]
+        for client in async_clients:
+            await client.close()
+
+    async def aclose(self):
+        """현재 이벤트 루프의 async client와 sync client를 닫습니다. (서버 종료 시)"""
+        await self.aclose_loop()
+        with self._lock:
+            sync_clients = list(self._sync_clients.values())
+            self._sync_clients = {}
+            self._instances = {}
+        for client in sync_clients:
+            client.close()
+
+
+_registry: LLMClientRegistry = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMClientRegistry()
+    return _registry
@@ -5,291 +5,135 @@ from pydantic import BaseModel
 from typing import Type, TypeVar, Optional
 import json
 
-load_dotenv()
-
-class Midm:
-    def __init__(self):# 클라이언트 초기화
-        self.sync_client = OpenAI(
-            api_key=os.environ.get("RUNPOD_API_KEY"),
-            base_url=os.environ.get("RUNPOD_BASE_URL"),
-        )
-        self.async_client = AsyncOpenAI(
-            api_key=os.environ.get("RUNPOD_API_KEY"),
-            base_url=os.environ.get("RUNPOD_BASE_URL"),
-        )
-
-    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘."):
-        try:
-            response = self.sync_client.chat.completions.create(
-                model="K-intelligence/Midm-2.0-Base-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-    async def acall(self, system_prompt:str, user_input:str):
-        try:
-            response = await self.async_client.chat.completions.create(
-                model="K-intelligence/Midm-2.0-Base-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-                timeout=300.0
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-
-class SK:
-    def __init__(self):# 클라이언트 초기화
-        self.sync_client = OpenAI(
-            api_key=os.environ.get("SK_API_KEY"),
-            base_url=os.environ.get("SK_BASE_URL"),
-        )
-        self.async_client = AsyncOpenAI(
-            api_key=os.environ.get("SK_API_KEY"),
-            base_url=os.environ.get("SK_BASE_URL"),
-        )
-
-    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘."):
-        try:
-            response = self.sync_client.chat.completions.create(
-                model="skt/A.X-4.0-Light",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-    async def acall(self, system_prompt:str, user_input:str):
-        try:
-            response = await self.async_client.chat.completions.create(
-                model="skt/A.X-4.0-Light",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-                timeout=300.0
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-
-class LG:
-    def __init__(self):# 클라이언트 초기화
-        self.sync_client = OpenAI(
-            api_key=os.environ.get("LG_API_KEY"),
-            base_url=os.environ.get("LG_BASE_URL"),
-        )
-        self.async_client = AsyncOpenAI(
-            api_key=os.environ.get("LG_API_KEY"),
-            base_url=os.environ.get("LG_BASE_URL"),
-        )
-
-    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘."):
-        try:
-            response = self.sync_client.chat.completions.create(
-                model="LGAI-EXAONE/EXAONE-3.5-7.8B-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-    async def acall(self, system_prompt:str, user_input:str):
-        try:
-            response = await self.async_client.chat.completions.create(
-                model="LGAI-EXAONE/EXAONE-3.5-7.8B-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-                timeout=300.0
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
+from .client_registry import get_llm_registry
+from ..cache.llm_response_cache import get_llm_response_cache
 
+load_dotenv()
 
-class Gemini:
-    def __init__(self):# 클라이언트 초기화
-        self.sync_client = OpenAI(
-            api_key=os.environ.get("GOOGLE_API_KEY"),
-            base_url=os.environ.get("GOOGLE_BASE_URL"),
-        )
-        self.async_client = AsyncOpenAI(
-            api_key=os.environ.get("GOOGLE_API_KEY"),
-            base_url=os.environ.get("GOOGLE_BASE_URL"),
-        )
-
-    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘."):
+class BaseLLM:
+    """OpenAI 호환 API를 쓰는 LLM 래퍼의 공통 구현.
+
+    하위 클래스는 provider, API 키/주소 환경변수 이름, 모델 이름만 정합니다.
+    client는 LLMClientRegistry가 provider별로 공유하므로 인스턴스를 여러 번 만들어도 커넥션 풀을 새로 만들지 않습니다.
+    요청마다 인스턴스를 만드는 대신 get_llm(llm_type)으로 공유 인스턴스를 받아 쓰세요.
+    call/acall에 cache_ttl(초)을 넘기면 같은 입력의 응답을 LLMResponseCache에서 재사용합니다. (입력이 같으면 답도 같은 하위 작업에만 사용)
+    cache_validate(response)를 함께 넘기면 True인(호출한 쪽이 파싱할 수 있는) 응답만 저장하므로 잘못된 응답이 TTL 동안 재사용되지 않습니다.
+    """
+    provider: str = None
+    api_key_env: str = None
+    base_url_env: str = None
+    model_name: str = None
+    temperature: float = 0.7
+
+    def __init__(self, model: str = None):
+        self.model = model or self.default_model()
+
+    @classmethod
+    def default_model(cls) -> str:
+        return cls.model_name
+
+    @property
+    def sync_client(self) -> OpenAI:
+        return get_llm_registry().sync_client(self.provider, os.environ.get(self.base_url_env), os.environ.get(self.api_key_env))
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        return get_llm_registry().async_client(self.provider, os.environ.get(self.base_url_env), os.environ.get(self.api_key_env))
+
+    def _messages(self, system_prompt: str, user_input: str) -> list[dict]:
+        return [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role" : "user",
+                "content" : user_input
+            }
+        ]
+
+    # 응답 캐시 (cache_ttl을 넘긴 호출만 사용)
+    def _cache_get(self, system_prompt: str, user_input: str, temperature: float, cache_ttl: float = None):
+        cache = get_llm_response_cache() if cache_ttl else None
+        if cache is None:
+            return None, None
+        return cache, cache.get(f'{self.provider}/{self.model}', system_prompt, user_input, temperature)
+
+    def _cache_put(self, cache, system_prompt: str, user_input: str, temperature: float, response: str, cache_ttl: float, cache_validate = None):
+        if cache is None or not response:
+            return
+        if cache_validate is not None:
+            try:
+                if not cache_validate(response):
+                    return
+            except Exception:
+                return
+        cache.put(f'{self.provider}/{self.model}', system_prompt, user_input, temperature, response, cache_ttl)
+
+    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘.",
+             temperature: float = None, cache_ttl: float = None, cache_validate = None):
+        temperature = self.temperature if temperature is None else temperature
         try:
+            cache, cached = self._cache_get(system_prompt, user_input, temperature, cache_ttl)
+            if cached is not None:
+                return cached
             response = self.sync_client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
+                model=self.model,
+                messages=self._messages(system_prompt, user_input),
+                temperature=temperature,
             )
             response_message = response.choices[0].message.content
+            self._cache_put(cache, system_prompt, user_input, temperature, response_message, cache_ttl, cache_validate)
             return response_message
         except Exception as e:
             print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
             return None
 
-    async def acall(self, system_prompt:str, user_input:str):
+    async def acall(self, system_prompt:str, user_input:str, on_token = None,
+                    temperature: float = None, cache_ttl: float = None, cache_validate = None):
+        """on_token을 주면 답변을 스트리밍으로 받아 토큰 조각마다 on_token(text)을 호출하고, 전체 답변을 반환합니다."""
+        temperature = self.temperature if temperature is None else temperature
         try:
-            response = await self.async_client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-                timeout=300.0
-            )
-            response_message = response.choices[0].message.content
+            cache, cached = self._cache_get(system_prompt, user_input, temperature, cache_ttl)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached)
+                return cached
+            if on_token is not None:
+                tokens = []
+                async for token in self.astream(system_prompt, user_input, temperature = temperature):
+                    tokens.append(token)
+                    on_token(token)
+                response_message = ''.join(tokens)
+            else:
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(system_prompt, user_input),
+                    temperature=temperature,
+                    timeout=300.0
+                )
+                response_message = response.choices[0].message.content
+            self._cache_put(cache, system_prompt, user_input, temperature, response_message, cache_ttl, cache_validate)
             return response_message
         except Exception as e:
             print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
             return None
 
-class OpenRouterLLM:
-    def __init__(self):# 클라이언트 초기화
-        self.sync_client = OpenAI(
-            api_key=os.environ.get("OPENROUTER_KEY"),
-            base_url=os.environ.get("OPENROUTER_BASE_URL"),
-        )
-        self.async_client = AsyncOpenAI(
-            api_key=os.environ.get("OPENROUTER_KEY"),
-            base_url=os.environ.get("OPENROUTER_BASE_URL"),
+    async def astream(self, system_prompt:str, user_input:str, temperature: float = None):
+        """답변을 토큰 조각(str) 단위로 생성하는 async generator. 오류는 호출한 쪽으로 그대로 전달됩니다."""
+        stream = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(system_prompt, user_input),
+            temperature=self.temperature if temperature is None else temperature,
+            timeout=300.0,
+            stream=True
         )
-        self.model = os.environ.get("MODEL", 'google/gemini-2.5-flash-preview-09-2025')
-
-    def call(self, system_prompt:str = "당신은 유용한 어시스턴트입니다.", user_input:str = "안녕? 너에 대해 소개해줘."):
         try:
-            response = self.sync_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
-
-    async def acall(self, system_prompt:str, user_input:str):
-        try:
-            response = await self.async_client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role" : "user",
-                        "content" : user_input
-                    }
-                ],
-                temperature=0.7,
-                timeout=300.0
-            )
-            response_message = response.choices[0].message.content
-            return response_message
-        except Exception as e:
-            print(f"LLM API 호출 중 오류 발생: {type(e).__name__} - {e}")
-            return None
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
 
     async def acall_structured(self, response_model=None, system_prompt: str="사용자의 질문에 친절히 답변하세요.", user_input: str="안녕?") -> Optional:
         """
@@ -313,11 +157,8 @@ class OpenRouterLLM:
             # 3. API 호출 (JSON 모드 활성화)
             response = await self.async_client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": structured_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                temperature=0.7,
+                messages=self._messages(structured_prompt, user_input),
+                temperature=self.temperature,
                 # JSON 모드를 지원하는 모델인 경우 필수 (대부분 최신 모델 지원)
                 response_format={"type": "json_object"}
             )
@@ -329,4 +170,50 @@ class OpenRouterLLM:
 
         except Exception as e:
             print(f"Structured Output 생성 실패: {type(e).__name__} - {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+class Midm(BaseLLM):
+    provider = "runpod"
+    api_key_env = "RUNPOD_API_KEY"
+    base_url_env = "RUNPOD_BASE_URL"
+    model_name = "K-intelligence/Midm-2.0-Base-Instruct"
+
+
+class SK(BaseLLM):
+    provider = "sk"
+    api_key_env = "SK_API_KEY"
+    base_url_env = "SK_BASE_URL"
+    model_name = "skt/A.X-4.0-Light"
+
+
+class LG(BaseLLM):
+    provider = "lg"
+    api_key_env = "LG_API_KEY"
+    base_url_env = "LG_BASE_URL"
+    model_name = "LGAI-EXAONE/EXAONE-3.5-7.8B-Instruct"
+
+
+class Gemini(BaseLLM):
+    provider = "google"
+    api_key_env = "GOOGLE_API_KEY"
+    base_url_env = "GOOGLE_BASE_URL"
+    model_name = "gemini-2.5-flash"
+
+
+class OpenRouterLLM(BaseLLM):
+    provider = "openrouter"
+    api_key_env = "OPENROUTER_KEY"
+    base_url_env = "OPENROUTER_BASE_URL"
+
+    @classmethod
+    def default_model(cls) -> str:
+        return os.environ.get("MODEL", 'google/gemini-2.5-flash-preview-09-2025')
+
+
+LLM_TYPES = {"SK": SK, "LG": LG, "Gemini": Gemini, "Midm": Midm}
+
+
+def get_llm(llm_type: str = None, model: str = None) -> BaseLLM:
+    """llm_type("SK", "LG", "Gemini", "Midm", 없으면 OpenRouter)의 공유 인스턴스를 반환합니다."""
+    return get_llm_registry().instance(LLM_TYPES.get(llm_type, OpenRouterLLM), model)
@@ -4,6 +4,9 @@ import numpy as np
 import asyncio
 import random
 from dotenv import load_dotenv
+from app.core.cache.embedding_cache import get_embedding_cache
+from app.core.VDB.navercloud_embedding import NAVER_EMBEDDING_MODEL_ID
+from app.core.VDB.embedding_provider import create_embedding_model, embedding_provider_name
 
 load_dotenv()
 
@@ -15,7 +18,19 @@ async def get_naver_embedding(text: str, max_retries: int = 5) -> list[float]:
     """Naver Cloud Embedding API를 호출하여 텍스트의 임베딩 벡터를 반환합니다.
 
     Rate limiting 대응을 위한 exponential backoff 재시도 로직 포함.
+    이미 임베딩한 텍스트는 NaverCloudEmbeddings와 공유하는 임베딩 캐시에서 바로 반환합니다.
+    EMBEDDING_PROVIDER가 naver가 아니면 해당 provider로 임베딩합니다. (오프라인 테스트용)
     """
+    if embedding_provider_name() != 'naver':
+        result = await create_embedding_model().aembed_query(text)
+        return result.get('embedding', [])
+
+    cache = get_embedding_cache()
+    if cache is not None:
+        cached = cache.get(text, NAVER_EMBEDDING_MODEL_ID)
+        if cached is not None:
+            return cached
+
     if not NAVER_CLOVA_API_KEY:
         raise ValueError("NAVER_CLOVA_API_KEY가 .env 파일에 설정되지 않았습니다.")
 
@@ -36,7 +51,10 @@ async def get_naver_embedding(text: str, max_retries: int = 5) -> list[float]:
                 )
                 response.raise_for_status()
                 data = response.json()
-                return data.get("result", {}).get("embedding", [])
+                embedding = data.get("result", {}).get("embedding", [])
+                if cache is not None and embedding:
+                    cache.put(text, embedding, NAVER_EMBEDDING_MODEL_ID)
+                return embedding
 
             except httpx.HTTPStatusError as e:
                 if e.response.status_code == 429:  # Too Many Requests
@@ -1,10 +1,16 @@
+import asyncio
+import hashlib
 import os
-from typing import List
+import uuid
+from typing import List, Optional
 
 import aiofiles
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from fastapi.responses import FileResponse
 from ..schemas.request_models.request_models import FileDownloadRequest, FilePathRequest
+from ..core.cache.file_hash_index import get_file_hash_index
+from ..core.jobs.job_runner import submit_job
+from ..services.job_handlers import register_dedup_key
 from pydantic import BaseModel
 from pathlib import Path
 
@@ -12,13 +18,44 @@ router = APIRouter()
 
 ROUTER_DIR = os.path.dirname(os.path.abspath(__file__))
 PDF_DIR = os.path.abspath(os.path.join(ROUTER_DIR, "..", "..", "pdfs"))
+# 업로드 파일을 한 번에 읽지 않고 이 크기씩 읽어 쓰면서 해시를 계산합니다.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1 << 20))
+# 같은 내용의 파일이 동시에 올라와 둘 다 저장되지 않도록 중복 확인과 저장을 묶습니다.
+_store_lock = asyncio.Lock()
+
+
+async def _stream_to_temp(file: UploadFile) -> tuple[str, str]:
+    """업로드 파일을 PDF_DIR 안의 임시 파일(.으로 시작, *.pdf glob에 안 잡힘)에 나눠 쓰고 (임시 경로, sha256)을 돌려줍니다."""
+    temp_path = os.path.join(PDF_DIR, f".upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(temp_path, 'wb') as out_file:
+            while True:
+                block = await file.read(UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                await out_file.write(block)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path, digest.hexdigest()
 
 
 @router.post("/upload-pdf/", tags=["File Upload"])
-async def upload_pdf(files: List[UploadFile] = File(...)):
+async def upload_pdf(files: List[UploadFile] = File(...), auto_register: bool = Form(False), workspace: Optional[str] = Form(None)):
+    """
+    PDF를 나눠 읽으며 저장합니다. 이미 같은 내용의 파일이 있으면(이름이 달라도) 다시 저장하지 않고 duplicates에 알려줍니다.
+    auto_register=true면 저장이 끝난 파일마다 바로 적재 작업(/jobs)을 넣고 jobs에 job_id를 돌려줍니다.
+    """
     os.makedirs(PDF_DIR, exist_ok=True)
-    
+    index = get_file_hash_index()
+    await asyncio.to_thread(index.sync, PDF_DIR)
+
     saved_file_paths = []
+    duplicates = []
+    jobs = []
 
     # 여러 파일 업로드 처리
     for file in files:
@@ -28,23 +65,38 @@ async def upload_pdf(files: List[UploadFile] = File(...)):
                 detail=f"Invalid file type for {file.filename}. Only PDF files are allowed."
             )
 
-        file_path = os.path.join(PDF_DIR, file.filename)
+        file_name = Path(file.filename).name
+        file_path = os.path.join(PDF_DIR, file_name)
 
         try:
-            async with aiofiles.open(file_path, 'wb') as out_file:
-                content = await file.read()
-                await out_file.write(content)
+            temp_path, content_hash = await _stream_to_temp(file)
+            async with _store_lock:
+                existing = index.find(PDF_DIR, content_hash)
+                if existing is not None:
+                    os.remove(temp_path)
+                    duplicates.append({"file_name": file_name, "duplicate_of": existing})
+                    continue
+                os.replace(temp_path, file_path)
+                index.add(PDF_DIR, file_name, content_hash)
             saved_file_paths.append(file_path)
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"There was an error uploading the file {file.filename}: {e}"
             )
-            
+
+        if auto_register:
+            job, _ = submit_job("register", {"file_names": [file_name], "workspace": workspace},
+                                dedup_key=register_dedup_key([file_name], workspace))
+            jobs.append({"file_name": file_name, "job_id": job["id"], "status": job["status"]})
+
     return {
         "success": True,
         "file_paths": saved_file_paths,
+        "duplicates": duplicates,
+        "jobs": jobs,
         "message": f"Successfully uploaded {len(saved_file_paths)} files."
+                   + (f" Skipped {len(duplicates)} duplicate files." if duplicates else "")
     }
 
 
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import time
+from typing import Optional
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from ..core.jobs.job_store import FINISHED_STATUSES, get_job_store
+from ..schemas.response_models.response_models import JobResponse, JobListResponse
+from .sse import SSE_HEADERS, sse_event
+
+router = APIRouter()
+
+# SSE 스트림에서 작업 상태를 확인하는 간격과, 변화가 없을 때 연결 유지용 주석을 보내는 간격 (초)
+EVENTS_POLL_INTERVAL = float(os.getenv('JOB_EVENTS_POLL_INTERVAL', 0.5))
+EVENTS_KEEPALIVE = 15
+
+@router.get("")
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> JobListResponse:
+    jobs = get_job_store().list_jobs(kind = kind, status = status, limit = limit)
+    # 목록에서는 결과 본문(보고서 등)을 빼고 상태만 보여줍니다.
+    return JobListResponse(success = True, jobs = [{k: v for k, v in job.items() if k != 'result'} for job in jobs])
+
+@router.get("/{job_id}")
+async def get_job(job_id: str) -> JobResponse:
+    job = get_job_store().get(job_id)
+    if job is None:
+        return JobResponse(success = False, msg = f'{job_id} 작업이 존재하지 않습니다.')
+    return JobResponse(success = True, msg = job['status'], job = job)
+
+@router.get("/{job_id}/progress")
+async def get_job_progress(job_id: str) -> JobResponse:
+    job = get_job_store().get(job_id)
+    if job is None:
+        return JobResponse(success = False, msg = f'{job_id} 작업이 존재하지 않습니다.')
+    return JobResponse(success = True, msg = job['status'], job = {'id' : job['id'], 'kind' : job['kind'], 'status' : job['status'],
+                                                                    'progress' : job['progress'], 'error' : job['error']})
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """작업의 상태/진행 상황이 바뀔 때마다 progress 이벤트를, 끝나면 결과와 함께 done 이벤트를 보내는 SSE 스트림."""
+    store = get_job_store()
+
+    async def events():
+        last, last_sent = None, time.monotonic()
+        while True:
+            if await request.is_disconnected():
+                return
+            job = await asyncio.to_thread(store.get, job_id)
+            if job is None:
+                yield sse_event('error', {'msg' : f'{job_id} 작업이 존재하지 않습니다.'})
+                return
+            if job['status'] in FINISHED_STATUSES:
+                yield sse_event('done', job)
+                return
+            current = (job['status'], job['progress'])
+            if current != last:
+                last, last_sent = current, time.monotonic()
+                yield sse_event('progress', {'id' : job_id, 'status' : job['status'], 'progress' : job['progress']})
+            elif time.monotonic() - last_sent > EVENTS_KEEPALIVE:
+                last_sent = time.monotonic()
+                yield ': keepalive\n\n'
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type = "text/event-stream", headers = SSE_HEADERS)
@@ -1,12 +1,21 @@
 import os
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, HTTPException
 from ..services.rag_service import RagService
 from ..services.intention_analyzer import IntentionAnalyzer
 from ..services.vanilla_rag_workflow_service import vanilla_rag_workflow
 from ..services.advanced_rag_workflow_service import advanced_rag_workflow
-from ..schemas.request_models.request_models import RAGRequest, RegisterRequest,DeleteObjectsRequest
-from ..schemas.response_models.response_models import RAGResponse, RegisterResponse, ResetResponse, InitResponse, AdvancedRAGResponse, ShowResponse, DeleteObjectsResponse, AnalysisResponse, GuideResponse
+from ..schemas.request_models.request_models import RAGRequest, RegisterRequest,DeleteObjectsRequest, DeleteTenantRequest, SnapshotRequest, RestoreRequest
+from ..schemas.response_models.response_models import RAGResponse, RegisterResponse, ResetResponse, InitResponse, AdvancedRAGResponse, ShowResponse, DeleteObjectsResponse, AnalysisResponse, GuideResponse, CacheStatsResponse, SnapshotResponse
 from ..services.vdb_service import VDBService
+from ..core.cache.embedding_cache import get_embedding_cache
+from ..core.cache.retrieval_cache import get_retrieval_cache
+from ..core.cache.llm_response_cache import get_llm_response_cache
+from ..core.VDB.snapshot import snapshot_path_for
+from ..core.jobs.job_runner import submit_job
+from ..core.jobs.job_store import get_job_store
+from ..services.job_handlers import INGESTION_KINDS, register_dedup_key, initialize_dedup_key
+from .sse import sse_response
 
 router = APIRouter()
 
@@ -18,7 +27,7 @@ async def get_rag_status():
 async def query_rag(request: RAGRequest) -> RAGResponse:
     user_query = request.query
     workflow = vanilla_rag_workflow()
-    response = workflow.run(question = user_query)
+    response = await workflow.arun(question = user_query, tenants = request.tenants, neighbors = request.neighbors)
         
     if 'err_msg' in response:
         return RAGResponse(success = response['success'], answer = response['err_msg'], retrieved_documents=[{}])
@@ -29,41 +38,105 @@ async def query_rag(request: RAGRequest) -> RAGResponse:
 async def query_rag(request: RAGRequest) -> AdvancedRAGResponse:
     user_query = request.query
     workflow = advanced_rag_workflow()
-    response = workflow.run(question = user_query)
+    response = await workflow.arun(question = user_query, tenants = request.tenants, neighbors = request.neighbors)
     retrieved_documents = response['retrieved_documents'] + response['references']
     if 'err_msg' in response:
         return AdvancedRAGResponse(success = response['success'], answer = response['err_msg'], retrieved_documents=[{}], references = [{}])
     else:
         return AdvancedRAGResponse(success = response['success'], answer = response['answer'], retrieved_documents=retrieved_documents, references = response['references'])
 
+@router.post("/query/stream")
+async def query_rag_stream(request: RAGRequest):
+    """/query의 SSE 버전. retrieved_documents → token(답변 조각, 여러 번) → done(/query와 같은 응답) 이벤트를 보냅니다. 실패하면 error."""
+    workflow = vanilla_rag_workflow()
+    return sse_response(workflow.astream_events(question = request.query, tenants = request.tenants, neighbors = request.neighbors))
+
+@router.post("/advanced_query/stream")
+async def advanced_query_rag_stream(request: RAGRequest):
+    """/advanced_query의 SSE 버전. retrieved_documents → references → token(여러 번) → done 이벤트를 보냅니다. 실패하면 error."""
+    workflow = advanced_rag_workflow()
+
+    async def events():
+        async for event, data in workflow.astream_events(question = request.query, tenants = request.tenants, neighbors = request.neighbors):
+            if event == 'done':
+                # /advanced_query 응답과 같이 retrieved_documents에 참조조문을 포함합니다.
+                data = dict(data, retrieved_documents = data['retrieved_documents'] + data['references'])
+            yield event, data
+    return sse_response(events())
+
+def _run_register(file_names: list[str], workspace: str = None) -> dict:
+    return VDBService().register_many(file_names, workspace = workspace)
+
+def _run_initialize() -> dict:
+    return VDBService().initialize()
+
+# background가 아니면 적재가 끝날 때까지 기다리되, 동기 적재는 worker thread에서 실행합니다. (이벤트 루프를 막지 않도록)
 @router.post("/register")
 async def register(request: RegisterRequest) -> RegisterResponse:
     file_names = request.file_name
     print(file_names)
-    service = VDBService()
-    for file_name in file_names:
-        result = service.register(file_name = file_name)
-        if result['success']:
-            continue
-        else:
-            e = result['err_msg']
+    if request.background:
+        job, created = submit_job('register', {'file_names' : file_names, 'workspace' : request.workspace},
+                                  dedup_key = register_dedup_key(file_names, request.workspace))
+        msg = '문서 적재 작업을 시작하였습니다.' if created else f"같은 문서 적재 작업이 이미 있습니다. (상태 : {job['status']})"
+        return RegisterResponse(success = True, msg = msg, job_id = job['id'])
+    result = await asyncio.to_thread(_run_register, file_names, request.workspace)
+    if not result['success']:
+        for file_name, e in result.get('failed', {}).items():
             return RegisterResponse(success = False, msg = f'{file_name} 문서를 VDB에 적재하는 데에 실패하였습니다. 오류 메세지 : {e}')
-    return RegisterResponse(success = True, msg = f'{file_name}문서를 VDB에 적재하였습니다.')
+        return RegisterResponse(success = False, msg = f"문서를 VDB에 적재하는 데에 실패하였습니다. 오류 메세지 : {result['err_msg']}")
+    return RegisterResponse(success = True, msg = f'{", ".join(file_names)}문서를 VDB에 적재하였습니다.')
     
 
 @router.get("/reset")
 async def reset():
     service = VDBService()
     result = service.reset()
+    get_job_store().expire(INGESTION_KINDS)
     if result['success']:
         return ResetResponse(success = True, msg = 'VDB를 성공적으로 리셋하였습니다.') 
     else:
         return ResetResponse(success = False, msg = result['err_msg'])
     
+def _snapshot_path(name: str) -> str:
+    try:
+        return snapshot_path_for(name)
+    except ValueError as e:
+        raise HTTPException(status_code = 400, detail = str(e))
+
+def _run_snapshot(path: str = None) -> dict:
+    return VDBService().snapshot(path = path)
+
+def _run_restore(path: str) -> dict:
+    return VDBService().restore(path = path)
+
+# 스냅샷 저장/복구는 오래 걸리는 동기 작업이라 worker thread에서 실행합니다. (이벤트 루프를 막지 않도록)
+@router.post("/snapshot")
+async def snapshot(request: SnapshotRequest) -> SnapshotResponse:
+    path = _snapshot_path(request.path) if request.path else None
+    result = await asyncio.to_thread(_run_snapshot, path)
+    if result['success']:
+        return SnapshotResponse(success = True, msg = f"{result['path']}에 스냅샷을 저장하였습니다.", report = result['meta'])
+    else:
+        return SnapshotResponse(success = False, msg = result['err_msg'])
+
+@router.post("/restore")
+async def restore(request: RestoreRequest) -> SnapshotResponse:
+    path = _snapshot_path(request.path)
+    result = await asyncio.to_thread(_run_restore, path)
+    get_job_store().expire(INGESTION_KINDS)
+    if result['success']:
+        return SnapshotResponse(success = True, msg = f"{request.path} 스냅샷을 복구하였습니다.", report = result['report'])
+    else:
+        return SnapshotResponse(success = False, msg = result['err_msg'])
+
 @router.get("/initialize")
-async def initalize():
-    service = VDBService()
-    result = service.initialize()
+async def initalize(background: bool = False):
+    if background:
+        job, created = submit_job('initialize', {}, dedup_key = initialize_dedup_key())
+        msg = 'pdf폴더 적재 작업을 시작하였습니다.' if created else f"같은 적재 작업이 이미 있습니다. (상태 : {job['status']})"
+        return InitResponse(success = True, msg = msg, job_id = job['id'])
+    result = await asyncio.to_thread(_run_initialize)
     if result['success']:
         return InitResponse(success = True, msg = f"pdf폴더 내에 존재하는 법령 문서를 전부 적재하였습니다. \n적재된파일\n {result['files']}")
     else:
@@ -82,12 +155,23 @@ async def show_files_in_collection() -> ShowResponse:
 async def delete_objects_from_file_name(request:DeleteObjectsRequest) -> DeleteObjectsResponse:
     service = VDBService()
     file_name = request.file_name
-    result = service.delete_objects_from_file_name(file_name = file_name)
+    result = service.delete_objects_from_file_name(file_name = file_name, workspace = request.workspace)
+    get_job_store().expire(INGESTION_KINDS)
     if result['success']:
         return DeleteObjectsResponse(success = True, msg = f"{file_name}에 해당하는 objects들을 전부 삭제하였습니다.")
     else:
         return DeleteObjectsResponse(success = False, msg = result['err_msg'])
 
+@router.post("/delete_tenant")
+async def delete_tenant(request: DeleteTenantRequest) -> DeleteObjectsResponse:
+    service = VDBService()
+    result = service.delete_tenant(tenant = request.tenant)
+    get_job_store().expire(INGESTION_KINDS)
+    if result['success']:
+        return DeleteObjectsResponse(success = True, msg = f"{request.tenant} tenant를 삭제하였습니다.")
+    else:
+        return DeleteObjectsResponse(success = False, msg = result['err_msg'])
+
 
 @router.post("/analyze_intention")
 async def analyze_intention(request: RAGRequest) -> AnalysisResponse:
@@ -103,3 +187,24 @@ async def guide(request: RAGRequest) -> GuideResponse:
     response = await analyzer.guide(question)
 
     return GuideResponse(success = True, answer = response)
+
+@router.get("/embedding_cache/stats")
+async def embedding_cache_stats() -> CacheStatsResponse:
+    cache = get_embedding_cache()
+    if cache is None:
+        return CacheStatsResponse(success = False, stats = {})
+    return CacheStatsResponse(success = True, stats = cache.stats())
+
+@router.get("/retrieval_cache/stats")
+async def retrieval_cache_stats() -> CacheStatsResponse:
+    cache = get_retrieval_cache()
+    if cache is None:
+        return CacheStatsResponse(success = False, stats = {})
+    return CacheStatsResponse(success = True, stats = cache.stats())
+
+@router.get("/llm_cache/stats")
+async def llm_cache_stats() -> CacheStatsResponse:
+    cache = get_llm_response_cache()
+    if cache is None:
+        return CacheStatsResponse(success = False, stats = {})
+    return CacheStatsResponse(success = True, stats = cache.stats())
@@ -1,7 +1,9 @@
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import PlainTextResponse
-from app.services.report_service import ReportService
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.services.job_handlers import report_dedup_key, generate_report_in_thread
+from app.core.jobs.job_runner import submit_job
+from app.core.jobs.job_store import get_job_store
 
 router = APIRouter()
 
@@ -10,15 +12,25 @@ router = APIRouter()
             response_class=PlainTextResponse) 
 async def generate_company_report(
     corp_code: str,
-    report_service: ReportService = Depends(ReportService)
+    background: bool = False
 ):
     """
     기업 코드(corp_code)를 받아 해당 기업에 대한 상세 분석 보고서를 Markdown 형식으로 생성합니다.
 
     - **corp_code**: KRX에서 사용하는 8자리 종목 코드 (예: 삼성전자 - 00126380)
+    - **background**: true면 보고서 생성을 백그라운드 작업으로 넣고 job_id를 JSON으로 바로 돌려줍니다. (/jobs/{job_id}로 조회)
+
+    같은 날 이미 생성된 보고서가 있으면 다시 생성하지 않고 저장된 보고서를 돌려줍니다.
     """
+    dedup_key = report_dedup_key(corp_code)
+    if background:
+        job, created = submit_job("report", {"corp_code": corp_code}, dedup_key=dedup_key)
+        return JSONResponse({"success": True, "job_id": job["id"], "status": job["status"], "created": created})
+    finished = get_job_store().find_result("report", dedup_key)
+    if finished is not None:
+        return finished["result"]["report"]
     try:
-        report = await report_service.generate_report(corp_code)
+        report = await asyncio.to_thread(generate_report_in_thread, corp_code)
         return report
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"보고서 생성 중 오류 발생: {str(e)}")
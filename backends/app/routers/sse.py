@@ -0,0 +1,15 @@
+import json
+from fastapi.responses import StreamingResponse
+
+# 프록시(nginx 등)가 스트림을 모아서 보내지 않도록 하는 헤더
+SSE_HEADERS = {'Cache-Control' : 'no-cache', 'X-Accel-Buffering' : 'no'}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii = False, default = str)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    """(이벤트 이름, 데이터)를 내보내는 async generator를 text/event-stream 응답으로 바꿉니다."""
+    async def body():
+        async for event, data in events:
+            yield sse_event(event, data)
+    return StreamingResponse(body(), media_type = "text/event-stream", headers = SSE_HEADERS)
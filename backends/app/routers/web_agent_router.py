@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from app.services.web_agent_workflow_service import web_agent_workflow
 from app.schemas.request_models.request_models import WebSearchRequest
 from app.schemas.response_models.response_models import WebSearchResponse
+from app.routers.sse import sse_response
 
 router = APIRouter()
 
@@ -23,3 +24,12 @@ async def run_web_agent(request: WebSearchRequest) -> WebSearchResponse:
         success=result["success"],
         search_results=result["search_results"]
     )
+
+@router.post("/agent/web-search/stream", summary="웹 검색 에이전트 실행 (SSE 스트리밍)")
+async def run_web_agent_stream(request: WebSearchRequest):
+    """
+    웹 검색 에이전트를 실행하면서 search_results(필터링된 문서) → token(답변 조각, 여러 번) → done(최종 답변) 이벤트를 SSE로 보냅니다.
+    실패하면 error 이벤트를 보냅니다.
+    """
+    workflow = web_agent_workflow()
+    return sse_response(workflow.astream_events(request.query))
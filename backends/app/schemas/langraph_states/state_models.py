@@ -5,11 +5,17 @@ class advanced_rag_state(BaseModel):
     retrieved_documents :list[dict]
     answer : str
     references : list[dict]
+    # 0보다 크면 검색된 chunk에 같은 조문의 앞뒤 neighbors개 chunk를 이어붙입니다.
+    neighbors : int = 0
+    # True이면 generation 노드가 답변 토큰을 custom 스트림으로 내보냅니다. (astream_events)
+    stream : bool = False
 
 class vanilla_rag_state(BaseModel):
     user_question: str
     retrieved_documents :list[dict]
     answer : str
+    neighbors : int = 0
+    stream : bool = False
 
 class report_workflow_state(BaseModel):
     """기업 분석 보고서 생성 워크플로우의 상태 모델.
@@ -55,6 +61,7 @@ class web_agent_state(BaseModel):
         final_answer: 최종 생성된 답변
         answer_type: 답변 생성 방식 (통합_분석 또는 문서별_요약)
         search_results: API 응답용 검색 결과 목록
+        stream: True이면 답변 토큰을 custom 스트림으로 내보냄 (astream_events)
     """
     user_question: str
     generated_queries: list[str] = []
@@ -63,4 +70,5 @@ class web_agent_state(BaseModel):
     similarity_score: float = 0.0
     final_answer: str = ""
     answer_type: str = ""
-    search_results: list[dict] = []
\ No newline at end of file
+    search_results: list[dict] = []
+    stream: bool = False
\ No newline at end of file
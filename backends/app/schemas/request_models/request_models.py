@@ -1,11 +1,15 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class WebSearchRequest(BaseModel):
     query: str
 
 class RAGRequest(BaseModel):
     query: str
+    # 멀티테넌트 LegalDB에서 검색할 문서군/작업공간 (없으면 전체)
+    tenants: Optional[List[str]] = None
+    # 검색된 chunk에 붙일 같은 조문의 앞뒤 chunk 수 (0이면 검색된 chunk만 사용)
+    neighbors: int = 0
 
 class ReportRequest(BaseModel):
     corp_code: str
@@ -15,9 +19,24 @@ class KeywordRequest(BaseModel):
 
 class RegisterRequest(BaseModel):
     file_name: List[str]
+    workspace: Optional[str] = None
+    # True면 적재를 백그라운드 작업으로 넣고 job_id를 바로 돌려줍니다.
+    background: bool = False
 
 class DeleteObjectsRequest(BaseModel):
     file_name: str
+    workspace: Optional[str] = None
+
+class DeleteTenantRequest(BaseModel):
+    tenant: str
+
+class SnapshotRequest(BaseModel):
+    # SNAPSHOT_DIR 아래의 스냅샷 이름 (경로는 받지 않습니다). 없으면 collection 이름과 시각으로 만듭니다.
+    path: Optional[str] = None
+
+class RestoreRequest(BaseModel):
+    # SNAPSHOT_DIR 아래의 스냅샷 이름
+    path: str
 
 # ✅ 파일 다운로드 요청 모델
 class FileDownloadRequest(BaseModel):
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class RAGResponse(BaseModel):
@@ -28,6 +29,8 @@ class FileUploadResponse(BaseModel):
 class RegisterResponse(BaseModel):
     success: bool
     msg: str
+    # background=True로 요청하면 /jobs/{job_id}로 진행 상황과 결과를 조회합니다.
+    job_id: Optional[str] = None
 
 class ResetResponse(BaseModel):
     success: bool
@@ -36,6 +39,7 @@ class ResetResponse(BaseModel):
 class InitResponse(BaseModel):
     success: bool
     msg: str
+    job_id: Optional[str] = None
 
 class WebSearchResponse(BaseModel):
     answer: str
@@ -58,3 +62,21 @@ class AnalysisResponse(BaseModel):
 class GuideResponse(BaseModel):
     success: bool
     answer: str
+
+class CacheStatsResponse(BaseModel):
+    success: bool
+    stats: dict
+
+class SnapshotResponse(BaseModel):
+    success: bool
+    msg: str
+    report: dict = {}
+
+class JobResponse(BaseModel):
+    success: bool
+    msg: str
+    job: dict = {}
+
+class JobListResponse(BaseModel):
+    success: bool
+    jobs: list[dict]
@@ -1,32 +1,71 @@
 from langgraph.graph import StateGraph, START, END
-from app.core.llm.llm import Midm, Gemini, SK, LG, OpenRouterLLM
-from app.core.VDB.weaviateVDB import VectorDB
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableLambda
+from app.core.llm.llm import get_llm
+from app.core.VDB.connection_manager import get_vector_db, get_async_vector_db, release_async_vector_db
 from dotenv import load_dotenv
 from app.schemas.langraph_states.state_models import advanced_rag_state
 
 class advanced_rag_workflow:
     def __init__(self, llm_type:str = None):
         load_dotenv()
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
-        self.vdb = VectorDB()
-        self.vdb.set_collection('LegalDB')
+        self.llm = get_llm(llm_type)
+        # VDB는 실행 방식에 맞는 것만 처음 실행할 때 연결합니다. (arun/astream_events는 async client만 사용하므로 이벤트 루프를 막지 않습니다.)
+        self.vdb = None
+        self.avdb = None
         self.workflow = self.setup()
 
     def retriever(self, state: advanced_rag_state, topk=4, alpha = 0.5) -> advanced_rag_state:
         question = state.user_question
         retrieved_documents = self.vdb.query_hybrid(query = question, topk = topk, alpha = alpha)
+        if state.neighbors:
+            retrieved_documents = self.vdb.expand_neighbors(retrieved_documents, window = state.neighbors)
+        return {'retrieved_documents' : retrieved_documents}
+
+    async def aretriever(self, state: advanced_rag_state, topk=4, alpha = 0.5) -> advanced_rag_state:
+        question = state.user_question
+        retrieved_documents = await self.avdb.query_hybrid(query = question, topk = topk, alpha = alpha)
+        if state.neighbors:
+            retrieved_documents = await self.avdb.expand_neighbors(retrieved_documents, window = state.neighbors)
         return {'retrieved_documents' : retrieved_documents}
     
     def reference_search(self, state: advanced_rag_state) -> advanced_rag_state:
-        retrieved_documents = state.retrieved_documents
-        context_list = [doc['text'] for doc in retrieved_documents]
+        context_list = [doc['text'] for doc in state.retrieved_documents]
+        system_prompt, user_input = self._reference_prompt(context_list)
+        result = self.llm.call(system_prompt=system_prompt, user_input=user_input)
+        try:
+            names = [i.replace(' ','') for i in result.split(',')]
+            found = self.vdb.lookup_articles(names)
+            return {'references' : self._collect_references(names, found, context_list)}
+        except Exception as e:
+            print(f'참조조문 파싱오류 발생. 오류 : {e} / 검색 결과:', result)
+            return {'references' : []}
+
+    async def areference_search(self, state: advanced_rag_state) -> advanced_rag_state:
+        context_list = [doc['text'] for doc in state.retrieved_documents]
+        system_prompt, user_input = self._reference_prompt(context_list)
+        result = await self.llm.acall(system_prompt=system_prompt, user_input=user_input)
+        try:
+            names = [i.replace(' ','') for i in result.split(',')]
+            found = await self.avdb.lookup_articles(names)
+            return {'references' : self._collect_references(names, found, context_list)}
+        except Exception as e:
+            print(f'참조조문 파싱오류 발생. 오류 : {e} / 검색 결과:', result)
+            return {'references' : []}
+
+    def _collect_references(self, names: list[str], found: dict, context_list: list[str]) -> list[dict]:
+        references = []
+        for name in dict.fromkeys(names):
+            reference = found.get(name)
+            if reference:
+                if reference['text'] not in context_list and reference not in references:
+                    references.append(reference)
+                    print(name,'에 해당하는 참조 조문이 vdb 내에 존재하여 참조 조문 목록에 추가하였습니다.')
+                else:
+                    print(name,'에 해당하는 참조 조문이 vdb 내에 존재하여 참조 조문 목록에 추가하려 했으나 이미 검색된 문서에 존재하여 스킵합니다.')
+        return references
+
+    def _reference_prompt(self, context_list: list[str]) -> tuple[str, str]:
         contexts = "\n\n".join(context_list)
         system_prompt = f"""
 당신은 법령 분석 전문가입니다.
@@ -51,27 +90,23 @@ class advanced_rag_workflow:
 - 다른 말은 절대 하지 않고 참조 법령 조항만 출력 형식에 맞게 출력하세요.
 """
         user_input = f"제공된 문서 : {contexts}"
-        result = self.llm.call(system_prompt=system_prompt, user_input=user_input)
-        try:
-            references = []
-            result = [i.replace(' ','') for i in result.split(',')]
-            for name in result:
-                reference = self.vdb.query_hybrid_with_filter(name = name)
-                if reference:
-                    if reference['text'] not in context_list:
-                        references.append(reference)
-                        print(name,'에 해당하는 참조 조문이 vdb 내에 존재하여 참조 조문 목록에 추가하였습니다.')
-                    else:
-                        print(name,'에 해당하는 참조 조문이 vdb 내에 존재하여 참조 조문 목록에 추가하려 했으나 이미 검색된 문서에 존재하여 스킵합니다.')
-                else:
-                    pass
-            return {'references' : references}
-            
-        except Exception as e:
-            print(f'참조조문 파싱오류 발생. 오류 : {e} / 검색 결과:', result)
-            return {'references' : []}
+        return system_prompt, user_input
         
     def generation(self, state: advanced_rag_state) -> advanced_rag_state:
+        system_prompt, question = self._generation_prompt(state)
+        answer = self.llm.call(system_prompt=system_prompt, user_input = question)
+        return {'answer' : answer}
+
+    async def ageneration(self, state: advanced_rag_state) -> advanced_rag_state:
+        system_prompt, question = self._generation_prompt(state)
+        on_token = None
+        if state.stream:
+            writer = get_stream_writer()
+            on_token = lambda token: writer({'token' : token})
+        answer = await self.llm.acall(system_prompt=system_prompt, user_input = question, on_token = on_token)
+        return {'answer' : answer}
+
+    def _generation_prompt(self, state: advanced_rag_state) -> tuple[str, str]:
         question = state.user_question
         retrieved_documents = state.retrieved_documents
         references = state.references
@@ -143,16 +178,14 @@ class advanced_rag_workflow:
         {contexts2}
         답변: 
         """
-        
-        answer = self.llm.call(system_prompt=system_prompt, user_input = question)
-
-        return {'answer' : answer}
+        return system_prompt, question
     
     def setup(self):
+        # 각 노드는 동기/비동기 구현을 모두 가지므로 run()은 invoke, arun()은 ainvoke로 실행됩니다.
         workflow = StateGraph(advanced_rag_state)
-        workflow.add_node(self.retriever, "retriever")
-        workflow.add_node(self.reference_search, "reference_search")
-        workflow.add_node(self.generation, "generation")
+        workflow.add_node("retriever", RunnableLambda(self.retriever, afunc=self.aretriever))
+        workflow.add_node("reference_search", RunnableLambda(self.reference_search, afunc=self.areference_search))
+        workflow.add_node("generation", RunnableLambda(self.generation, afunc=self.ageneration))
         workflow.add_edge(START, "retriever")
         workflow.add_edge("retriever", "reference_search")
         workflow.add_edge("reference_search", "generation")
@@ -160,12 +193,61 @@ class advanced_rag_workflow:
         workflow = workflow.compile()        
         return workflow
 
-    def run(self, question):
-        input = advanced_rag_state(user_question=question, retrieved_documents=[{}], answer='', references = [{}])
+    def run(self, question, tenants: list[str] = None, neighbors: int = 0):
+        input = advanced_rag_state(user_question=question, retrieved_documents=[{}], answer='', references = [{}], neighbors = neighbors)
         try:
+            if self.vdb is None:
+                self.vdb = get_vector_db()
+                self.vdb.set_collection('LegalDB')
+            self.vdb.set_tenants(tenants)
             result = self.workflow.invoke(input=input)
             response = {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents'], 'references' : result['references']}
             return response
         except Exception as e:
             response = {'success' : False, 'err_msg' : e}
             return response
+
+    async def arun(self, question, tenants: list[str] = None, neighbors: int = 0):
+        input = advanced_rag_state(user_question=question, retrieved_documents=[{}], answer='', references = [{}], neighbors = neighbors)
+        try:
+            if self.avdb is None:
+                self.avdb = await get_async_vector_db()
+                await self.avdb.set_collection('LegalDB')
+            self.avdb.set_tenants(tenants)
+            result = await self.workflow.ainvoke(input=input)
+            response = {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents'], 'references' : result['references']}
+            return response
+        except Exception as e:
+            response = {'success' : False, 'err_msg' : e}
+            return response
+        finally:
+            self.avdb = await release_async_vector_db(self.avdb)
+
+    async def astream_events(self, question, tenants: list[str] = None, neighbors: int = 0):
+        """arun과 같은 워크플로우를 실행하면서 (이벤트, 데이터)를 차례로 내보내는 async generator.
+
+        retrieved_documents(검색 직후) → references(참조조문 검색 직후) → token(답변 조각, 여러 번) → done(arun과 같은 응답) 순서이며,
+        실패하면 error를 보냅니다.
+        """
+        input = advanced_rag_state(user_question=question, retrieved_documents=[{}], answer='', references = [{}], neighbors = neighbors, stream = True)
+        try:
+            if self.avdb is None:
+                self.avdb = await get_async_vector_db()
+                await self.avdb.set_collection('LegalDB')
+            self.avdb.set_tenants(tenants)
+            result = {}
+            async for mode, chunk in self.workflow.astream(input=input, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    yield 'token', chunk['token']
+                    continue
+                for node, update in chunk.items():
+                    result.update(update or {})
+                    if node == 'retriever':
+                        yield 'retrieved_documents', update['retrieved_documents']
+                    elif node == 'reference_search':
+                        yield 'references', update['references']
+            yield 'done', {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents'], 'references' : result['references']}
+        except Exception as e:
+            yield 'error', {'success' : False, 'err_msg' : e}
+        finally:
+            self.avdb = await release_async_vector_db(self.avdb)
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from ..core.Preprocessor.preprocessor import parse_document
+
+
+class IngestionOrchestrator:
+    """여러 PDF를 겹쳐서 적재하는 오케스트레이터. (VDBService.register_many / initialize / vdb_cli.py ingest)
+
+    파일마다 다음 단계를 거치며, 서로 다른 파일의 단계는 동시에 진행됩니다.
+    1. plan: 파일 해시와 기존 chunk 조회 (변경이 없으면 skipped로 끝)
+    2. parse: PyMuPDF 파싱/조문 분할 (CPU 작업이므로 process pool, parse_workers개)
+    3. title: name_finder로 법령 제목 찾기 (규칙으로 못 찾으면 LLM 호출, llm_concurrency개까지 동시)
+    4. write: chunk 구성 → 증분 적재 (임베딩은 IngestionPipeline이 동시에 호출)
+    write는 VectorDB의 tenant 상태를 바꾸므로 메인 스레드에서 끝난 파일부터 하나씩 수행합니다.
+
+    진행 상황은 self.progress({file_name: {status, ...}})에 기록되고, on_progress(file_name, progress)가 있으면 단계마다 호출됩니다.
+    status: queued → parsing → titling → writing → done (또는 skipped / failed)
+    """
+
+    def __init__(self, service, parse_workers: int = None, llm_concurrency: int = None, on_progress = None):
+        self.service = service
+        self.parse_workers = parse_workers or int(os.getenv('INGEST_PARSE_WORKERS', min(4, os.cpu_count() or 1)))
+        self.llm_concurrency = llm_concurrency or int(os.getenv('INGEST_LLM_CONCURRENCY', 4))
+        self.process_pool_min_files = int(os.getenv('INGEST_PROCESS_POOL_MIN_FILES', 4))
+        self.on_progress = on_progress
+        self.progress = {}
+
+    def _update(self, file_name: str, status: str, **info):
+        entry = self.progress.setdefault(file_name, {})
+        entry.update(info, status = status, updated_at = time.time())
+        print('file_name:', file_name, '|', status, info if info else '')
+        if self.on_progress is not None:
+            self.on_progress(file_name, dict(entry))
+
+    def _parse_executor(self, n_files: int):
+        # spawn한 worker는 시작(모듈 import)에 몇 초가 걸리므로, 파싱할 파일이 적으면 process를 띄우지 않고 스레드 하나에서 파싱합니다.
+        if n_files < self.process_pool_min_files or self.parse_workers <= 1:
+            return ThreadPoolExecutor(max_workers = 1)
+        # 서버(uvicorn)의 스레드 상태를 물려받지 않도록 spawn으로 worker를 만듭니다.
+        return ProcessPoolExecutor(max_workers = min(self.parse_workers, n_files), mp_context = multiprocessing.get_context('spawn'))
+
+    def run(self, file_names: list[str], workspace: str = None) -> dict:
+        """
+        Returns:
+            reports({file_name: 적재 리포트}) / failed({file_name: 에러 메세지}) / progress / elapsed
+        """
+        started = time.perf_counter()
+        reports, failed, plans = {}, {}, {}
+        for file_name in file_names:
+            self._update(file_name, 'queued')
+        for file_name in file_names:
+            try:
+                plan = self.service.plan_register(file_name, workspace = workspace)
+            except Exception as e:
+                failed[file_name] = str(e)
+                self._update(file_name, 'failed', error = str(e))
+                continue
+            if plan['skipped']:
+                reports[file_name] = plan['report']
+                self._update(file_name, 'skipped')
+            else:
+                plans[file_name] = plan
+
+        processor = self.service.processor
+        with self._parse_executor(len(plans)) as parse_executor, ThreadPoolExecutor(max_workers = self.llm_concurrency) as llm_executor:
+            pending = {}
+            for file_name in plans:
+                pending[parse_executor.submit(parse_document, f'./pdfs/{file_name}')] = ('parse', file_name, None)
+                self._update(file_name, 'parsing')
+
+            while pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    stage, file_name, parsed = pending.pop(future)
+                    try:
+                        if stage == 'parse':
+                            parsed = future.result()
+                            pending[llm_executor.submit(processor.name_finder, parsed['preview'], f'./pdfs/{file_name}')] = ('title', file_name, parsed)
+                            self._update(file_name, 'titling', n_page = parsed['n_page'])
+                            continue
+                        legal_name = future.result()
+                        self._update(file_name, 'writing', legal_name = legal_name)
+                        reports[file_name] = self._write(file_name, parsed, legal_name, plans[file_name], workspace)
+                        self._update(file_name, 'done', inserted = reports[file_name]['inserted'],
+                                     updated = reports[file_name]['updated'], deleted = reports[file_name]['deleted'])
+                    except Exception as e:
+                        failed[file_name] = f'{type(e).__name__}: {e}'
+                        self._update(file_name, 'failed', error = failed[file_name])
+
+        elapsed = time.perf_counter() - started
+        print(f'{len(file_names)}개 파일 적재 완료 ({elapsed:.1f}초, 건너뜀 {sum(r.get("skipped", False) for r in reports.values())}개, 실패 {len(failed)}개)')
+        return {'reports' : reports, 'failed' : failed, 'progress' : self.progress, 'elapsed' : elapsed}
+
+    def _write(self, file_name: str, parsed: dict, legal_name: str, plan: dict, workspace: str = None) -> dict:
+        processor = self.service.processor
+        path = f'./pdfs/{file_name}'
+        processor.file_path = path
+        processor.legal_name = legal_name
+        chunks = processor.compose_vectors(parsed['structure'], processor.load_documents(path))
+        return self.service.apply_chunks(file_name, chunks, plan, workspace = workspace)
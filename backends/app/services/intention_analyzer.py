@@ -1,5 +1,5 @@
 from langchain_openai import ChatOpenAI
-from app.core.llm.llm import OpenRouterLLM
+from app.core.llm.llm import get_llm
 from pydantic import BaseModel, Field
 import os
 
@@ -13,7 +13,7 @@ class IntentionAnalyzer:
         api_key = os.getenv("OPENROUTER_API_KEY")
         base_url = os.getenv("BASE_URL")
         model = os.getenv("MODEL")
-        self.llm = OpenRouterLLM()
+        self.llm = get_llm()
 
     async def analyze(self, question):
         system_prompt = """
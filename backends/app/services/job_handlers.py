@@ -0,0 +1,93 @@
+"""백그라운드 작업(JobRunner)으로 실행하는 오래 걸리는 작업들.
+
+- register / initialize: 문서 적재 (VDBService, 스레드에서 실행)
+- report: 기업 분석 보고서 생성 (ReportService, 스레드의 새 이벤트 루프에서 실행)
+
+dedup key가 같은 작업은 한 번만 실행되고, 끝난 결과는 JobStore에 저장되어 다시 요청하면 그대로 돌려줍니다.
+"""
+import asyncio
+import os
+import time
+from glob import glob
+
+from ..core.jobs.job_runner import register_job_handler
+from ..core.llm.client_registry import get_llm_registry
+from ..core.VDB.schema import file_hash
+from .report_service import ReportService
+from .vdb_service import VDBService
+
+# VectorDB를 리셋/삭제/복구하면 결과를 재사용하면 안 되는 작업들 (JobStore.expire)
+INGESTION_KINDS = ['register', 'initialize']
+
+
+def _file_fingerprint(path: str) -> str:
+    return file_hash(path) if os.path.exists(path) else 'missing'
+
+
+def register_dedup_key(file_names: list[str], workspace: str = None) -> str:
+    """같은 작업공간에 같은 내용의 파일들을 적재하는 작업이면 같은 key. (파일 내용이 바뀌면 새로 실행)"""
+    files = ','.join(f'{file_name}:{_file_fingerprint(f"./pdfs/{file_name}")}' for file_name in sorted(set(file_names)))
+    return f'{workspace or ""}|{files}'
+
+
+def initialize_dedup_key() -> str:
+    """./pdfs 폴더의 파일 목록과 내용이 같으면 같은 key."""
+    return register_dedup_key([path.split('/')[-1] for path in glob('./pdfs/*.pdf')])
+
+
+def report_dedup_key(corp_code: str) -> str:
+    """뉴스와 주가가 날마다 바뀌므로 기업 코드와 날짜로 보고서를 구분합니다."""
+    return f"{corp_code}|{time.strftime('%Y-%m-%d')}"
+
+
+def _ingestion_progress(progress, total: int):
+    files = {}
+
+    def on_progress(file_name: str, entry: dict):
+        files[file_name] = entry
+        finished = sum(e['status'] in ('done', 'skipped', 'failed') for e in files.values())
+        progress({'total' : total, 'finished' : finished, 'files' : files})
+    return on_progress
+
+
+def run_register(params: dict, progress) -> dict:
+    service = VDBService()
+    result = service.register_many(params['file_names'], workspace = params.get('workspace'),
+                                   on_progress = _ingestion_progress(progress, len(params['file_names'])))
+    result.pop('progress', None)
+    return result
+
+
+def run_initialize(params: dict, progress) -> dict:
+    service = VDBService()
+    result = service.initialize(on_progress = _ingestion_progress(progress, len(glob('./pdfs/*.pdf'))))
+    return result
+
+
+async def _generate_report(corp_code: str, on_progress = None) -> str:
+    try:
+        return await ReportService().generate_report(corp_code, on_progress = on_progress)
+    finally:
+        await get_llm_registry().aclose_loop()
+
+
+def generate_report_in_thread(corp_code: str, on_progress = None) -> str:
+    """보고서 워크플로우에는 동기 OpenDart 호출과 llm.call이 섞여 있어, 서버 이벤트 루프를 막지 않도록
+    호출한 스레드에서 새 이벤트 루프를 만들어 실행합니다. (asyncio.to_thread나 JobRunner의 동기 handler로 부르세요.)"""
+    return asyncio.run(_generate_report(corp_code, on_progress = on_progress))
+
+
+def run_report(params: dict, progress) -> dict:
+    steps = []
+
+    def on_progress(node: str):
+        steps.append(node)
+        progress({'steps' : steps, 'current' : node})
+
+    report = generate_report_in_thread(params['corp_code'], on_progress = on_progress)
+    return {'success' : True, 'report' : report}
+
+
+register_job_handler('register', run_register)
+register_job_handler('initialize', run_initialize)
+register_job_handler('report', run_report)
@@ -1,56 +1,80 @@
 from ..core.VDB.weaviateVDB import VectorDB
+from ..core.VDB.connection_manager import get_vector_db, get_async_vector_db, release_async_vector_db
 from ..core.Preprocessor.preprocessor import DocumentProcessor
-from weaviate.classes.config import Property, DataType
-from ..core.llm.llm import Midm, Gemini, OpenRouterLLM, SK, LG
+from ..core.VDB.index_config import IndexConfig
+from ..core.VDB.schema import LEGAL_DB_PROPERTIES
+from ..core.llm.llm import get_llm
 from glob import glob
 
 class RagService:
-    def __init__(self, url=None, http_port=None, grpc_port=None, llm_type:str = None):
-        self.vdb = VectorDB(url=url, http_port=http_port, grpc_port=grpc_port)
+    def __init__(self, url=None, http_port=None, grpc_port=None, llm_type:str = None, index_config: IndexConfig = None):
+        if url or http_port or grpc_port:
+            self.vdb = VectorDB(url=url, http_port=http_port, grpc_port=grpc_port)
+        else:
+            self.vdb = get_vector_db()
         if 'LegalDB' in self.vdb.show_collection():
             self.vdb.set_collection('LegalDB')
         else:
-            properties=[
-                Property(name="text", data_type=DataType.TEXT),
-                Property(name="n_char", data_type=DataType.INT),
-                Property(name="n_word", data_type=DataType.INT),
-                Property(name="i_page", data_type=DataType.INT),
-                Property(name="i_chunk_on_page", data_type=DataType.INT),
-                Property(name="n_chunk_of_page", data_type=DataType.INT),
-                Property(name="i_chunk_on_doc", data_type=DataType.INT),
-                Property(name="n_chunk_of_doc", data_type=DataType.INT),
-                Property(name="n_page", data_type=DataType.INT),
-                Property(name="name", data_type=DataType.TEXT),
-                Property(name="file_path", data_type=DataType.TEXT),
-                Property(name="file_name", data_type=DataType.TEXT)
-            ]
-            self.vdb.create_collection(name = 'LegalDB', properties=properties)
+            self.vdb.create_collection(name = 'LegalDB', properties=LEGAL_DB_PROPERTIES, index_config=index_config)
             self.vdb.set_collection('LegalDB')
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
+        self.avdb = None
+        self.llm = get_llm(llm_type)
 
-    def retriever(self, query:str, topk=4) -> dict:
+    def retriever(self, query:str, topk=4, neighbors: int = 0) -> dict:
         try:
             retrieved_documents = self.vdb.query_hybrid(query = query, topk = topk)
+            if neighbors:
+                retrieved_documents = self.vdb.expand_neighbors(retrieved_documents, window = neighbors)
             return {'success' : True, 'data' : retrieved_documents}
         except Exception as e:
             return {'success' : False, 'err_msg' : str(e)}
     
 
+    async def aretriever(self, query:str, topk=4, neighbors: int = 0) -> dict:
+        try:
+            if self.avdb is None:
+                self.avdb = await get_async_vector_db()
+                await self.avdb.set_collection('LegalDB')
+            retrieved_documents = await self.avdb.query_hybrid(query = query, topk = topk)
+            if neighbors:
+                retrieved_documents = await self.avdb.expand_neighbors(retrieved_documents, window = neighbors)
+            return {'success' : True, 'data' : retrieved_documents}
+        except Exception as e:
+            return {'success' : False, 'err_msg' : str(e)}
+        finally:
+            self.avdb = await release_async_vector_db(self.avdb)
+
     def generate_answer(self, query:str) -> dict:
         result = self.retriever(query = query, topk = 4)
         print(result)
         if result['success']:
             retrieved_documents = result['data']
-            context = "\n\n".join([doc['text'] for doc in retrieved_documents])
-            self.context = context
-            system_prompt = f"""
+            system_prompt, question = self._answer_prompt(query, retrieved_documents)
+            answer = self.llm.call(system_prompt = system_prompt,user_input= question)
+            if answer:
+                return {'success' : True, 'data' : answer, 'retrieved_documents' : retrieved_documents}
+            else:
+                return {'success' : False, 'err_msg' : 'LLM 응답 생성 실패'}
+        else:
+            return {'success' : False, 'err_msg' : 'Retriever에 실패하였습니다. VDB에 적재된 문서가 있는지 확인해 주세요.'}
+
+    async def agenerate_answer(self, query:str) -> dict:
+        result = await self.aretriever(query = query, topk = 4)
+        if result['success']:
+            retrieved_documents = result['data']
+            system_prompt, question = self._answer_prompt(query, retrieved_documents)
+            answer = await self.llm.acall(system_prompt = system_prompt,user_input= question)
+            if answer:
+                return {'success' : True, 'data' : answer, 'retrieved_documents' : retrieved_documents}
+            else:
+                return {'success' : False, 'err_msg' : 'LLM 응답 생성 실패'}
+        else:
+            return {'success' : False, 'err_msg' : 'Retriever에 실패하였습니다. VDB에 적재된 문서가 있는지 확인해 주세요.'}
+
+    def _answer_prompt(self, query:str, retrieved_documents:list[dict]) -> tuple[str, str]:
+        context = "\n\n".join([doc['text'] for doc in retrieved_documents])
+        self.context = context
+        system_prompt = f"""
 # 역할
 당신은 '문서 기반 팩트 체크 AI(Document-Based Fact-Checking AI)'입니다.
 사용자의 질문에 대해 제공된 **검색 결과(Context/RAG Result)**만을 근거로 신뢰도 높고 가독성 좋은 답변을 작성하십시오.
@@ -104,17 +128,11 @@ class RagService:
 - (본문 내 각 문장 아래에 출처를 표기했더라도, 이곳에서 전체 리스트를 한 번 더 정리합니다.)
 
 """
-            question = f"""
+        question = f"""
             [질문]
 {query}
 [검색된 문서] 
 {context}
             답변: """
-            answer = self.llm.call(system_prompt = system_prompt,user_input= question)
-            if answer:
-                return {'success' : True, 'data' : answer, 'retrieved_documents' : retrieved_documents}
-            else:
-                return {'success' : False, 'err_msg' : 'LLM 응답 생성 실패'}
-        else:
-            return {'success' : False, 'err_msg' : 'Retriever에 실패하였습니다. VDB에 적재된 문서가 있는지 확인해 주세요.'}
+        return system_prompt, question
 
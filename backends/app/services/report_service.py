@@ -14,16 +14,17 @@ class ReportService:
         """보고서 생성 워크플로우를 초기화."""
         self.workflow = report_workflow()
 
-    async def generate_report(self, corp_code: str) -> str:
+    async def generate_report(self, corp_code: str, on_progress=None) -> str:
         """기업 코드로 완전한 분석 보고서를 생성.
 
         Args:
             corp_code: 8자리 기업 코드 (예: "00126380")
+            on_progress: 워크플로우 노드가 끝날 때마다 노드 이름으로 호출할 함수
 
         Returns:
             마크다운 형식의 기업 분석 보고서
         """
-        return await self.workflow.run(corp_code)
+        return await self.workflow.run(corp_code, on_progress=on_progress)
 
     async def generate_report_by_identifier(self, identifier: str) -> str:
         """종목 코드 또는 기업 코드로 분석 보고서를 생성.
@@ -2,7 +2,7 @@ import asyncio
 import os
 from datetime import datetime, timedelta
 from langgraph.graph import StateGraph, START, END
-from app.core.llm.llm import OpenRouterLLM, SK, LG, Gemini
+from app.core.llm.llm import get_llm
 from app.core.financial_searchengine.dart_extractor import DartExtractor
 from app.core.financial_searchengine.financial_statements_extractor import (
     financial_statements_extractor,
@@ -17,6 +17,13 @@ import markdown
 from dotenv import load_dotenv
 load_dotenv()
 
+# 입력이 같으면 답도 같은 LLM 하위 작업의 응답 캐시 기간 (초)
+# - 재무제표 지표/수익성 데이터 추출: 같은 재무제표 텍스트 (다음 공시 전까지 그대로)
+# - 뉴스 카테고리 분류: 같은 뉴스 묶음 (같은 날 같은 기업 보고서를 다시 만들 때)
+# 캐시하는 호출은 temperature=0으로 부르고, 파싱되는 응답만 저장합니다. (cache_validate)
+FINANCIAL_EXTRACTION_CACHE_TTL = int(os.getenv('FINANCIAL_EXTRACTION_CACHE_TTL', 7 * 24 * 3600))
+NEWS_CATEGORY_CACHE_TTL = int(os.getenv('NEWS_CATEGORY_CACHE_TTL', 24 * 3600))
+
 class report_workflow:
     """LangGraph 기반 기업 분석 보고서 생성 워크플로우.
 
@@ -26,14 +33,7 @@ class report_workflow:
 
     def __init__(self, llm_type:str = None):
         load_dotenv()
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
+        self.llm = get_llm(llm_type)
         self.dart_extractor = DartExtractor()
         self.financial_extractor = financial_statements_extractor()
         self.workflow = self.setup()
@@ -382,11 +382,12 @@ class report_workflow:
 
         return workflow.compile()
 
-    async def run(self, corp_code: str) -> str:
+    async def run(self, corp_code: str, on_progress=None) -> str:
         """기업 코드로 전체 리포트 생성 워크플로우를 실행.
 
         Args:
             corp_code: 8자리 기업 코드 (ex: "00126380")
+            on_progress: 노드가 끝날 때마다 노드 이름으로 호출할 함수 (백그라운드 작업 진행 상황용)
 
         Returns:
             HTML 형식의 기업 분석 보고서
@@ -407,8 +408,17 @@ class report_workflow:
             final_report=""
         )
 
-        result = await self.workflow.ainvoke(input=input_state)
-        return result["final_report"]
+        if on_progress is None:
+            result = await self.workflow.ainvoke(input=input_state)
+            return result["final_report"]
+
+        final_report = ""
+        async for update in self.workflow.astream(input=input_state, stream_mode="updates"):
+            for node, values in update.items():
+                on_progress(node)
+                if values and values.get("final_report"):
+                    final_report = values["final_report"]
+        return final_report
 
     # 기존 ReportService의 헬퍼 메서드들 (필요한 것들만 포함)
     def _format_company_info(self, company_info_dict: dict) -> str:
@@ -449,6 +459,13 @@ class report_workflow:
 *   **홈페이지:** {hm_url}
 *   **시장 구분:** {corp_cls} (종목코드: {stock_code})"""
 
+    def _is_valid_json_response(self, response: str, expected_type: str, required_key: str = None) -> bool:
+        """응답이 기대한 JSON 타입(그리고 required_key)으로 파싱되는지. 통과한 응답만 LLM 응답 캐시에 저장합니다."""
+        parsed = self._extract_json_from_response(response, expected_type)
+        if expected_type == "array":
+            return isinstance(parsed, list) and len(parsed) > 0
+        return isinstance(parsed, dict) and (required_key is None or required_key in parsed)
+
     def _extract_json_from_response(self, response: str, expected_type: str = "array") -> dict | list | None:
         """LLM 텍스트 응답에서 JSON 데이터를 파싱.
 
@@ -513,7 +530,9 @@ class report_workflow:
 
         try:
             response = await self.llm.acall(
-                system_prompt=categorize_prompt, user_input=input_text
+                system_prompt=categorize_prompt, user_input=input_text, temperature=0,
+                cache_ttl=NEWS_CATEGORY_CACHE_TTL,
+                cache_validate=lambda r: self._is_valid_json_response(r, "array")
             )
 
             categorized_list = self._extract_json_from_response(response, "array")
@@ -717,7 +736,9 @@ class report_workflow:
 
         try:
             response = await self.llm.acall(
-                system_prompt=feature_extraction_prompt, user_input=financial_statement
+                system_prompt=feature_extraction_prompt, user_input=financial_statement, temperature=0,
+                cache_ttl=FINANCIAL_EXTRACTION_CACHE_TTL,
+                cache_validate=lambda r: self._is_valid_json_response(r, "object", "features")
             )
 
             result = self._extract_json_from_response(response, "object")
@@ -769,7 +790,9 @@ class report_workflow:
 
         try:
             response = await self.llm.acall(
-                system_prompt=profitability_extraction_prompt, user_input=financial_statement
+                system_prompt=profitability_extraction_prompt, user_input=financial_statement, temperature=0,
+                cache_ttl=FINANCIAL_EXTRACTION_CACHE_TTL,
+                cache_validate=lambda r: self._is_valid_json_response(r, "object", "profitability_data")
             )
 
             result = self._extract_json_from_response(response, "object")
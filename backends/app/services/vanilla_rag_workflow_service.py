@@ -1,8 +1,10 @@
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableLambda
 from langchain.schema.messages import HumanMessage, SystemMessage
-from app.core.llm.llm import Midm, Gemini, OpenRouterLLM, SK, LG
-from app.core.VDB.weaviateVDB import VectorDB
+from app.core.llm.llm import get_llm
+from app.core.VDB.connection_manager import get_vector_db, get_async_vector_db, release_async_vector_db
 from dotenv import load_dotenv
 from app.schemas.langraph_states.state_models import vanilla_rag_state
 
@@ -10,28 +12,49 @@ from app.schemas.langraph_states.state_models import vanilla_rag_state
 class vanilla_rag_workflow:
     def __init__(self, llm_type:str = None):
         load_dotenv()
-        self.vdb = VectorDB()
-        self.vdb.set_collection('LegalDB')
+        # VDB는 실행 방식에 맞는 것만 처음 실행할 때 연결합니다. (arun/astream_events는 async client만 사용하므로 이벤트 루프를 막지 않습니다.)
+        self.vdb = None
+        self.avdb = None
         self.workflow = self.setup()
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
+        self.llm = get_llm(llm_type)
 
     def retriever(self, state: vanilla_rag_state, topk=4, alpha = 0.5) -> vanilla_rag_state:
         question = state.user_question
         try:
             retrieved_documents = self.vdb.query_hybrid(query = question, topk = topk, alpha = alpha)
+            if state.neighbors:
+                retrieved_documents = self.vdb.expand_neighbors(retrieved_documents, window = state.neighbors)
             return {'retrieved_documents' : retrieved_documents}
         except Exception as e:
             print(f'retriever 과정 중 오류 발생 : {e} 빈 리스트를 return 합니다.')
             return {'retrieved_documents' : []}
     
+    async def aretriever(self, state: vanilla_rag_state, topk=4, alpha = 0.5) -> vanilla_rag_state:
+        question = state.user_question
+        try:
+            retrieved_documents = await self.avdb.query_hybrid(query = question, topk = topk, alpha = alpha)
+            if state.neighbors:
+                retrieved_documents = await self.avdb.expand_neighbors(retrieved_documents, window = state.neighbors)
+            return {'retrieved_documents' : retrieved_documents}
+        except Exception as e:
+            print(f'retriever 과정 중 오류 발생 : {e} 빈 리스트를 return 합니다.')
+            return {'retrieved_documents' : []}
+
     def generation(self, state: vanilla_rag_state) -> vanilla_rag_state:
+        system_prompt, question = self._generation_prompt(state)
+        answer = self.llm.call(system_prompt=system_prompt, user_input = question)
+        return {'answer' : answer}
+
+    async def ageneration(self, state: vanilla_rag_state) -> vanilla_rag_state:
+        system_prompt, question = self._generation_prompt(state)
+        on_token = None
+        if state.stream:
+            writer = get_stream_writer()
+            on_token = lambda token: writer({'token' : token})
+        answer = await self.llm.acall(system_prompt=system_prompt, user_input = question, on_token = on_token)
+        return {'answer' : answer}
+
+    def _generation_prompt(self, state: vanilla_rag_state) -> tuple[str, str]:
         question = state.user_question
         retrieved_documents = state.retrieved_documents
         contexts = "\n\n".join([doc['text'] for doc in retrieved_documents])
@@ -95,25 +118,71 @@ class vanilla_rag_workflow:
         [검색된 문서] 
         {contexts}
         답변: """
-        answer = self.llm.call(system_prompt=system_prompt, user_input = question)
+        return system_prompt, question
 
-        return {'answer' : answer}
     def setup(self):
+        # 각 노드는 동기/비동기 구현을 모두 가지므로 run()은 invoke, arun()은 ainvoke로 실행됩니다.
         workflow = StateGraph(vanilla_rag_state)
-        workflow.add_node(self.retriever, "retriever")
-        workflow.add_node(self.generation, "generation")
+        workflow.add_node("retriever", RunnableLambda(self.retriever, afunc=self.aretriever))
+        workflow.add_node("generation", RunnableLambda(self.generation, afunc=self.ageneration))
         workflow.add_edge(START, "retriever")
         workflow.add_edge("retriever", "generation")
         workflow.add_edge("generation", END)
         workflow = workflow.compile()        
         return workflow
 
-    def run(self, question):
-        input = vanilla_rag_state(user_question=question, retrieved_documents=[{}], answer='')
+    def run(self, question, tenants: list[str] = None, neighbors: int = 0):
+        input = vanilla_rag_state(user_question=question, retrieved_documents=[{}], answer='', neighbors=neighbors)
         try:
+            if self.vdb is None:
+                self.vdb = get_vector_db()
+                self.vdb.set_collection('LegalDB')
+            self.vdb.set_tenants(tenants)
             result = self.workflow.invoke(input=input)
             response = {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents']}
             return response
         except Exception as e:
             response = {'success' : False, 'err_msg' : e}
             return response
+
+    async def arun(self, question, tenants: list[str] = None, neighbors: int = 0):
+        input = vanilla_rag_state(user_question=question, retrieved_documents=[{}], answer='', neighbors=neighbors)
+        try:
+            if self.avdb is None:
+                self.avdb = await get_async_vector_db()
+                await self.avdb.set_collection('LegalDB')
+            self.avdb.set_tenants(tenants)
+            result = await self.workflow.ainvoke(input=input)
+            response = {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents']}
+            return response
+        except Exception as e:
+            response = {'success' : False, 'err_msg' : e}
+            return response
+        finally:
+            self.avdb = await release_async_vector_db(self.avdb)
+
+    async def astream_events(self, question, tenants: list[str] = None, neighbors: int = 0):
+        """arun과 같은 워크플로우를 실행하면서 (이벤트, 데이터)를 차례로 내보내는 async generator.
+
+        retrieved_documents(검색 직후) → token(답변 조각, 여러 번) → done(arun과 같은 응답) 순서이며, 실패하면 error를 보냅니다.
+        """
+        input = vanilla_rag_state(user_question=question, retrieved_documents=[{}], answer='', neighbors=neighbors, stream=True)
+        try:
+            if self.avdb is None:
+                self.avdb = await get_async_vector_db()
+                await self.avdb.set_collection('LegalDB')
+            self.avdb.set_tenants(tenants)
+            result = {}
+            async for mode, chunk in self.workflow.astream(input=input, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    yield 'token', chunk['token']
+                    continue
+                for node, update in chunk.items():
+                    result.update(update or {})
+                    if node == 'retriever':
+                        yield 'retrieved_documents', update['retrieved_documents']
+            yield 'done', {'success' : True, 'answer' : result['answer'], 'retrieved_documents' : result['retrieved_documents']}
+        except Exception as e:
+            yield 'error', {'success' : False, 'err_msg' : e}
+        finally:
+            self.avdb = await release_async_vector_db(self.avdb)
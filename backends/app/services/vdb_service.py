@@ -1,77 +1,156 @@
 from ..core.VDB.weaviateVDB import VectorDB
+from ..core.VDB.connection_manager import get_vector_db
 from ..core.Preprocessor.preprocessor import DocumentProcessor
-from weaviate.classes.config import Property, DataType
+from ..core.VDB.index_config import IndexConfig
+from ..core.VDB.schema import LEGAL_DB_PROPERTIES, file_hash, content_hash, chunk_uuids
+from ..core.VDB.tenancy import tenant_key
+from ..core.VDB.snapshot import default_snapshot_path
 from ..core.llm.llm import Midm
+from .ingestion_orchestrator import IngestionOrchestrator
 from glob import glob
-from weaviate.classes.query import Filter
 import time
 
 class VDBService:
-    def __init__(self, url=None, http_port=None, grpc_port=None):
+    def __init__(self, url=None, http_port=None, grpc_port=None, index_config: IndexConfig = None):
         self.url = url
-        self.vdb = VectorDB(url=url, http_port=http_port, grpc_port=grpc_port)
+        if url or http_port or grpc_port:
+            self.vdb = VectorDB(url=url, http_port=http_port, grpc_port=grpc_port)
+        else:
+            self.vdb = get_vector_db()
         if 'LegalDB' in self.vdb.show_collection():
             self.vdb.set_collection('LegalDB')
+            self.vdb.ensure_properties(LEGAL_DB_PROPERTIES)
         else:
-            properties=[
-                Property(name="text", data_type=DataType.TEXT),
-                Property(name="n_char", data_type=DataType.INT),
-                Property(name="n_word", data_type=DataType.INT),
-                Property(name="i_page", data_type=DataType.INT),
-                Property(name="i_chunk_on_page", data_type=DataType.INT),
-                Property(name="n_chunk_of_page", data_type=DataType.INT),
-                Property(name="i_chunk_on_doc", data_type=DataType.INT),
-                Property(name="n_chunk_of_doc", data_type=DataType.INT),
-                Property(name="n_page", data_type=DataType.INT),
-                Property(name="name", data_type=DataType.TEXT),
-                Property(name="file_path", data_type=DataType.TEXT),
-                Property(name="file_name", data_type=DataType.TEXT)
-            ]
-            self.vdb.create_collection(name = 'LegalDB', properties=properties)
+            self.vdb.create_collection(name = 'LegalDB', properties=LEGAL_DB_PROPERTIES, index_config=index_config)
             self.vdb.set_collection('LegalDB')
         self.processor = DocumentProcessor()
 
-    def initialize(self, url=None, http_prot = None, grpc_port = None):
+    def initialize(self, url=None, http_prot = None, grpc_port = None, on_progress = None):
+        """./pdfs 폴더와 collection을 동기화합니다.
+
+        collection을 지우지 않고 파일별로 register의 증분 적재를 (register_many로 병렬) 수행하며, ./pdfs에서 사라진 파일의 chunk는 삭제합니다.
+        사라진 파일은 파일 목록(manifest)으로 찾으므로, 그 전에 manifest가 weaviate와 어긋났으면 다시 집계합니다.
+        """
         try:
             paths = glob('./pdfs/*.pdf')
             files = [path.split('/')[-1] for path in paths]
-            self.vdb.reset()
-            self.__init__(url = url, http_port = http_prot, grpc_port = grpc_port)
-            for file_name in files:
-                response = self.register(file_name = file_name)
-                if response['success']:
-                    continue
-                else:
-                    print(file_name, '적재 중 오류 발생', response['err_msg'])
-            return {'success' : True, 'files' : paths}
+            if url or http_prot or grpc_port:
+                self.__init__(url = url, http_port = http_prot, grpc_port = grpc_port)
+            response = self.register_many(files, on_progress = on_progress)
+            reports = response.get('reports', {})
+            for file_name, err_msg in response.get('failed', {}).items():
+                print(file_name, '적재 중 오류 발생', err_msg)
+
+            self.vdb.set_tenants(None)
+            manifest_rebuilt = self.vdb.reconcile_file_manifest()
+            removed_files = [g['file_name'] for g in self.vdb.show_files_in_collection() if g['file_name'] not in files]
+            for file_name in removed_files:
+                self._delete_file(file_name)
+            return {'success' : True, 'files' : paths, 'reports' : reports, 'removed_files' : removed_files, 'manifest_rebuilt' : manifest_rebuilt}
 
         except Exception as e:
             print('Error during initialization:', str(e))
             return {'success' : False, 'err_msg' : str(e)}
 
-    def register(self, file_name):
+    def _use_tenant(self, file_name: str = None, workspace: str = None):
+        """LegalDB가 멀티테넌트면 파일이 속한 tenant(작업공간 또는 문서군)를 적재/삭제 대상으로 지정합니다."""
+        if self.vdb.is_multi_tenant():
+            self.vdb.set_tenant(tenant_key(file_name = file_name, workspace = workspace))
+
+    def register(self, file_name, workspace: str = None):
+        """파일을 증분 적재합니다. (멀티테넌트면 workspace 또는 문서군 tenant에 적재)
+
+        파일 해시가 이미 적재된 것과 같으면 파싱/임베딩 없이 건너뜁니다.
+        달라졌다면 chunk별 content_hash로 만든 uuid를 기존 chunk와 비교하여
+        새로 생긴 chunk만 임베딩/적재하고, 사라진 chunk는 삭제하며, 내용은 같고 위치 정보만 바뀐 chunk는 프로퍼티만 수정합니다.
+        """
         path = f'./pdfs/{file_name}'
         try:
-            chunks = self.processor.preprocess(file_path = path)
             if self.vdb.check(name = 'LegalDB'):
-                objects = [{'text' : chunk.text,
-                            'n_char' : chunk.n_char,
-                            'n_word' : chunk.n_word,
-                            'i_page' : chunk.i_page,
-                            'i_chunk_on_page' : chunk.i_chunk_on_page,
-                            'n_chunk_of_page' : chunk.n_chunk_of_page,
-                            'i_chunk_on_doc' : chunk.i_chunk_on_doc,
-                            'n_chunk_of_doc' : chunk.n_chunk_of_doc,
-                            'n_page' : chunk.n_page,
-                            'name' : chunk.name,
-                            'file_path' : chunk.file_path,
-                             'file_name' : chunk.file_name } for chunk in chunks]
-                self.vdb.add_objects(objects = objects, file_name = file_name)
-                return {'success' : True, 'err_msg' : None}
+                plan = self.plan_register(file_name, workspace = workspace)
+                if plan['skipped']:
+                    return {'success' : True, 'err_msg' : None, 'report' : plan['report']}
+                chunks = self.processor.preprocess(file_path = path)
+                report = self.apply_chunks(file_name, chunks, plan, workspace = workspace)
+                return {'success' : True, 'err_msg' : None, 'report' : report}
 
         except Exception as e:
             print('Error during initialization:', str(e))
             return {'success' : False, 'err_msg' : str(e)}
+
+    def plan_register(self, file_name, workspace: str = None) -> dict:
+        """register의 첫 단계. 파일 해시와 이미 적재된 chunk를 조회하여 파싱이 필요한지 판단합니다.
+
+        Returns:
+            skipped(변경 없음) / report(skipped일 때) / file_hash / existing({uuid: properties})
+        """
+        self._use_tenant(file_name = file_name, workspace = workspace)
+        new_file_hash = file_hash(f'./pdfs/{file_name}')
+        existing = self.vdb.fetch_file_objects(file_name)
+        if existing and all(properties.get('file_hash') == new_file_hash for properties in existing.values()):
+            print('file_name:', file_name, '| 변경 사항이 없어 적재를 건너뜁니다.')
+            report = {'skipped' : True, 'total' : len(existing), 'inserted' : 0, 'updated' : 0, 'deleted' : 0, 'failed' : []}
+            return {'skipped' : True, 'report' : report, 'file_hash' : new_file_hash, 'existing' : existing}
+        return {'skipped' : False, 'report' : None, 'file_hash' : new_file_hash, 'existing' : existing}
+
+    def apply_chunks(self, file_name, chunks, plan: dict, workspace: str = None) -> dict:
+        """register의 마지막 단계. 파싱한 chunks를 plan(plan_register 결과)의 기존 chunk와 비교하여 적재/수정/삭제합니다."""
+        self._use_tenant(file_name = file_name, workspace = workspace)
+        existing = plan['existing']
+        objects = [{'text' : chunk.text,
+                    'n_char' : chunk.n_char,
+                    'n_word' : chunk.n_word,
+                    'i_page' : chunk.i_page,
+                    'i_chunk_on_page' : chunk.i_chunk_on_page,
+                    'n_chunk_of_page' : chunk.n_chunk_of_page,
+                    'i_chunk_on_doc' : chunk.i_chunk_on_doc,
+                    'n_chunk_of_doc' : chunk.n_chunk_of_doc,
+                    'n_page' : chunk.n_page,
+                    'name' : chunk.name,
+                    'file_path' : chunk.file_path,
+                     'file_name' : chunk.file_name } for chunk in chunks]
+        for object in objects:
+            object['content_hash'] = content_hash(object)
+            object['file_hash'] = plan['file_hash']
+            object['tenant'] = tenant_key(file_name = file_name, workspace = workspace)
+        uuids = chunk_uuids(file_name, [object['content_hash'] for object in objects])
+
+        new_objects, new_uuids, n_updated = [], [], 0
+        for uuid, object in zip(uuids, objects):
+            if uuid not in existing:
+                new_objects.append(object)
+                new_uuids.append(uuid)
+            elif any(existing[uuid].get(key) != value for key, value in object.items()):
+                self.vdb.update_properties(uuid = uuid, properties = {key: value for key, value in object.items() if key != 'text'})
+                n_updated += 1
+        uuid_set = set(uuids)
+        removed = [uuid for uuid in existing if uuid not in uuid_set]
+        if removed:
+            self.vdb.delete_by_ids(removed, file_name = file_name)
+
+        print('file_name:', file_name, f'| 신규 {len(new_objects)}개, 수정 {n_updated}개, 삭제 {len(removed)}개, 유지 {len(objects) - len(new_objects) - n_updated}개')
+        if new_objects:
+            report = self.vdb.add_objects(objects = new_objects, file_name = file_name, uuids = new_uuids)
+        else:
+            report = {'total' : 0, 'inserted' : 0, 'failed' : []}
+        report.update({'skipped' : False, 'updated' : n_updated, 'deleted' : len(removed)})
+        return report
+
+    def register_many(self, file_names: list[str], workspace: str = None, on_progress = None) -> dict:
+        """여러 파일을 IngestionOrchestrator로 병렬 적재합니다. (파싱은 process pool, 법령 제목/임베딩은 동시 호출)
+
+        Returns:
+            success / reports({file_name: 리포트}) / failed({file_name: 에러 메세지})
+        """
+        try:
+            if not self.vdb.check(name = 'LegalDB'):
+                return {'success' : False, 'err_msg' : 'LegalDB collection이 weaviate VDB 내에 존재하지 않습니다.'}
+            orchestrator = IngestionOrchestrator(self, on_progress = on_progress)
+            result = orchestrator.run(file_names, workspace = workspace)
+            return {'success' : not result['failed'], 'err_msg' : None if not result['failed'] else str(result['failed']), **result}
+        except Exception as e:
+            print('Error during ingestion:', str(e))
+            return {'success' : False, 'err_msg' : str(e)}
         
     def reset(self):
         try:        
@@ -98,11 +177,57 @@ class VDBService:
         except Exception as e:
             return {'success' : False, 'err_msg' : str(e)}
         
-    def delete_objects_from_file_name(self, file_name):
+    def _delete_file(self, file_name, workspace: str = None):
+        self._use_tenant(file_name = file_name, workspace = workspace)
+        self.vdb.delete_file(file_name)
+        # 멀티테넌트면 파일이 빠져 비게 된 tenant도 정리합니다.
+        if self.vdb.tenant and not self.vdb.show_files_in_collection():
+            self.vdb.delete_tenant(tenant_key(file_name = file_name, workspace = workspace))
+
+    def delete_objects_from_file_name(self, file_name, workspace: str = None):
+        try:
+            self._delete_file(file_name, workspace = workspace)
+            return {'success' : True}
+        except Exception as e:
+            return {'success' : False, 'err_msg' : str(e)}
+
+    def delete_tenant(self, tenant: str):
+        """문서군 또는 작업공간 tenant를 통째로 삭제합니다. (멀티테넌트 LegalDB 전용)"""
         try:
-            filter = Filter.by_property("file_name").equal(file_name)
-            self.vdb.delete_obejcts(filter = filter)
+            if not self.vdb.is_multi_tenant():
+                return {'success' : False, 'err_msg' : 'LegalDB가 멀티테넌트 collection이 아닙니다. (VDB_MULTI_TENANCY)'}
+            self.vdb.delete_tenant(tenant)
             return {'success' : True}
         except Exception as e:
             return {'success' : False, 'err_msg' : str(e)}
         
+
+    def migrate_schema(self):
+        """LegalDB를 현재 스키마(LEGAL_DB_PROPERTIES)로 다시 만듭니다. 이전 collection의 name/file_name이 FIELD 토큰화가 아닐 때 사용합니다."""
+        try:
+            self.vdb.set_collection('LegalDB')
+            mismatched = self.vdb.ensure_properties(LEGAL_DB_PROPERTIES)
+            if not mismatched:
+                return {'success' : True, 'migrated' : []}
+            self.vdb.ensure_properties(LEGAL_DB_PROPERTIES, migrate = True)
+            return {'success' : True, 'migrated' : mismatched}
+        except Exception as e:
+            return {'success' : False, 'err_msg' : f'스키마 마이그레이션에 실패하였습니다. 오류 : {e}'}
+
+    def snapshot(self, path: str = None):
+        """LegalDB의 object를 벡터와 함께 스냅샷 파일로 저장합니다. path가 없으면 SNAPSHOT_DIR 아래에 만듭니다."""
+        try:
+            self.vdb.set_tenants(None)
+            path = path or default_snapshot_path(self.vdb.collection.name)
+            meta = self.vdb.export_snapshot(path)
+            return {'success' : True, 'path' : path, 'meta' : meta}
+        except Exception as e:
+            return {'success' : False, 'err_msg' : f'스냅샷 저장에 실패하였습니다. 오류 : {e}'}
+
+    def restore(self, path: str):
+        """스냅샷을 LegalDB에 다시 적재합니다. PDF 파싱과 임베딩 호출 없이 저장된 벡터를 그대로 사용합니다."""
+        try:
+            report = self.vdb.import_snapshot(path)
+            return {'success' : True, 'report' : report}
+        except Exception as e:
+            return {'success' : False, 'err_msg' : f'스냅샷 복구에 실패하였습니다. 오류 : {e}'}
@@ -1,7 +1,8 @@
 import asyncio
 from datetime import datetime
 from langgraph.graph import StateGraph, START, END
-from app.core.llm.llm import Midm, SK, LG, Gemini, OpenRouterLLM
+from langgraph.config import get_stream_writer
+from app.core.llm.llm import get_llm
 from app.core.web_search_agent.embedding import get_naver_embedding, cosine_similarity
 from app.core.web_search_agent.web_search import WebSearchTool
 from app.schemas.langraph_states.state_models import web_agent_state
@@ -19,14 +20,7 @@ class web_agent_workflow:
         load_dotenv()
 
         # llm_type에 따라 적절한 LLM 인스턴스 생성
-        if llm_type == "SK":
-            self.llm = SK()
-        elif llm_type == "LG":
-            self.llm = LG()
-        elif llm_type == 'Gemini':
-            self.llm = Gemini()
-        else:
-            self.llm = OpenRouterLLM()
+        self.llm = get_llm(llm_type)
         
         if web_search_tool_class is None:
             self.web_search_tool_class = WebSearchTool
@@ -182,18 +176,23 @@ class web_agent_workflow:
                 "search_results": []
             }
 
+        on_token = None
+        if state.stream:
+            writer = get_stream_writer()
+            on_token = lambda token: writer({"token": token})
+
         print(f"[3/5] 유사도 평균 ({avg_similarity:.4f}) 기반 답변 방식 결정 (임계치: {self.similarity_threshold})")
 
         try:
             if avg_similarity >= self.similarity_threshold:
                 # 고유사도: LLM이 문서를 참고해 통합 답변 생성
                 print("[4/5] 고유사도 모드: 통합 분석 답변 생성")
-                final_answer = await self._create_integrated_answer(question, filtered_docs)
+                final_answer = await self._create_integrated_answer(question, filtered_docs, on_token)
                 answer_type = "통합_분석"
             else:
                 # 저유사도: 문서별 요약 제공
                 print("[4/5] 저유사도 모드: 문서별 요약 제공")
-                final_answer = await self._create_document_summary(question, filtered_docs)
+                final_answer = await self._create_document_summary(question, filtered_docs, on_token)
                 answer_type = "문서별_요약"
 
             print("[5/5] 최종 답변 완료")
@@ -219,8 +218,8 @@ class web_agent_workflow:
                 "search_results": []
             }
 
-    async def _create_integrated_answer(self, question: str, documents: list[dict]) -> str:
-        """문서들을 종합적으로 분석하여 통합 답변을 생성합니다."""
+    async def _create_integrated_answer(self, question: str, documents: list[dict], on_token=None) -> str:
+        """문서들을 종합적으로 분석하여 통합 답변을 생성합니다. on_token이 있으면 답변 토큰을 생성되는 대로 전달합니다."""
         context = self._format_context(documents)
 
         if not context:
@@ -244,7 +243,7 @@ class web_agent_workflow:
         )
 
         # LLM으로 답변 생성
-        llm_answer = await self.llm.acall(system_prompt=answer_prompt, user_input=answer_content)
+        llm_answer = await self.llm.acall(system_prompt=answer_prompt, user_input=answer_content, on_token=on_token)
 
         # 실제 사용된 문서들로 참고 자료 섹션 직접 생성
         reference_section = "\n## 참고 자료\n\n"
@@ -255,11 +254,15 @@ class web_agent_workflow:
             
             # 리스트 항목은 반드시 한 줄 시작 부분에 '-' 위치
             reference_section += f"- [{title}]({link}): {snippet[:100]}{'...' if len(snippet) > 100 else ''}\n"
+        if on_token and llm_answer:
+            on_token(reference_section)
         return llm_answer + reference_section
 
-    async def _create_document_summary(self, question: str, documents: list[dict]) -> str:
-        """문서별로 요약을 생성하여 Markdown 형태로 반환합니다."""
+    async def _create_document_summary(self, question: str, documents: list[dict], on_token=None) -> str:
+        """문서별로 요약을 생성하여 Markdown 형태로 반환합니다. on_token이 있으면 문서 하나의 요약이 끝날 때마다 전달합니다."""
         summary_parts = ["## 문서별 요약\n\n다음은 질문하신 내용에 대한 관련 문서 목록입니다.\n"]
+        if on_token:
+            on_token(summary_parts[0])
 
         for idx, doc in enumerate(documents, 1):
             summary_prompt = (
@@ -278,6 +281,8 @@ class web_agent_workflow:
                 f"- **내용 요약**: {summary if summary else doc.get('snippet', 'N/A')}\n"
                 f"- **출처**: [{doc.get('title', 'N/A')}]({doc.get('link', 'N/A')})\n"
             )
+            if on_token:
+                on_token("\n" + summary_parts[-1])
 
         return "\n".join(summary_parts)
 
@@ -356,4 +361,48 @@ class web_agent_workflow:
                 "success": False,
                 "answer": f"워크플로우 실행 중 오류가 발생했습니다: {str(e)}",
                 "search_results": []
-            }
\ No newline at end of file
+            }
+
+    async def astream_events(self, question: str):
+        """run과 같은 워크플로우를 실행하면서 (이벤트, 데이터)를 차례로 내보내는 async generator.
+
+        search_results(문서 필터링 직후) → token(답변 조각, 여러 번) → done(run과 같은 응답) 순서이며, 실패하면 error를 보냅니다.
+        token을 이어붙인 결과가 최종 답변과 다를 수 있으므로(답변 생성 실패 등) 최종 답변은 done의 answer를 사용하세요.
+
+        Args:
+            question: 사용자 질문
+
+        Yields:
+            (이벤트 이름, 데이터) 튜플
+        """
+        print(f"\n--- 웹 검색 에이전트 시작 (스트리밍) ---")
+
+        input_state = web_agent_state(user_question=question, stream=True)
+
+        try:
+            result = {}
+            async for mode, chunk in self.workflow.astream(input=input_state, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    yield "token", chunk["token"]
+                    continue
+                for node, update in chunk.items():
+                    result.update(update or {})
+                    if node == "document_filter":
+                        yield "search_results", update["filtered_documents"]
+
+            yield "done", {
+                "success": True,
+                "answer": result["final_answer"],
+                "search_results": result["search_results"],
+                "answer_type": result["answer_type"],
+                "similarity_score": result.get("similarity_score", 0.0),
+                "similarity_threshold": self.similarity_threshold
+            }
+
+        except Exception as e:
+            print(f"[오류] 워크플로우 실행 중 오류 발생: {e}")
+            yield "error", {
+                "success": False,
+                "answer": f"워크플로우 실행 중 오류가 발생했습니다: {str(e)}",
+                "search_results": []
+            }
@@ -0,0 +1,139 @@
+"""LegalDB 벡터 인덱스/압축 설정별 recall@k 와 검색 지연시간(p50/p95) 벤치마크.
+
+./pdfs 의 법령 문서를 파싱/임베딩한 뒤 설정마다 임시 collection을 만들어 같은 벡터를 적재하고,
+numpy 전수 검색(정답) 대비 recall@k 와 near_vector 검색 지연시간을 측정합니다.
+질의는 조문 이름(name)을 임베딩한 벡터를 사용합니다.
+
+사용법 (backends 디렉토리에서, weaviate 실행 필요):
+    python -m benchmarks.index_benchmark --k 10 --queries 200
+    EMBEDDING_PROVIDER=hashing python -m benchmarks.index_benchmark   # 외부망 없이 실행
+
+참고: pq는 training_limit(weaviate 기본 10만)개 이상 적재되어야 압축이 시작되므로 작은 corpus에서는 무압축과 같게 측정됩니다.
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from glob import glob
+
+import numpy as np
+from weaviate.classes.data import DataObject
+
+from app.core.Preprocessor.preprocessor import DocumentProcessor
+from app.core.VDB.embedding_provider import create_embedding_model
+from app.core.VDB.index_config import IndexConfig
+from app.core.VDB.schema import LEGAL_DB_PROPERTIES
+from app.core.VDB.weaviateVDB import connect_weaviate
+
+CONFIGS = [
+    IndexConfig(),
+    IndexConfig(ef=64, max_connections=16),
+    IndexConfig(ef=256, max_connections=64),
+    IndexConfig(quantizer='pq'),
+    IndexConfig(quantizer='bq', rescore_limit=200),
+    IndexConfig(quantizer='sq', rescore_limit=200),
+    IndexConfig(index_type='flat'),
+    IndexConfig(index_type='flat', quantizer='bq', rescore_limit=200),
+]
+
+
+def load_corpus(pdf_dir: str) -> list[dict]:
+    processor = DocumentProcessor()
+    objects = []
+    for path in sorted(glob(f'{pdf_dir}/*.pdf')):
+        for chunk in processor.preprocess(file_path=path):
+            objects.append({'text': chunk.text, 'name': chunk.name, 'file_name': chunk.file_name,
+                            'i_page': chunk.i_page, 'n_page': chunk.n_page})
+    return objects
+
+
+def embed(embedding_model, texts: list[str], batch_size: int = 64) -> np.ndarray:
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        for result in embedding_model.embed_documents(texts[start:start + batch_size]):
+            if 'err_msg' in result:
+                raise Exception(f"임베딩 생성에 실패하였습니다. err_msg: {result['err_msg']}")
+            vectors.append(result['embedding'])
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def run_config(client, name: str, config: IndexConfig, objects: list[dict], vectors: np.ndarray,
+               query_vectors: np.ndarray, truth: np.ndarray, k: int, keep: bool) -> dict:
+    if client.collections.exists(name):
+        client.collections.delete(name)
+    client.collections.create(name, properties=LEGAL_DB_PROPERTIES, vector_index_config=config.vector_index_config())
+    collection = client.collections.get(name)
+    try:
+        ids = [uuid.uuid5(uuid.NAMESPACE_OID, str(i)) for i in range(len(objects))]
+        index_of = {str(id): i for i, id in enumerate(ids)}
+        started = time.perf_counter()
+        for start in range(0, len(objects), 256):
+            collection.data.insert_many([
+                DataObject(properties=objects[i], vector=vectors[i].tolist(), uuid=ids[i])
+                for i in range(start, min(start + 256, len(objects)))
+            ])
+        insert_seconds = time.perf_counter() - started
+
+        latencies, recalls = [], []
+        for query_vector, expected in zip(query_vectors, truth):
+            started = time.perf_counter()
+            result = collection.query.near_vector(near_vector=query_vector.tolist(), limit=k, return_properties=[])
+            latencies.append((time.perf_counter() - started) * 1000)
+            found = {index_of[str(o.uuid)] for o in result.objects}
+            recalls.append(len(found & set(expected.tolist())) / k)
+        return {
+            'config': config.label(),
+            'recall_at_k': float(np.mean(recalls)),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'insert_seconds': insert_seconds,
+        }
+    finally:
+        if not keep:
+            client.collections.delete(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', default='./pdfs')
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true', help='측정 후 임시 collection을 지우지 않습니다.')
+    parser.add_argument('--output', help='결과를 json 파일로 저장합니다.')
+    args = parser.parse_args()
+
+    objects = load_corpus(args.pdf_dir)
+    print(f'{len(objects)}개 chunk를 불러왔습니다.')
+    embedding_model = create_embedding_model()
+    vectors = embed(embedding_model, [o['text'] for o in objects])
+
+    random.seed(args.seed)
+    sampled = random.sample(objects, min(args.queries, len(objects)))
+    query_vectors = embed(embedding_model, [o['name'] for o in sampled])
+    # 코사인 유사도 전수 검색으로 정답 top-k를 구합니다.
+    k = min(args.k, len(objects))
+    truth = np.argsort(-(query_vectors @ vectors.T), axis=1)[:, :k]
+
+    client = connect_weaviate()
+    try:
+        rows = []
+        for i, config in enumerate(CONFIGS):
+            row = run_config(client, f'IndexBenchmark{i}', config, objects, vectors, query_vectors, truth, k, args.keep)
+            rows.append(row)
+            print(f"{row['config']:<45} recall@{k}={row['recall_at_k']:.3f}  p50={row['p50_ms']:.2f}ms  "
+                  f"p95={row['p95_ms']:.2f}ms  insert={row['insert_seconds']:.1f}s")
+    finally:
+        client.close()
+        embedding_model.close()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'embedding_model': embedding_model.model_id, 'n_objects': len(objects), 'k': k, 'results': rows},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
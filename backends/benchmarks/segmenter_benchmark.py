@@ -0,0 +1,214 @@
+"""조문 분할(fill_structure) 벤치마크: 조문마다 정규식을 다시 검색하던 이전 구현과 ArticleSegmenter 기반 구현 비교.
+
+./pdfs 의 법령 문서마다 구조(get_structure)를 한 번 만든 뒤 두 구현으로 본문을 채워 소요 시간과 결과 일치 여부를 출력합니다.
+구조 분석에는 법령 제목이 필요 없으므로 LLM(name_finder)은 호출하지 않습니다.
+
+사용법 (backends 디렉토리에서):
+    python -m benchmarks.segmenter_benchmark --repeat 20
+"""
+import argparse
+import copy
+import json
+import re
+import time
+from glob import glob
+
+import fitz
+
+from app.core.Preprocessor.preprocessor import DocumentProcessor
+
+
+class OfflineDocumentProcessor(DocumentProcessor):
+    def __init__(self):
+        self.all_text = ''
+        self.legal_name = ''
+        self.file_path = ''
+
+    def name_finder(self, texts, file_path = None):
+        return ''
+
+
+# 이전 DocumentProcessor.fill_structure (비교 기준으로 그대로 보관)
+def legacy_fill_structure(structure, doc):
+
+    # doc = fitz.open("your_pdf_file.pdf") # PDF 파일 로드
+    # structure = {...} # 기존의 structure 딕셔너리
+
+    # --- 1. 페이지별 텍스트와 인덱스 맵 생성 ---
+    all_texts = []
+    page_char_map = []
+    current_pos = 0
+
+    # 헤더/푸터 제거를 위한 정규식 (필요에 따라 수정)
+    header_footer_pattern = re.compile(r'법제처\s+\d+\s+국가법령정보센터')
+
+    for page in doc:
+        # 페이지 텍스트에서 헤더/푸터 제거
+        page_text = header_footer_pattern.sub('', page.get_text())
+        page_len = len(page_text)
+        
+        # 각 페이지의 정보(페이지 번호, 전체 텍스트 내 시작/끝 위치)를 저장
+        page_char_map.append({
+            'page_num': page.number + 1, # 페이지 번호는 0부터 시작하므로 +1
+            'start': current_pos,
+            'end': current_pos + page_len
+        })
+        
+        all_texts.append(page_text)
+        current_pos += page_len
+
+    # 모든 페이지 텍스트를 하나의 문자열로 결합
+    all_text = "".join(all_texts)
+
+    # --- 유연한 패턴 생성을 위한 함수 (기존과 동일) ---
+    def create_flexible_pattern(title):
+        parts = re.split(r'([0-9]+|[a-zA-Z]+|[가-힣]+|\W)', title)
+        parts = [p for p in parts if p and not p.isspace()]
+        escaped_parts = [re.escape(p) for p in parts]
+        pattern = r'\s*'.join(escaped_parts)
+        return pattern
+
+    # --- 2. 페이지 번호 조회를 위한 함수 ---
+    def find_page_for_index(index, char_map):
+        """문자열 인덱스가 속한 페이지 번호를 찾습니다."""
+        for page_info in char_map:
+            if page_info['start'] <= index < page_info['end']:
+                return page_info['page_num']
+        return -1 # 찾지 못한 경우
+
+    # --- 3. 기존 검색 로직에 페이지 번호 찾기 추가 ---
+    structure_keys = list(structure.keys())
+
+    # 마지막 조항 이후의 텍스트만 사용하는 로직 (필요시 유지)
+    last_chapter = list(structure.keys())[-1]
+    last_section = list(structure[last_chapter].keys())[-1]
+    last_article = list(structure[last_chapter][last_section].keys())[-1]
+    start_idx_match = re.search(create_flexible_pattern(last_article), all_text)
+    if start_idx_match:
+        all_text = all_text[start_idx_match.start():]
+
+    search_pos = 0
+
+    for i, chapter in enumerate(structure_keys):
+        section_dict = structure[chapter]
+        section_keys = list(section_dict.keys())
+        
+        for j, section in enumerate(section_keys):
+            articles = section_dict[section]
+
+            for k, article in enumerate(articles):
+                article_title_list = list(articles.keys())
+                current_article_title = article
+                current_pattern = create_flexible_pattern(current_article_title)
+                
+                compiled_pattern = re.compile(current_pattern, flags=0)
+                current_article_match = compiled_pattern.search(all_text, search_pos)
+                
+                if not current_article_match:
+                    continue
+
+                current_article_index = current_article_match.start()
+                search_pos = current_article_match.end()
+                
+                # 페이지 번호를 매핑
+                page_number = find_page_for_index(current_article_index + start_idx_match.start(), page_char_map)
+
+                end_index = len(all_text)
+                possible_end_indexes = []
+
+                if k + 1 < len(articles):
+                    next_article_title = article_title_list[k+1]
+                    next_pattern = create_flexible_pattern(next_article_title)
+                    compiled_next_pattern = re.compile(next_pattern, flags=0)
+                    next_match = compiled_next_pattern.search(all_text, search_pos)
+                    if next_match:
+                        possible_end_indexes.append(next_match.start())
+
+                if j + 1 < len(section_keys):
+                    next_section_articles = section_dict[section_keys[j + 1]]
+                    if next_section_articles:
+                        next_title = list(next_section_articles.keys())[0]
+                        next_pattern = create_flexible_pattern(next_title)
+                        compiled_next_pattern = re.compile(next_pattern, flags=0)
+                        next_match = compiled_next_pattern.search(all_text, search_pos)
+                        if next_match:
+                            possible_end_indexes.append(next_match.start())
+
+                if i + 1 < len(structure_keys):
+                    next_chapter_articles = structure[structure_keys[i + 1]]
+                    if next_chapter_articles:
+                        first_section_key = list(next_chapter_articles.keys())[0]
+                        if next_chapter_articles[first_section_key]:
+                            next_title = list(next_chapter_articles[first_section_key].keys())[0]
+                            next_pattern = create_flexible_pattern(next_title)
+                            compiled_next_pattern = re.compile(next_pattern, flags=0)
+                            next_match = compiled_next_pattern.search(all_text, search_pos)
+                            if next_match:
+                                possible_end_indexes.append(next_match.start())
+
+                if possible_end_indexes:
+                    end_index = min(possible_end_indexes)
+
+                raw_text = all_text[current_article_index:end_index].strip()
+                
+                # structure에 텍스트와 함께 페이지 번호를 저장
+                structure[chapter][section][current_article_title] = {
+                    'text': raw_text,
+                    'page': page_number
+                }   
+    return structure
+
+
+def measure(fill, structure, doc, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        target = copy.deepcopy(structure)
+        started = time.perf_counter()
+        result = fill(target, doc)
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, sorted(timings)[len(timings) // 2]
+
+
+# 현재 구현은 조문마다 page_breaks(조문 안 페이지 경계)도 저장하므로, 이전 구현과 같은 text/page만 비교합니다.
+def text_and_page(structure):
+    return {chapter: {section: {article: {key: value for key, value in info.items() if key in ('text', 'page')} if isinstance(info, dict) else info
+                                for article, info in articles.items()}
+                      for section, articles in sections.items()}
+            for chapter, sections in structure.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf-dir', default='./pdfs')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', help='결과를 json 파일로 저장합니다.')
+    args = parser.parse_args()
+
+    processor = OfflineDocumentProcessor()
+    rows = []
+    for path in sorted(glob(f'{args.pdf_dir}/*.pdf')):
+        doc = fitz.open(path)
+        structure = processor.get_structure(doc)
+        n_article = sum(len(articles) for sections in structure.values() for articles in sections.values())
+        legacy, legacy_ms = measure(legacy_fill_structure, structure, doc, args.repeat)
+        current, current_ms = measure(processor.fill_structure, structure, doc, args.repeat)
+        row = {
+            'file_name': path.split('/')[-1],
+            'n_page': len(doc),
+            'n_article': n_article,
+            'legacy_ms': legacy_ms,
+            'segmenter_ms': current_ms,
+            'speedup': legacy_ms / current_ms if current_ms else None,
+            'identical': json.dumps(legacy, ensure_ascii=False) == json.dumps(text_and_page(current), ensure_ascii=False),
+        }
+        rows.append(row)
+        print(f"{row['file_name'][:40]:<40} pages={row['n_page']:<4} articles={n_article:<4} "
+              f"legacy={legacy_ms:.1f}ms  segmenter={current_ms:.1f}ms  x{row['speedup']:.1f}  identical={row['identical']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
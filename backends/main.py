@@ -1,12 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import rag_router, financial_router, web_agent_router, report_router, file_upload_router
+from app.core.VDB.connection_manager import WeaviateConnectionManager, set_connection_manager
+from app.core.jobs.job_runner import JobRunner, set_job_runner
+from app.core.llm.client_registry import get_llm_registry
+from app.routers import rag_router, financial_router, web_agent_router, report_router, file_upload_router, jobs_router
+from app.services import job_handlers  # 백그라운드 작업 handler 등록
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # weaviate client 풀과 임베딩 모델을 서버 시작 시 한 번만 준비하고 모든 요청이 공유합니다.
+    manager = WeaviateConnectionManager()
+    manager.startup()
+    await manager.astartup()
+    set_connection_manager(manager)
+    app.state.vdb_manager = manager
+    # 적재/보고서 생성 같은 오래 걸리는 작업을 처리하는 worker (이전 서버에서 끝나지 못한 작업도 이어서 실행)
+    runner = JobRunner()
+    runner.start()
+    set_job_runner(runner)
+    app.state.job_runner = runner
+    yield
+    set_job_runner(None)
+    await runner.stop()
+    set_connection_manager(None)
+    await manager.aclose()
+    manager.close()
+    # 공유 LLM client들의 커넥션 풀 정리
+    await get_llm_registry().aclose()
+
 app = FastAPI(
     title="Financial Agent API",
     description="An API utilizing RAG, Financial, and Web Agent services.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 app.mount("/pdfs", StaticFiles(directory="pdfs"), name="pdfs")
 # Include routers
@@ -15,6 +44,7 @@ app.include_router(financial_router.router, prefix="/financial", tags=["Financia
 app.include_router(web_agent_router.router, prefix="/web-agent", tags=["Web Agent Service"])
 app.include_router(report_router.router, prefix="/report", tags=["Report Generation Service"])
 app.include_router(file_upload_router.router, prefix="/files", tags=["File Upload"])
+app.include_router(jobs_router.router, prefix="/jobs", tags=["Background Jobs"])
 
 origins = [
     "http://localhost:5173",
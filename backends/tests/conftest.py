@@ -0,0 +1,5 @@
+import os
+import sys
+
+# backends 디렉토리에서 `python -m pytest tests` 로 실행합니다. (app 패키지를 import 할 수 있도록 경로 추가)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+"""여러 chunk로 나뉜 조문을 참조조문으로 찾으면 첫 chunk만이 아니라 조문 전체가 돌아오는지 확인합니다."""
+from app.core.Preprocessor.chunker import CONTINUATION_MARKER
+from app.core.VDB.article_index import ArticleIndex
+from app.services.advanced_rag_workflow_service import advanced_rag_workflow
+
+NAME = '전자금융거래법제2조(정의)'
+HEADER = '전자금융거래법\n제1장 총칙\n'
+
+
+def _chunks() -> list[dict]:
+    bodies = ['1. "전자금융거래"란 금융회사가 전자적 장치를 통하여 금융상품 및 서비스를 제공하고,',
+              '이용자가 금융회사의 종사자와 직접 대면하지 아니하고 자동화된 방식으로 이를 이용하는 거래를 말한다.',
+              '2. "전자지급거래"란 자금을 주는 자가 금융회사로 하여금 전자지급수단을 이용하여 자금을 이동하게 하는 거래를 말한다.']
+    texts = [HEADER + NAME + ' ' + bodies[0]] + [HEADER + NAME + CONTINUATION_MARKER + body for body in bodies[1:]]
+    return [{'name' : NAME, 'file_name' : '전자금융거래법.pdf', 'i_chunk_on_doc' : 10 + i, 'text' : text}
+            for i, text in enumerate(texts)]
+
+
+def _index(objects: list[dict]) -> ArticleIndex:
+    index = ArticleIndex('LegalDB')
+    index.loaded = True
+    index.add_objects(objects)
+    return index
+
+
+def test_resolve_returns_whole_multi_chunk_article():
+    chunks = _chunks()
+    # 적재 순서와 관계없이 chunk 순서대로 합칩니다.
+    article = _index(list(reversed(chunks)) + [{'name' : '전자금융거래법제3조(적용범위)', 'file_name' : '전자금융거래법.pdf',
+                                                'i_chunk_on_doc' : 13, 'text' : '제3조 본문'}]).resolve([NAME])[NAME]
+
+    assert article['i_chunk_range'] == [10, 12]
+    assert article['text'].startswith(chunks[0]['text'])
+    assert all(body in article['text'] for body in ('자동화된 방식으로', '전자지급거래'))
+    assert CONTINUATION_MARKER not in article['text']
+    assert '제3조 본문' not in article['text']
+
+
+def test_collect_references_uses_whole_article():
+    chunks = _chunks()
+    found = _index(chunks).resolve([NAME])
+    workflow = object.__new__(advanced_rag_workflow)
+
+    references = workflow._collect_references([NAME], found, context_list = ['다른 조문'])
+
+    assert len(references) == 1
+    assert '전자지급거래' in references[0]['text']
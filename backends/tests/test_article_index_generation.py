@@ -0,0 +1,116 @@
+"""다른 워커가 collection generation을 올리면 이 프로세스의 조문 인덱스(ArticleIndex)가 다시 만들어지는지 확인합니다.
+(weaviate 없이 fake collection 사용, generation은 두 워커가 같은 SQLite 파일을 공유하는 CollectionGenerations)"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.VDB import article_index
+from app.core.VDB.weaviateVDB import VectorDB
+from app.core.cache.collection_generation import CollectionGenerations
+
+
+class FakeCollection:
+    name = 'LegalDB'
+
+    def __init__(self, objects: list[dict]):
+        self.objects = objects
+        self.loads = 0
+
+    def exists(self):
+        return True
+
+    def iterator(self):
+        self.loads += 1
+        return iter([SimpleNamespace(properties = p) for p in self.objects])
+
+
+def _vector_db(collection: FakeCollection, generations: CollectionGenerations) -> VectorDB:
+    vdb = object.__new__(VectorDB)
+    vdb.collection = collection
+    vdb.tenant = None
+    vdb.tenants = None
+    vdb._multi_tenant = False
+    # 검색 결과 캐시를 꺼도(RETRIEVAL_CACHE_ENABLED=false) generation은 따로 관리됩니다.
+    vdb.retrieval_cache = None
+    vdb.generations = generations
+    vdb._target_collections = lambda all_tenants = False: [collection]
+    return vdb
+
+
+@pytest.fixture(autouse = True)
+def article_indexes(monkeypatch):
+    monkeypatch.setattr(article_index, '_article_indexes', {})
+
+
+def test_lookup_rebuilds_index_after_other_worker_writes(tmp_path):
+    collection = FakeCollection([{'name' : '전자금융거래법제2조(정의)', 'i_chunk_on_doc' : 0}])
+    path = str(tmp_path / 'generations.sqlite3')
+    vdb = _vector_db(collection, CollectionGenerations(path))
+
+    assert '전자금융거래법제3조' not in vdb.lookup_articles(['전자금융거래법제3조'])
+
+    # 다른 워커가 조문을 적재하고 generation을 올립니다.
+    collection.objects.append({'name' : '전자금융거래법제3조(적용범위)', 'i_chunk_on_doc' : 1})
+    CollectionGenerations(path).bump('LegalDB')
+
+    assert '전자금융거래법제3조' in vdb.lookup_articles(['전자금융거래법제3조'])
+    assert collection.loads == 2
+
+
+def test_own_write_keeps_index_without_reload(tmp_path):
+    collection = FakeCollection([{'name' : '전자금융거래법제2조(정의)', 'i_chunk_on_doc' : 0}])
+    vdb = _vector_db(collection, CollectionGenerations(str(tmp_path / 'generations.sqlite3')))
+    vdb.lookup_articles(['전자금융거래법제2조'])
+
+    # 이 프로세스의 적재는 인덱스에 증분 반영되므로 generation이 올라도 다시 읽지 않습니다.
+    vdb._bump_generation('LegalDB')
+    article_index.get_article_index('LegalDB').add_objects([{'name' : '전자금융거래법제3조(적용범위)', 'i_chunk_on_doc' : 1}])
+
+    assert '전자금융거래법제3조' in vdb.lookup_articles(['전자금융거래법제3조'])
+    assert collection.loads == 1
+
+
+def test_own_write_after_other_worker_write_reloads(tmp_path):
+    collection = FakeCollection([{'name' : '전자금융거래법제2조(정의)', 'i_chunk_on_doc' : 0}])
+    path = str(tmp_path / 'generations.sqlite3')
+    vdb = _vector_db(collection, CollectionGenerations(path))
+    vdb.lookup_articles(['전자금융거래법제2조'])
+
+    # 다른 워커의 적재가 먼저 generation을 올렸으면, 이 프로세스의 bump 뒤에도 인덱스는 동기화된 것으로 기록되지 않습니다.
+    collection.objects.append({'name' : '전자금융거래법제3조(적용범위)', 'i_chunk_on_doc' : 1})
+    CollectionGenerations(path).bump('LegalDB')
+    vdb._bump_generation('LegalDB')
+
+    assert '전자금융거래법제3조' in vdb.lookup_articles(['전자금융거래법제3조'])
+    assert collection.loads == 2
+
+
+def test_bump_returns_new_generation(tmp_path):
+    generations = CollectionGenerations(str(tmp_path / 'generations.sqlite3'))
+    assert generations.bump('LegalDB') == 1
+    assert generations.bump() == 1
+    assert generations.bump('LegalDB') == 3
+    assert generations.generation('LegalDB') == 3
+
+
+class FakeTenantCollection(FakeCollection):
+    def __init__(self, tenant: str, objects: list[dict]):
+        super().__init__(objects)
+        self.tenant = tenant
+
+
+def test_lookup_resolves_only_within_search_tenants(tmp_path):
+    tenants = {'tenant-a' : FakeTenantCollection('tenant-a', [{'name' : '전자금융거래법제2조(정의)', 'i_chunk_on_doc' : 0}]),
+               'tenant-b' : FakeTenantCollection('tenant-b', [{'name' : '신용정보법제2조(정의)', 'i_chunk_on_doc' : 0}])}
+    vdb = _vector_db(tenants['tenant-a'], CollectionGenerations(str(tmp_path / 'generations.sqlite3')))
+    vdb._target_collections = lambda all_tenants = False: [tenants[name] for name in (vdb.tenants or tenants)]
+    vdb.tenants = ['tenant-a']
+
+    # 다른 작업공간(tenant-b)의 조문은 찾지 않고, tenant-b는 읽지도 않습니다.
+    found = vdb.lookup_articles(['전자금융거래법제2조', '신용정보법제2조'])
+    assert list(found) == ['전자금융거래법제2조']
+    assert tenants['tenant-b'].loads == 0
+
+    vdb.tenants = None
+    assert set(vdb.lookup_articles(['전자금융거래법제2조', '신용정보법제2조'])) == {'전자금융거래법제2조', '신용정보법제2조'}
+    assert tenants['tenant-a'].loads == 1
@@ -0,0 +1,57 @@
+"""커넥션 매니저 없이 get_async_vector_db로 만든 AsyncVectorDB의 client가 워크플로우 실행 뒤 닫히고,
+매니저의 공유 client는 닫히지 않고 재사용되는지 확인합니다. (weaviate 없이 fake client 사용)"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.VDB import connection_manager
+from app.core.VDB.async_weaviateVDB import AsyncVectorDB
+from app.services.vanilla_rag_workflow_service import vanilla_rag_workflow
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def _workflow() -> vanilla_rag_workflow:
+    workflow = object.__new__(vanilla_rag_workflow)
+    workflow.avdb = None
+    workflow.workflow = SimpleNamespace(ainvoke = lambda input: asyncio.sleep(0, result = {'answer' : '답변', 'retrieved_documents' : []}))
+    return workflow
+
+
+def _avdb(client: FakeClient, owns_client: bool) -> AsyncVectorDB:
+    avdb = AsyncVectorDB(client, embedding_model = object(), owns_client = owns_client)
+
+    async def set_collection(name):
+        avdb.collection = SimpleNamespace(name = name)
+    avdb.set_collection = set_collection
+    return avdb
+
+
+@pytest.mark.parametrize('owns_client', [True, False])
+def test_arun_releases_only_owned_client(monkeypatch, owns_client):
+    client = FakeClient()
+    avdb = _avdb(client, owns_client)
+
+    async def get_async_vector_db():
+        return avdb
+    monkeypatch.setattr('app.services.vanilla_rag_workflow_service.get_async_vector_db', get_async_vector_db)
+    workflow = _workflow()
+
+    result = asyncio.run(workflow.arun('전자금융거래의 정의는?'))
+
+    assert result['success']
+    assert client.closed is owns_client
+    assert (workflow.avdb is None) is owns_client
+
+
+def test_release_keeps_borrowed_vector_db():
+    avdb = _avdb(FakeClient(), owns_client = False)
+    assert asyncio.run(connection_manager.release_async_vector_db(avdb)) is avdb
+    assert asyncio.run(connection_manager.release_async_vector_db(None)) is None
@@ -0,0 +1,43 @@
+"""파일 목록(manifest)의 chunk 수가 weaviate와 어긋나면 reconcile_file_manifest가 다시 집계하는지 확인합니다. (weaviate 없이 fake collection 사용)"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.VDB import file_manifest
+from app.core.VDB.weaviateVDB import VectorDB
+
+
+class FakeCollection:
+    name = 'LegalDB'
+
+    def __init__(self, total: int):
+        self.total = total
+        self.aggregate = SimpleNamespace(over_all = lambda total_count = False: SimpleNamespace(total_count = self.total))
+
+    def exists(self):
+        return True
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manifest, '_file_manifest', file_manifest.FileManifest(str(tmp_path / 'manifest.sqlite3')))
+    return file_manifest.get_file_manifest()
+
+
+def _vector_db(collection: FakeCollection, files: list[dict]) -> VectorDB:
+    vdb = object.__new__(VectorDB)
+    vdb.collection = collection
+    vdb._target_collections = lambda all_tenants = False: [collection]
+    vdb._aggregate_files = lambda: files
+    return vdb
+
+
+def test_reconcile_rebuilds_when_counts_disagree(manifest):
+    # weaviate에는 적재되었지만 manifest 갱신 전에 프로세스가 종료된 경우
+    manifest.replace('LegalDB', [{'file_name' : 'a.pdf', 'chunk_count' : 3}])
+    files = [{'file_name' : 'a.pdf', 'chunk_count' : 3}, {'file_name' : 'b.pdf', 'chunk_count' : 2}]
+    vdb = _vector_db(FakeCollection(total = 5), files)
+
+    assert vdb.reconcile_file_manifest() is True
+    assert [f['file_name'] for f in manifest.files('LegalDB')] == ['a.pdf', 'b.pdf']
+    assert vdb.reconcile_file_manifest() is False
@@ -0,0 +1,133 @@
+"""이름의 토큰이 겹치는 두 파일("…법.pdf" / "…법 (1).pdf")이 WORD 토큰화된 이전 LegalDB에 함께 있을 때,
+한 파일의 증분 적재/삭제가 다른 파일의 chunk를 건드리지 않는지 확인합니다. (weaviate 없이 fake collection 사용)"""
+import re
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from weaviate.classes.config import Tokenization
+from weaviate.classes.query import Filter
+
+from app.core.VDB import file_manifest
+from app.core.VDB.weaviateVDB import VectorDB
+from app.core.cache import collection_generation
+from app.services.vdb_service import VDBService
+
+FILE = '전자금융거래법.pdf'
+OTHER = '전자금융거래법 (1).pdf'
+
+
+def _tokens(value: str) -> set:
+    return set(re.findall(r'\w+', value.lower()))
+
+
+class FakeCollection:
+    """weaviate WORD 토큰화 equal filter를 흉내냅니다. (filter 값의 토큰이 모두 들어있으면 일치)"""
+
+    name = 'LegalDB'
+
+    def __init__(self, objects: dict, tokenization = Tokenization.WORD):
+        self.objects = objects
+        self.deleted = []
+        self.query = SimpleNamespace(fetch_objects = self.fetch_objects)
+        self.data = SimpleNamespace(delete_many = self.delete_many)
+        properties = [SimpleNamespace(name = 'file_name', tokenization = tokenization)]
+        self.config = SimpleNamespace(get = lambda: SimpleNamespace(properties = properties))
+
+    def exists(self):
+        return True
+
+    def _match(self, filter, object_uuid, properties) -> bool:
+        if hasattr(filter, 'filters'):
+            return all(self._match(f, object_uuid, properties) for f in filter.filters)
+        if filter.target == 'name':
+            return filter.value == properties['name']
+        if filter.target == 'file_name':
+            return _tokens(filter.value) <= _tokens(properties['file_name'])
+        return object_uuid in filter.value
+
+    def fetch_objects(self, filters, return_properties = None, limit = None, offset = 0):
+        matched = [SimpleNamespace(uuid = u, properties = dict(p)) for u, p in self.objects.items() if self._match(filters, u, p)]
+        return SimpleNamespace(objects = matched[offset:offset + limit])
+
+    def delete_many(self, where):
+        ids = [u for u, p in self.objects.items() if self._match(where, u, p)]
+        for u in ids:
+            del self.objects[u]
+        self.deleted.extend(ids)
+        return SimpleNamespace(successful = len(ids))
+
+
+def _vector_db(collection: FakeCollection) -> VectorDB:
+    vdb = object.__new__(VectorDB)
+    vdb.client = SimpleNamespace(collections = SimpleNamespace(get = lambda name: collection))
+    vdb.collection = collection
+    vdb.tenant = None
+    vdb.tenants = None
+    vdb._multi_tenant = False
+    vdb._tokenization = None
+    vdb.retrieval_cache = None
+    vdb.generations = collection_generation.get_collection_generations()
+    return vdb
+
+
+@pytest.fixture
+def collection(tmp_path, monkeypatch):
+    monkeypatch.setenv('FILE_MANIFEST_PATH', str(tmp_path / 'manifest.sqlite3'))
+    monkeypatch.setenv('LOCAL_ENGINE_ENABLED', 'false')
+    monkeypatch.setattr(file_manifest, '_file_manifest', None)
+    monkeypatch.setenv('COLLECTION_GENERATION_PATH', str(tmp_path / 'generations.sqlite3'))
+    monkeypatch.setattr(collection_generation, '_collection_generations', None)
+    objects = {}
+    for file_name in (FILE, OTHER):
+        for i in range(3):
+            objects[str(uuid.uuid4())] = {'file_name' : file_name, 'name' : f'제{i + 1}조', 'i_chunk_on_doc' : i, 'file_hash' : 'old'}
+    return FakeCollection(objects)
+
+
+def _uuids_of(collection: FakeCollection, file_name: str) -> set:
+    return {u for u, p in collection.objects.items() if p['file_name'] == file_name}
+
+
+def test_fetch_file_objects_returns_exact_file_only(collection):
+    vdb = _vector_db(collection)
+    assert set(vdb.fetch_file_objects(FILE)) == _uuids_of(collection, FILE)
+    assert set(vdb.fetch_file_objects(FILE, return_properties = ['file_hash'])) == _uuids_of(collection, FILE)
+
+
+def test_apply_chunks_keeps_other_file_chunks(collection):
+    vdb = _vector_db(collection)
+    other_uuids = _uuids_of(collection, OTHER)
+    service = object.__new__(VDBService)
+    service.vdb = vdb
+    vdb.add_objects = lambda objects, file_name = None, uuids = None: {'total' : len(objects), 'inserted' : len(objects), 'failed' : []}
+    plan = {'skipped' : False, 'report' : None, 'file_hash' : 'new', 'existing' : vdb.fetch_file_objects(FILE)}
+
+    report = service.apply_chunks(FILE, [], plan)
+
+    assert report['deleted'] == 3
+    assert _uuids_of(collection, FILE) == set()
+    assert _uuids_of(collection, OTHER) == other_uuids
+
+
+def test_delete_file_keeps_other_file_chunks(collection):
+    vdb = _vector_db(collection)
+    other_uuids = _uuids_of(collection, OTHER)
+
+    vdb.delete_file(FILE)
+
+    assert _uuids_of(collection, FILE) == set()
+    assert _uuids_of(collection, OTHER) == other_uuids
+
+
+def test_delete_with_compound_filter(collection):
+    vdb = _vector_db(collection)
+    manifest = file_manifest.get_file_manifest()
+    manifest.replace('LegalDB', [{'file_name' : FILE, 'chunk_count' : 3}, {'file_name' : OTHER, 'chunk_count' : 3}])
+
+    # Filter.all_of로 만든 filter에는 target이 없으므로 파일 목록은 다음 조회 때 다시 집계합니다.
+    vdb.delete_obejcts(filter = Filter.all_of([Filter.by_property('file_name').equal(OTHER), Filter.by_property('name').equal('제1조')]))
+
+    assert len(_uuids_of(collection, OTHER)) == 2
+    assert len(_uuids_of(collection, FILE)) == 3
+    assert not manifest.is_synced('LegalDB')
@@ -0,0 +1,42 @@
+"""적재 파이프라인의 embed worker 수가 임베딩 커넥션 풀에 맞춰지고, writer가 실패해도 embed worker가 멈춰 있지 않은지 확인합니다."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.VDB.ingestion_pipeline import IngestionPipeline
+
+
+class FakeEmbeddings:
+    max_concurrency = 8
+
+    def embed_documents(self, texts: list[str]) -> list[dict]:
+        return [{'embedding' : [1.0, 0.0]} for _ in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.data = SimpleNamespace(insert_many = self.insert_many)
+
+    def insert_many(self, data_objects):
+        return SimpleNamespace(errors = {}, uuids = {i : f'uuid-{i}' for i in range(len(data_objects))})
+
+
+def test_embed_workers_sized_to_connection_pool():
+    pipeline = IngestionPipeline(FakeCollection(), FakeEmbeddings(), embed_workers = 4, embed_batch_size = 32)
+    assert pipeline.embed_workers == 2
+
+
+def test_on_inserted_failure_stops_embed_workers():
+    def on_inserted(items):
+        raise RuntimeError('local engine write failed')
+
+    pipeline = IngestionPipeline(FakeCollection(), FakeEmbeddings(), embed_workers = 4, embed_batch_size = 2, queue_size = 1,
+                                 initial_batch_size = 2, min_batch_size = 2, on_inserted = on_inserted)
+    objects = [{'text' : f'제{i}조'} for i in range(200)]
+
+    with pytest.raises(RuntimeError):
+        pipeline.run(objects)
+
+    # producer/embed worker 스레드가 모두 끝났어야 합니다. (tqdm 모니터 등 Thread 하위 클래스는 제외)
+    assert [t for t in threading.enumerate() if type(t) is threading.Thread] == []
@@ -0,0 +1,23 @@
+"""heartbeat가 끊겨 다른 worker가 다시 가져간 작업을 늦게 끝난 이전 시도가 덮어쓰지 않는지 확인합니다."""
+import time
+
+from app.core.jobs.job_store import JobStore
+
+
+def test_finish_ignores_stale_attempt(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    job, _ = store.submit('report', {'corp_code' : '00126380'})
+
+    first = store.claim(['report'])
+    store.stale_seconds = 0
+    time.sleep(0.01)
+    second = store.claim(['report'])
+    assert (first['attempts'], second['attempts']) == (1, 2)
+
+    assert store.finish(job['id'], {'report' : 'old'}, attempt = first['attempts']) is False
+    assert store.get(job['id'])['status'] == 'running'
+
+    assert store.finish(job['id'], {'report' : 'new'}, attempt = second['attempts']) is True
+    finished = store.get(job['id'])
+    assert finished['status'] == 'succeeded'
+    assert finished['result'] == {'report' : 'new'}
@@ -0,0 +1,52 @@
+"""cache_validate를 통과하지 못한 응답(파싱 실패)은 LLM 응답 캐시에 저장되지 않고 다음 호출에서 다시 묻는지 확인합니다."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.cache import llm_response_cache
+from app.core.llm import llm as llm_module
+from app.core.llm.llm import BaseLLM
+
+
+class FakeLLM(BaseLLM):
+    provider = 'fake'
+    model_name = 'fake-model'
+
+    def __init__(self, answers: list):
+        super().__init__()
+        self.answers = answers
+        self.temperatures = []
+
+    @property
+    def sync_client(self):
+        def create(model, messages, temperature):
+            self.temperatures.append(temperature)
+            message = SimpleNamespace(content = self.answers.pop(0))
+            return SimpleNamespace(choices = [SimpleNamespace(message = message)])
+        return SimpleNamespace(chat = SimpleNamespace(completions = SimpleNamespace(create = create)))
+
+
+@pytest.fixture(autouse = True)
+def response_cache(tmp_path, monkeypatch):
+    cache = llm_response_cache.LLMResponseCache(str(tmp_path / 'llm_responses.sqlite3'))
+    monkeypatch.setattr(llm_module, 'get_llm_response_cache', lambda: cache)
+    return cache
+
+
+def test_invalid_response_is_not_cached():
+    llm = FakeLLM(['목차에 없습니다', '12'])
+    is_idx = lambda r: r.strip().isdigit()
+
+    assert llm.call('sys', 'toc', temperature = 0, cache_ttl = 60, cache_validate = is_idx) == '목차에 없습니다'
+    assert llm.call('sys', 'toc', temperature = 0, cache_ttl = 60, cache_validate = is_idx) == '12'
+    assert llm.call('sys', 'toc', temperature = 0, cache_ttl = 60, cache_validate = is_idx) == '12'
+    assert llm.answers == []
+    assert llm.temperatures == [0, 0]
+
+
+def test_cache_key_includes_call_temperature():
+    llm = FakeLLM(['a', 'b'])
+
+    assert llm.call('sys', 'input', temperature = 0, cache_ttl = 60) == 'a'
+    assert llm.call('sys', 'input', cache_ttl = 60) == 'b'
+    assert llm.temperatures == [0, llm.temperature]
@@ -0,0 +1,43 @@
+"""로컬 검색 엔진 디렉토리가 워커(프로세스)마다 나뉘고, 종료된 워커의 디렉토리만 이어받는지 확인합니다."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.VDB import local_engine
+
+
+@pytest.fixture
+def engine_root(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOCAL_ENGINE_DIR', str(tmp_path))
+    monkeypatch.setattr(local_engine, '_process_engine_dir', None)
+    return tmp_path
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_adopts_dead_worker_dir_only(engine_root):
+    dead = engine_root / f'pid-{_dead_pid()}'
+    (dead / 'LegalDB').mkdir(parents = True)
+    alive = engine_root / f'pid-{os.getppid()}'
+    alive.mkdir()
+
+    path = local_engine.process_engine_dir()
+
+    assert path == os.path.join(str(engine_root), f'pid-{os.getpid()}')
+    assert os.path.isdir(os.path.join(path, 'LegalDB'))
+    assert not dead.exists()
+    assert alive.exists()
+
+
+def test_engine_files_live_under_process_dir(engine_root):
+    engine = local_engine.LocalHybridEngine('LegalDB')
+    engine.add([{'text' : '전자금융거래법'}], [[1.0, 0.0]], ['u1'])
+
+    assert engine.path == os.path.join(str(engine_root), f'pid-{os.getpid()}', 'LegalDB')
+    assert os.path.exists(os.path.join(engine.path, 'vectors.f16'))
@@ -0,0 +1,54 @@
+"""get_by_names가 토큰이 겹치는 조문("제5조", "정의" 등)이 많아도 정확히 같은 name의 조문을 찾는지 확인합니다. (weaviate 없이 fake collection 사용)"""
+import re
+from types import SimpleNamespace
+
+from app.core.VDB.weaviateVDB import VectorDB, NAME_LOOKUP_PAGE_SIZE
+
+WANTED = '전자금융거래법제5조(정의)'
+
+
+def _tokens(value: str) -> set:
+    return set(re.findall(r'\w+', value))
+
+
+class FakeCollection:
+    """WORD 토큰화 equal filter를 흉내냅니다. 값의 토큰이 모두 들어있는 object를 적재 순서대로 돌려줍니다."""
+
+    name = 'LegalDB'
+
+    def __init__(self, objects: list[dict]):
+        self.objects = objects
+        self.query = SimpleNamespace(fetch_objects = self.fetch_objects)
+
+    def exists(self):
+        return True
+
+    def _values(self, filter) -> list[str]:
+        if hasattr(filter, 'filters'):
+            return [f.value for f in filter.filters]
+        return [filter.value]
+
+    def fetch_objects(self, filters, limit = None, offset = 0):
+        values = self._values(filters)
+        matched = [SimpleNamespace(properties = p) for p in self.objects
+                   if any(_tokens(value) <= _tokens(p['name']) for value in values)]
+        return SimpleNamespace(objects = matched[offset:offset + limit])
+
+
+def _vector_db(collection) -> VectorDB:
+    vdb = object.__new__(VectorDB)
+    vdb.collection = collection
+    vdb.tenants = None
+    vdb._multi_tenant = False
+    return vdb
+
+
+def test_get_by_names_finds_exact_name_past_token_matches():
+    # 같은 토큰(전자금융거래법, 제5조, 정의)을 가진 다른 조문이 한 페이지보다 많이 먼저 적재되어 있습니다.
+    noise = [{'name' : f'전자금융거래법제5조(정의) 시행 {i}', 'i_chunk_on_doc' : i} for i in range(NAME_LOOKUP_PAGE_SIZE * 2)]
+    wanted = {'name' : WANTED, 'i_chunk_on_doc' : 0, 'text' : '제5조 본문'}
+    vdb = _vector_db(FakeCollection(noise + [wanted]))
+
+    found = vdb.get_by_names([WANTED, '없는법제1조(목적)'])
+
+    assert found == {WANTED : wanted}
@@ -0,0 +1,39 @@
+"""임베딩 요청이 이벤트 루프의 세마포어 하나로 동시 요청 수를 제한하고, 형식이 다른 응답은 해당 텍스트만 실패로 돌려주는지 확인합니다."""
+import asyncio
+
+from app.core.VDB.navercloud_embedding import NaverCloudEmbeddings
+
+
+def test_malformed_response_fails_only_that_text(monkeypatch):
+    embeddings = NaverCloudEmbeddings(host = 'example.com', api_key = 'key', use_cache = False)
+    responses = {'제1조' : {'status' : {'code' : '20000'}, 'result' : {'embedding' : [1.0]}}, '제2조' : {'message' : 'bad gateway'}}
+    monkeypatch.setattr(embeddings, '_send_request', lambda request: responses[request['text']])
+
+    results = embeddings.embed_documents(['제1조', '제2조'])
+
+    assert results[0] == {'embedding' : [1.0]}
+    assert 'err_msg' in results[1]
+
+
+def test_concurrent_calls_share_request_slots():
+    embeddings = NaverCloudEmbeddings(host = 'example.com', api_key = 'key', max_concurrency = 2, use_cache = False)
+    running, peak = 0, 0
+
+    class FakeClient:
+        async def post(self, uri, content):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return type('Response', (), {'status_code' : 200, 'headers' : {},
+                                         'content' : b'{"status": {"code": "20000"}, "result": {"embedding": [1.0]}}'})()
+
+    async def main():
+        embeddings._async_clients[asyncio.get_running_loop()] = FakeClient()
+        return await asyncio.gather(*[embeddings.aembed_documents([f'제{i}조', f'제{i}조의2']) for i in range(4)])
+
+    results = asyncio.run(main())
+
+    assert all(result == {'embedding' : [1.0]} for batch in results for result in batch)
+    assert peak == 2
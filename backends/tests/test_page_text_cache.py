@@ -0,0 +1,22 @@
+"""PageTextCache가 파일 크기/수정 시각이 그대로면 파일 해시를 다시 계산하지 않는지 확인합니다."""
+import os
+
+from app.core.Preprocessor import page_text
+
+
+def test_file_hash_computed_once_until_file_changes(tmp_path, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(page_text, 'file_hash', lambda path: hashed.append(path) or f'hash-{len(hashed)}')
+    monkeypatch.setattr(page_text, '_extract', lambda file_path, doc = None: ['제1조 본문'])
+    path = tmp_path / '전자금융거래법.pdf'
+    path.write_bytes(b'%PDF-1.4 v1')
+    cache = page_text.PageTextCache()
+
+    first = cache.get(str(path))
+    assert cache.get(str(path)) is first
+    assert len(hashed) == 1
+
+    path.write_bytes(b'%PDF-1.4 v2 changed')
+    os.utime(path, (0, 1))
+    assert cache.get(str(path)) is not first
+    assert len(hashed) == 2
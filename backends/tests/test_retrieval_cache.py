@@ -0,0 +1,26 @@
+"""검색 도중에 다른 워커가 문서를 적재(bump)하면, 적재 전 데이터로 만든 결과가 새 generation으로 캐시되지 않는지 확인합니다."""
+from app.core.cache.retrieval_cache import RetrievalCache
+
+
+def test_result_computed_before_bump_is_not_served_after(tmp_path):
+    path = str(tmp_path / 'retrieval.sqlite3')
+    cache = RetrievalCache(path)
+
+    cached, generation = cache.get('LegalDB', 'hybrid', '전자금융거래', 4, 0.5, ['text'])
+    assert cached is None
+    stale = [{'name' : '적재 전 결과'}]
+    # 검색이 끝나기 전에 다른 워커가 문서를 적재합니다.
+    RetrievalCache(path).bump('LegalDB')
+    cache.put('LegalDB', 'hybrid', '전자금융거래', 4, 0.5, ['text'], stale, generation)
+
+    cached, _ = cache.get('LegalDB', 'hybrid', '전자금융거래', 4, 0.5, ['text'])
+    assert cached is None
+
+
+def test_result_is_served_within_same_generation(tmp_path):
+    cache = RetrievalCache(str(tmp_path / 'retrieval.sqlite3'))
+    _, generation = cache.get('LegalDB', 'bm25', '전자금융거래', 4, None, ['text'])
+    cache.put('LegalDB', 'bm25', '전자금융거래', 4, None, ['text'], [{'name' : '제2조'}], generation)
+
+    cached, _ = cache.get('LegalDB', 'bm25', '전자금융거래 ', 4, None, ['text'])
+    assert cached == [{'name' : '제2조'}]
@@ -0,0 +1,73 @@
+"""LegalDB 관리용 CLI.
+
+사용법 (backends 디렉토리에서, weaviate 실행 필요):
+    python vdb_cli.py snapshot                       # SNAPSHOT_DIR(기본 ./snapshots) 아래에 저장
+    python vdb_cli.py snapshot --path ./snapshots/legal
+    python vdb_cli.py restore ./snapshots/legal      # 임베딩 호출 없이 복구
+    python vdb_cli.py ingest                         # ./pdfs의 모든 PDF를 병렬 증분 적재
+    python vdb_cli.py ingest a.pdf b.pdf --parse-workers 8 --llm-concurrency 8
+    python vdb_cli.py migrate                        # 토큰화 방식이 바뀐 프로퍼티가 있으면 스냅샷으로 LegalDB를 다시 만듦
+"""
+import argparse
+import json
+import os
+
+from app.services.vdb_service import VDBService
+
+
+def snapshot(service: VDBService, args) -> dict:
+    return service.snapshot(path = args.path)
+
+
+def restore(service: VDBService, args) -> dict:
+    return service.restore(path = args.path)
+
+
+def ingest(service: VDBService, args) -> dict:
+    if args.parse_workers:
+        os.environ['INGEST_PARSE_WORKERS'] = str(args.parse_workers)
+    if args.llm_concurrency:
+        os.environ['INGEST_LLM_CONCURRENCY'] = str(args.llm_concurrency)
+    file_names = args.files or sorted(file_name for file_name in os.listdir('./pdfs') if file_name.endswith('.pdf'))
+    result = service.register_many(file_names, workspace = args.workspace)
+    result.pop('progress', None)
+    return result
+
+
+def migrate(service: VDBService, args) -> dict:
+    return service.migrate_schema()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'LegalDB 관리용 CLI')
+    parser.add_argument('--url', help = 'weaviate 주소 (없으면 WEAVIATE_URL 또는 로컬)')
+    subparsers = parser.add_subparsers(dest = 'command', required = True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help = 'LegalDB를 벡터와 함께 스냅샷으로 저장합니다.')
+    snapshot_parser.add_argument('--path', help = '저장할 디렉토리')
+    snapshot_parser.set_defaults(func = snapshot)
+
+    restore_parser = subparsers.add_parser('restore', help = '스냅샷을 LegalDB에 다시 적재합니다.')
+    restore_parser.add_argument('path', help = '스냅샷 디렉토리')
+    restore_parser.set_defaults(func = restore)
+
+    ingest_parser = subparsers.add_parser('ingest', help = './pdfs의 PDF를 병렬로 증분 적재합니다.')
+    ingest_parser.add_argument('files', nargs = '*', help = './pdfs 안의 파일 이름 (없으면 전체)')
+    ingest_parser.add_argument('--workspace', help = '멀티테넌트 LegalDB에서 적재할 작업공간')
+    ingest_parser.add_argument('--parse-workers', type = int, help = 'PDF 파싱 process 수 (INGEST_PARSE_WORKERS)')
+    ingest_parser.add_argument('--llm-concurrency', type = int, help = '법령 제목 LLM 동시 호출 수 (INGEST_LLM_CONCURRENCY)')
+    ingest_parser.set_defaults(func = ingest)
+
+    migrate_parser = subparsers.add_parser('migrate', help = 'LegalDB를 현재 스키마(name/file_name FIELD 토큰화)로 다시 만듭니다.')
+    migrate_parser.set_defaults(func = migrate)
+
+    args = parser.parse_args()
+    service = VDBService(url = args.url)
+    result = args.func(service, args)
+    print(json.dumps(result, ensure_ascii = False, indent = 2, default = str))
+    if not result['success']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()